@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+import argparse
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+
+import generator
+
+
+RESULTS_DIR = generator.ROOT / "blog" / "bench-results"
+DEFAULT_SIZES = "10,100,1000"
+MAX_POSTS = 50_000
+
+TAGS = ["Accesos", "Decisión", "Riesgo", "Vulnerabilidades", "Comportamiento", "Blog"]
+IMAGES = [
+    "portada_facebook.png",
+    "donde_empiezan_robos.png",
+    "nunca_ha_pasado_nada.png",
+    "seguridad_sin_diagnostico.png",
+]
+WORDS = (
+    "riesgo real accesos secundarios rutinas previsibles evaluación profesional intrusión exposición "
+    "vivienda negocio local puerta ventana patio persiana horario entorno reacción oportunidad "
+    "intruso cerramiento supervisión barrio calle presencia señales diagnóstico criterio método"
+).split()
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def synthetic_post(index: int, rng: random.Random) -> str:
+    """Artículo con la misma estructura que genera blog/new_post.py."""
+    title = f"{sentence(rng, rng.randint(4, 9))[:-1]} {index}"
+    day = date(2026, 1, 1) + timedelta(days=index % 365)
+    lines = [
+        "---",
+        f"title: {title}",
+        f"date: {day.isoformat()}",
+        f"tag: {rng.choice(TAGS)}",
+        f"image: {rng.choice(IMAGES)}",
+        f"image_alt: {title}",
+        "popular_rank: ",
+        "---",
+        "",
+        f"# {title}",
+        "",
+        f"![{sentence(rng, 4)[:-1]}]({rng.choice(IMAGES)})",
+        "",
+    ]
+    for _ in range(rng.randint(3, 8)):
+        lines += [f"## {sentence(rng, rng.randint(3, 6))[:-1]}", sentence(rng, rng.randint(25, 60)), ""]
+        if rng.random() < 0.5:
+            lines += [f"- {sentence(rng, rng.randint(4, 10))}" for _ in range(rng.randint(3, 6))] + [""]
+        if rng.random() < 0.3:
+            lines += [f"### {sentence(rng, 3)[:-1]}", f"{sentence(rng, 20)} **{sentence(rng, 3)}**", ""]
+        if rng.random() < 0.3:
+            lines += [f"> {sentence(rng, rng.randint(8, 15))}", ""]
+    lines += ["## Conclusión", f"👉 {sentence(rng, rng.randint(6, 12))}", ""]
+    return "\n".join(lines)
+
+
+def write_corpus(content_dir: Path, count: int, seed: int) -> List[Path]:
+    rng = random.Random(seed)
+    content_dir.mkdir(parents=True, exist_ok=True)
+    paths: List[Path] = []
+    for i in range(1, count + 1):
+        path = content_dir / f"{i:05d}-articulo-sintetico.md"
+        path.write_text(synthetic_post(i, rng), encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def timed(stages: Dict[str, float], name: str, fn: Callable[[], List]) -> List:
+    start = time.perf_counter()
+    result = fn()
+    stages[name] = time.perf_counter() - start
+    return result
+
+
+def bench_corpus(count: int, seed: int) -> Dict[str, object]:
+    stages: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory(prefix="ps-blog-bench-") as tmp:
+        tmp_dir = Path(tmp)
+        md_paths = write_corpus(tmp_dir / "posts", count, seed)
+        out_dir = tmp_dir / "out"
+        out_dir.mkdir()
+
+        raws = [p.read_text(encoding="utf-8") for p in md_paths]
+        timed(stages, "parse_front_matter", lambda: [generator.parse_front_matter(raw) for raw in raws])
+        posts = timed(stages, "read_post", lambda: [generator.read_post(p) for p in md_paths])
+        timed(stages, "md_to_html", lambda: [generator.md_to_html(p.body_md, "../../", p.image) for p in posts])
+        contents = timed(
+            stages, "render_post_content", lambda: [generator.render_post_content(p, asset_prefix="../../") for p in posts]
+        )
+        pages = timed(stages, "build_page", lambda: [generator.build_page(c, path_prefix="../../") for c in contents])
+        timed(
+            stages,
+            "write",
+            lambda: [generator.write_if_changed(out_dir / f"{p.slug}.html", page) for p, page in zip(posts, pages)],
+        )
+        posts_sorted = sorted(posts, key=lambda p: (p.date_iso, p.slug), reverse=True)
+        timed(stages, "render_blog_content", lambda: [generator.build_page(generator.render_blog_content(posts_sorted))])
+
+        bytes_in = sum(len(raw.encode("utf-8")) for raw in raws)
+        bytes_out = sum(len(page.encode("utf-8")) for page in pages)
+
+    total = sum(stages.values())
+    return {
+        "posts": count,
+        "bytes_in": bytes_in,
+        "bytes_out": bytes_out,
+        "stages": {name: round(seconds, 6) for name, seconds in stages.items()},
+        "total": round(total, 6),
+        "per_post_ms": round(total / count * 1000, 4),
+    }
+
+
+def load_results(path: Path) -> Dict[int, Dict[str, object]]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return {int(r["posts"]): r for r in data.get("results", [])}
+
+
+def print_result(result: Dict, previous: Dict | None) -> None:
+    print(f"\n{result['posts']} posts · {result['total']:.3f}s · {result['per_post_ms']} ms/post")
+    stages = result["stages"]
+    prev_stages = (previous or {}).get("stages", {})
+    for name, seconds in stages.items():
+        line = f"  {name:<22} {seconds * 1000:>10.2f} ms"
+        if prev_stages.get(name):
+            line += f"   x{seconds / prev_stages[name]:.2f} vs anterior"
+        print(line)
+
+
+def parse_sizes(value: str) -> List[int]:
+    try:
+        sizes = [int(x) for x in value.split(",") if x.strip()]
+    except ValueError as e:
+        raise argparse.ArgumentTypeError("usa una lista de enteros, p. ej. 10,100,1000") from e
+    if not sizes or any(n < 1 or n > MAX_POSTS for n in sizes):
+        raise argparse.ArgumentTypeError(f"cada tamaño debe estar entre 1 y {MAX_POSTS}")
+    return sizes
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark por etapas del generador del blog.")
+    parser.add_argument(
+        "--sizes",
+        type=parse_sizes,
+        default=parse_sizes(DEFAULT_SIZES),
+        help=f"tamaños de corpus sintético separados por comas (por defecto {DEFAULT_SIZES}, máx. {MAX_POSTS})",
+    )
+    parser.add_argument("--seed", type=int, default=1, help="semilla del corpus sintético")
+    parser.add_argument(
+        "--output", type=Path, help="JSON de resultados (por defecto, blog/bench-results/<fecha>.json)"
+    )
+    parser.add_argument("--compare", type=Path, help="JSON de una ejecución anterior para comparar")
+    args = parser.parse_args(argv)
+
+    previous = load_results(args.compare) if args.compare else {}
+    results = []
+    for count in args.sizes:
+        result = bench_corpus(count, args.seed)
+        print_result(result, previous.get(count))
+        results.append(result)
+
+    output = args.output or RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "seed": args.seed,
+                "results": results,
+            },
+            ensure_ascii=False,
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    print(f"\nOK\n- Resultados: {output}")
+
+
+if __name__ == "__main__":
+    main()
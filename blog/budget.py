@@ -0,0 +1,294 @@
+"""Presupuesto de peso de página y de tiempo de build de blog/build.py.
+
+Con --budget, tras escribir las salidas, build.py mide cada página HTML generada (bytes,
+bytes comprimidos, y número y peso de las imágenes, hojas CSS y scripts locales que
+referencia) y compara las medidas con la línea base versionada en blog/budget.json. Cada
+métrica admite base × ratio + holgura, más per_card por cada tarjeta de artículo que la
+página tenga de más (un artículo nuevo añade una tarjeta a los listados y a veces a las
+lecturas relacionadas); además hay límites absolutos por página, que también se aplican a
+las páginas nuevas. Los tiempos por etapa solo se comparan en builds completos.
+
+La línea base guarda con qué opciones se midió (minificado, --shell-assets, --fingerprint
+y si estaba Pillow): con otras, las medidas no son comparables y no se comprueba nada.
+
+Las medidas de las páginas que no se vuelven a renderizar (bytes y assets que referencian)
+se conservan en blog/.build-budget.json, así que una página que supera el presupuesto sigue
+fallando en los builds incrementales hasta que se corrige o se regenera la línea base.
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+import gzip
+import json
+import os
+import posixpath
+import re
+import time
+
+from build_util import kb, report_lines, write_atomic
+
+
+BASELINE_PATH = Path(__file__).resolve().parent / "budget.json"
+REPORT_PATH = Path(__file__).resolve().parent / ".build-budget.json"
+BUDGET_VERSION = 2
+
+PAGE_METRICS = (
+    "html_bytes",
+    "compressed_bytes",
+    "images",
+    "image_bytes",
+    "max_image_bytes",
+    "css",
+    "css_bytes",
+    "js",
+    "js_bytes",
+)
+METRIC_LABELS = {
+    "html_bytes": "HTML",
+    "compressed_bytes": "HTML comprimido",
+    "images": "imágenes",
+    "image_bytes": "peso de imágenes",
+    "max_image_bytes": "imagen más pesada",
+    "css": "hojas CSS",
+    "css_bytes": "peso CSS",
+    "js": "scripts",
+    "js_bytes": "peso JS",
+    "stage_ms": "tiempo",
+}
+# Base × ratio + holgura (+ per_card por tarjeta nueva). Los recuentos solo crecen con las tarjetas
+# (una imagen cada una, de hasta el límite por imagen); los tiempos, bastante (ruido de la máquina).
+DEFAULT_THRESHOLDS: Dict[str, Dict[str, float]] = {
+    "html_bytes": {"ratio": 1.10, "slack": 2048, "per_card": 1024},
+    "compressed_bytes": {"ratio": 1.10, "slack": 1024, "per_card": 512},
+    "images": {"ratio": 1.0, "slack": 0, "per_card": 1},
+    "image_bytes": {"ratio": 1.10, "slack": 20480, "per_card": 512 * 1024},
+    "max_image_bytes": {"ratio": 1.10, "slack": 20480},
+    "css": {"ratio": 1.0, "slack": 0},
+    "css_bytes": {"ratio": 1.10, "slack": 2048},
+    "js": {"ratio": 1.0, "slack": 0},
+    "js_bytes": {"ratio": 1.10, "slack": 2048},
+    "stage_ms": {"ratio": 1.5, "slack": 500},
+}
+# Máximo por página, tenga o no línea base (p. ej. una portada PNG de 2 MB en un artículo nuevo).
+DEFAULT_LIMITS: Dict[str, int] = {
+    "html_bytes": 256 * 1024,
+    "compressed_bytes": 64 * 1024,
+    "image_bytes": 2048 * 1024,
+    "max_image_bytes": 512 * 1024,
+    "css_bytes": 256 * 1024,
+    "js_bytes": 256 * 1024,
+}
+
+ASSET_TAG_RE = re.compile(r"<(img|script|link)\b([^>]*)>", re.I)
+CARD_RE = re.compile(r"<a class=\"card\"")
+ASSET_ATTR_RE = re.compile(r"\b(src|href|rel)\s*=\s*[\"']([^\"']*)[\"']", re.I)
+
+
+def format_value(metric: str, value: float) -> str:
+    if metric == "stage_ms":
+        return f"{value:.1f} ms"
+    return kb(value) if metric.endswith("_bytes") else str(int(value))
+
+
+class StageClock:
+    """Tiempo de pared por etapa de run_build(): cada lap() cierra la etapa en curso.
+
+    El tiempo dentro de aside() (escribir y precomprimir salidas) no cuenta: depende de
+    cuántas salidas cambian, y un --force sin cambios no escribe nada.
+    """
+
+    def __init__(self) -> None:
+        self.start = self.last = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.skipped = 0.0
+        self.skipped_total = 0.0
+
+    @contextmanager
+    def aside(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.skipped += elapsed
+            self.skipped_total += elapsed
+
+    def lap(self, name: str) -> None:
+        now = time.perf_counter()
+        self.stages[name] = self.stages.get(name, 0.0) + (now - self.last - self.skipped) * 1000
+        self.last = now
+        self.skipped = 0.0
+
+    def totals(self) -> Dict[str, float]:
+        total = (self.last - self.start - self.skipped_total + self.skipped) * 1000
+        return {**{name: round(ms, 1) for name, ms in self.stages.items()}, "total": round(total, 1)}
+
+
+class PageMeter:
+    """Mide páginas ya escritas. El tamaño de cada asset se consulta una sola vez por build."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.sizes: Dict[str, int] = {}
+
+    def asset_size(self, rel_path: str) -> int:
+        size = self.sizes.get(rel_path)
+        if size is None:
+            try:
+                size = os.stat(self.root / rel_path).st_size
+            except OSError:
+                size = 0  # Los enlaces rotos no son cosa del presupuesto.
+            self.sizes[rel_path] = size
+        return size
+
+    def resolve(self, url: str, page_dir: str) -> str | None:
+        url = url.split("#", 1)[0].split("?", 1)[0]
+        if not url or url.startswith(("http://", "https://", "//", "data:", "mailto:", "tel:", "javascript:")):
+            return None
+        path = url[1:] if url.startswith("/") else posixpath.join(page_dir, url)
+        path = posixpath.normpath(path)
+        return None if path.startswith("..") else path
+
+    def measure(self, rel_path: str, text: str | None = None) -> Dict[str, object]:
+        """Bytes de una página y assets locales que referencia. text es el HTML antes de minificar; si falta, se lee."""
+        path = self.root / rel_path
+        data = path.read_bytes()
+        if text is None:
+            text = data.decode("utf-8")
+        gz = path.with_name(path.name + ".gz")
+        try:
+            compressed = os.stat(gz).st_size
+        except OSError:
+            compressed = len(gzip.compress(data, compresslevel=9, mtime=0))
+        page_dir = posixpath.dirname(rel_path)
+        refs: List[List[str]] = []
+        for m in ASSET_TAG_RE.finditer(text):
+            tag = m.group(1).lower()
+            attrs = {name.lower(): value for name, value in ASSET_ATTR_RE.findall(m.group(2))}
+            if tag == "link":
+                if "stylesheet" not in attrs.get("rel", "").lower().split():
+                    continue
+                kind, url = "css", attrs.get("href", "")
+            else:
+                kind, url = ("images" if tag == "img" else "js"), attrs.get("src", "")
+            asset = self.resolve(url, page_dir)
+            if asset is not None and [kind, asset] not in refs:
+                refs.append([kind, asset])
+        cards = len(CARD_RE.findall(text))
+        return {"html_bytes": len(data), "compressed_bytes": compressed, "cards": cards, "refs": refs}
+
+    def metrics(self, record: Dict[str, object]) -> Dict[str, int]:
+        """Métricas de una página medida con measure(), con el tamaño actual de cada asset."""
+        metrics = dict.fromkeys(PAGE_METRICS, 0)
+        metrics["html_bytes"] = record["html_bytes"]  # type: ignore[assignment]
+        metrics["compressed_bytes"] = record["compressed_bytes"]  # type: ignore[assignment]
+        metrics["cards"] = record.get("cards", 0)  # type: ignore[assignment]
+        for kind, asset in record["refs"]:  # type: ignore[attr-defined]
+            size = self.asset_size(asset)
+            metrics[kind] += 1
+            if kind == "images":
+                metrics["image_bytes"] += size
+                metrics["max_image_bytes"] = max(metrics["max_image_bytes"], size)
+            else:
+                metrics[f"{kind}_bytes"] += size
+        return metrics
+
+
+def load_json(path: Path) -> Dict[str, object]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) and data.get("version") == BUDGET_VERSION else {}
+
+
+def save_json(path: Path, data: Dict[str, object]) -> None:
+    write_atomic(path, (json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True) + "\n").encode("utf-8"))
+
+
+def allowed(base: float, threshold: Dict[str, float], extra_cards: int = 0) -> float:
+    return base * threshold.get("ratio", 1.0) + threshold.get("slack", 0) + threshold.get("per_card", 0) * extra_cards
+
+
+def mismatch(baseline: Dict[str, object], build: Dict[str, object]) -> List[str]:
+    """Opciones en las que difieren la línea base y este build (vacío si las medidas son comparables)."""
+    measured: Dict[str, object] = baseline.get("build", {})  # type: ignore[assignment]
+    return [f"{name}: {measured.get(name)} → {value}" for name, value in sorted(build.items()) if measured.get(name) != value]
+
+
+def check(
+    baseline: Dict[str, object], pages: Dict[str, Dict[str, int]], stages: Dict[str, float] | None
+) -> List[str]:
+    """Líneas con cada métrica que supera su presupuesto (vacío si todo cabe). stages=None no compara tiempos."""
+    custom: Dict[str, Dict[str, float]] = baseline.get("thresholds", {})  # type: ignore[assignment]
+    thresholds = {metric: {**default, **custom.get(metric, {})} for metric, default in DEFAULT_THRESHOLDS.items()}
+    limits: Dict[str, int] = baseline.get("limits", DEFAULT_LIMITS)  # type: ignore[assignment]
+    base_pages: Dict[str, Dict[str, int]] = baseline.get("pages", {})  # type: ignore[assignment]
+    out: List[str] = []
+    for rel_path in sorted(pages):
+        metrics = pages[rel_path]
+        base = base_pages.get(rel_path)
+        extra_cards = max(0, metrics.get("cards", 0) - base.get("cards", 0)) if base is not None else 0
+        for metric in PAGE_METRICS:
+            value = metrics.get(metric, 0)
+            label = METRIC_LABELS[metric]
+            limit = limits.get(metric)
+            if limit is not None and value > limit:
+                out.append(f"  {rel_path}: {label} {format_value(metric, value)} (límite {format_value(metric, limit)})")
+            elif base is not None and value > allowed(base.get(metric, 0), thresholds[metric], extra_cards):
+                old = base.get(metric, 0)
+                top = allowed(old, thresholds[metric], extra_cards)
+                out.append(
+                    f"  {rel_path}: {label} {format_value(metric, old)} → {format_value(metric, value)} "
+                    f"(+{format_value(metric, value - old)}, máx. {format_value(metric, top)})"
+                )
+    base_stages: Dict[str, float] = baseline.get("stages", {})  # type: ignore[assignment]
+    for name, ms in (stages or {}).items():
+        if name in base_stages and ms > allowed(base_stages[name], thresholds["stage_ms"]):
+            old = base_stages[name]
+            out.append(
+                f"  etapa {name}: {format_value('stage_ms', old)} → {format_value('stage_ms', ms)} "
+                f"(máx. {format_value('stage_ms', allowed(old, thresholds['stage_ms']))})"
+            )
+    return out
+
+
+def new_baseline(
+    previous: Dict[str, object], pages: Dict[str, Dict[str, int]], stages: Dict[str, float], build: Dict[str, object]
+) -> Dict[str, object]:
+    """Línea base con las medidas y las opciones de este build; umbrales y límites se conservan si ya existían."""
+    return {
+        "version": BUDGET_VERSION,
+        "build": build,
+        "thresholds": previous.get("thresholds", DEFAULT_THRESHOLDS),
+        "limits": previous.get("limits", DEFAULT_LIMITS),
+        "pages": pages,
+        "stages": stages,
+    }
+
+
+def merge_report(
+    measured: Dict[str, Dict[str, object]], outputs: List[str], options: str, meter: PageMeter
+) -> Tuple[Dict[str, Dict[str, int]], Dict[str, object]]:
+    """Métricas de todas las páginas: medidas en este build, guardadas del anterior o, si faltan, leídas del disco.
+
+    Los assets se vuelven a consultar siempre: una imagen sustituida sin cambiar de nombre
+    cuenta aunque la página no se haya vuelto a renderizar.
+    """
+    report = load_json(REPORT_PATH)
+    stored: Dict[str, Dict[str, object]] = report.get("pages", {}) if report.get("options") == options else {}  # type: ignore[assignment]
+    records: Dict[str, Dict[str, object]] = {}
+    for rel_path in outputs:
+        if not rel_path.endswith(".html"):
+            continue
+        record = measured.get(rel_path) or stored.get(rel_path)
+        if record is None:
+            try:
+                record = meter.measure(rel_path)
+            except OSError:
+                continue
+        records[rel_path] = record
+    pages = {rel_path: meter.metrics(record) for rel_path, record in records.items()}
+    return pages, {"version": BUDGET_VERSION, "options": options, "pages": records}
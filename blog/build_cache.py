@@ -0,0 +1,142 @@
+"""Caché persistente de los artículos ya resueltos por blog/build.py.
+
+Un solo fichero binario (marshal) con tres objetos seguidos: una cabecera pequeña, con la
+firma de stat (mtime en ns, tamaño) de cada .md y el sello del último build; el registro
+resuelto de cada fuente (hash, tarjeta, términos de búsqueda, firma de la imagen y lecturas
+relacionadas), y los datos del corpus (frecuencia documental de cada término).
+
+build.py lo importa antes que el resto del generador: un build sin cambios solo lee la
+cabecera y hace stat de las fuentes. Por eso aquí solo se usa lo imprescindible de la
+biblioteca estándar (ni typing, ni json, ni pathlib).
+"""
+from __future__ import annotations
+
+import importlib.util
+import marshal
+import os
+
+from build_util import write_atomic
+
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".build-cache.bin")
+# Subir al cambiar la estructura de la cabecera o de los registros.
+CACHE_FORMAT = 2
+# Con estas opciones siempre se hace el build completo.
+FULL_BUILD_FLAGS = frozenset({"--force", "--watch", "--profile", "--update-budget", "--check-links"})
+# Lo que escribe run_build() en el fichero de cambios cuando no cambia nada.
+EMPTY_CHANGES = '{\n  "added": [],\n  "changed": [],\n  "deleted": []\n}'
+# Módulos opcionales que cambian la salida: si aparecen o desaparecen, el build completo decide.
+OPTIONAL_MODULES = ("PIL", "brotli", "psycopg")
+
+
+def stat_key(path: str | os.PathLike) -> tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def optional_modules() -> dict[str, bool]:
+    return {name: importlib.util.find_spec(name) is not None for name in OPTIONAL_MODULES}
+
+
+def read_header(f) -> dict:
+    try:
+        header = marshal.load(f)
+    except (EOFError, ValueError, TypeError):
+        return {}
+    if not isinstance(header, dict) or header.get("format") != CACHE_FORMAT:
+        return {}
+    return header
+
+
+class PostCache:
+    """Registro por fuente .md: firma de stat, hash del contenido y registro resuelto.
+
+    Se descarta entero si cambia la versión del generador (o el formato de la caché).
+    """
+
+    def __init__(self, generator: str, path: str = CACHE_PATH) -> None:
+        self.path = path
+        self.generator = generator
+        self.stats: dict[str, tuple[int, int]] = {}
+        self.sources: dict[str, dict] = {}
+        self.corpus: dict = {}
+        try:
+            with open(path, "rb") as f:
+                header = read_header(f)
+                if header.get("generator") == generator:
+                    sources = marshal.load(f)
+                    corpus = marshal.load(f)
+                    self.stats = header["stats"]
+                    self.sources = sources
+                    self.corpus = corpus
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            self.stats, self.sources, self.corpus = {}, {}, {}
+
+    def digest(self, name: str, stat: tuple[int, int] | None) -> str | None:
+        """Hash guardado de la fuente si su firma de stat no ha cambiado (sin leerla)."""
+        entry = self.sources.get(name)
+        if entry is None or stat is None or self.stats.get(name) != stat:
+            return None
+        return entry["hash"]
+
+    def save(self, sources: dict[str, dict], stats: dict[str, tuple[int, int]], stamp: dict | None = None) -> None:
+        """Guarda los registros; el sello (ver up_to_date) solo lo deja un build completo."""
+        self.sources = sources
+        self.stats = {name: stats[name] for name in sources if stats.get(name)}
+        header = {"format": CACHE_FORMAT, "generator": self.generator, "stats": self.stats, "stamp": stamp}
+        write_atomic(self.path, marshal.dumps(header) + marshal.dumps(sources) + marshal.dumps(self.corpus))
+
+
+def up_to_date(argv: list[str], path: str = CACHE_PATH) -> bool:
+    """True si el último build se lanzó con los mismos argumentos y no ha cambiado ninguna entrada ni salida.
+
+    Compara la firma de stat de cada .md, del generador, de index.html, de las imágenes, de
+    los assets con hash y del log de visitas, y que sigan existiendo todas las salidas. En ese caso deja vacío el
+    fichero de cambios e imprime el resumen, como el build completo.
+    """
+    if FULL_BUILD_FLAGS.intersection(argv):
+        return False
+    try:
+        with open(path, "rb") as f:
+            header = read_header(f)
+    except OSError:
+        return False
+    stamp = header.get("stamp")
+    modules = optional_modules()
+    if not stamp or stamp["argv"] != argv or stamp["modules"] != modules:
+        return False
+    # Con las visitas en Postgres ningún stat dice si hay eventos nuevos: siempre se pasa por run_build().
+    if stamp.get("events_db") or (modules["psycopg"] and os.environ.get("DATABASE_URL")):
+        return False
+
+    current: dict[str, tuple[int, int]] = {}
+    try:
+        with os.scandir(stamp["content_dir"]) as entries:
+            for entry in entries:
+                if entry.name.endswith(".md"):
+                    st = entry.stat()
+                    current[entry.name] = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return False
+    if current != header["stats"]:
+        return False
+    if any(stat_key(file) != key for file, key in stamp["files"].items()):
+        return False
+    if not all(os.path.exists(output) for output in stamp["outputs"]):
+        return False
+
+    changes = stamp["changes"]
+    try:
+        with open(changes, encoding="utf-8") as f:
+            current_changes = f.read()
+    except OSError:
+        current_changes = ""
+    if current_changes != EMPTY_CHANGES:
+        write_atomic(changes, EMPTY_CHANGES.encode("utf-8"))
+
+    print("OK")
+    print(f"- Sin cambios: {stamp['posts']} artículos al día (caché {path})")
+    return True
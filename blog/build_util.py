@@ -0,0 +1,64 @@
+"""Utilidades compartidas por build.py y sus módulos (build_cache, budget, link_check…).
+
+build_cache lo importa en el camino rápido de un build sin cambios, así que aquí solo se usa
+os a nivel de módulo: re se importa dentro de la función que lo necesita.
+"""
+from __future__ import annotations
+
+import os
+
+
+# Líneas de un informe de fallos (p. ej. un asset compartido que crece aparece en todas las páginas).
+MAX_REPORT_LINES = 40
+
+
+def write_atomic(path: str | os.PathLike, data: bytes) -> None:
+    # Fichero temporal en el mismo directorio + rename: quien sirve o lee el fichero
+    # ve siempre la versión anterior completa o la nueva completa.
+    path = os.fspath(path)
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def kb(size: float) -> str:
+    return f"{size / 1024:.1f} KB"
+
+
+def report_lines(lines: list[str], max_lines: int = MAX_REPORT_LINES) -> list[str]:
+    """Las primeras max_lines líneas de un informe y, si hay más, cuántas se omiten."""
+    if len(lines) <= max_lines:
+        return lines
+    return lines[:max_lines] + [f"  … y {len(lines) - max_lines} más"]
+
+
+def server_routes(server: str) -> dict[str, str | None]:
+    """Rutas fijas de server.js (sin / inicial ni final) → fichero que sirven, o None si no es routeToFile.
+
+    Las rutas con parámetros (/api/leads/:id) o comodines no se incluyen.
+    """
+    import re
+
+    routes: dict[str, str | None] = {}
+    for route, target in re.findall(
+        r"""\b(?:routeToFile|app\.get)\(\s*["'](/[^"']*)["'](?:\s*,\s*["']([^"']+)["'])?""", server
+    ):
+        if ":" not in route and "*" not in route:
+            key = route.strip("/")
+            routes[key] = target or routes.get(key)
+    return routes
+
+
+def read_server_routes(server_path: str | os.PathLike) -> dict[str, str | None]:
+    """server_routes() de server_path; sin rutas si no se puede leer."""
+    try:
+        with open(server_path, encoding="utf-8") as f:
+            return server_routes(f.read())
+    except OSError:
+        return {}
@@ -0,0 +1,3379 @@
+"""Generador del blog: lo que ejecuta python3 blog/build.py cuando hay algo que construir.
+
+build.py solo comprueba si el build está al día; este módulo se importa (y se compila a
+.pyc una vez) cuando no lo está, o desde bench.py y las pruebas.
+"""
+from __future__ import annotations
+
+import sys
+
+import build_cache
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass, replace
+from datetime import date
+from pathlib import Path
+from collections import OrderedDict, deque
+from typing import Callable, ContextManager, Deque, Dict, Iterator, List, Sequence, Set, Tuple
+import argparse
+import asyncio
+import cProfile
+import functools
+import gzip
+import hashlib
+import heapq
+import html
+import io
+import json
+import math
+import mimetypes
+import os
+import posixpath
+import unicodedata
+import re
+import time
+
+import budget
+import build_util
+import link_check
+import popularity
+import post_registry
+from build_util import kb, read_server_routes, write_atomic
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow es opcional: sin él se sirven las imágenes originales.
+    Image = None  # type: ignore[assignment]
+    ImageOps = None  # type: ignore[assignment]
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se generan los .gz.
+    brotli = None
+
+
+ROOT = Path(__file__).resolve().parent.parent
+CONTENT_DIR = ROOT / "blog" / "content" / "posts"
+POSTS_OUT_DIR = ROOT / "blog" / "posts"
+BLOG_INDEX_PATH = ROOT / "blog.html"
+INDEX_PATH = ROOT / "index.html"
+POST_TEMPLATE_PATH = ROOT / "blog" / "templates" / "post.html"
+MANIFEST_PATH = ROOT / "blog" / ".build-manifest.json"
+MANIFEST_VERSION = 3
+DEFAULT_PAGE_SIZE = 12
+RENDER_CHUNK_MAX = 32
+RENDER_WINDOW = 2
+SEARCH_DIR = ROOT / "blog" / "search"
+SEARCH_DOCS_PER_SHARD = 256
+# Pesos por campo codificados como bits en cada posting.
+SEARCH_FIELD_BITS = {"title": 1, "tag": 2, "excerpt": 4, "body": 8}
+# Palabras vacías: no se indexan para la búsqueda ni cuentan para las lecturas relacionadas.
+SEARCH_STOPWORDS = frozenset(
+    (
+        "al como con de del el en es la las le lo los mas no o para pero por que se si sin su sus un una y ya "
+        "cada cuando desde donde e entre esa ese eso esta este esto estos estas fue ha han hace hasta hay me mi mis "
+        "muy ni nos otra otro puede pueden ser son sobre tambien te tiene tienen toda todas todo todos tu tus u"
+    ).split()
+)
+# Lecturas relacionadas: artículos por bloque, términos por vector, términos del cuerpo que
+# devuelve cada análisis, artículos por término en el índice invertido y vecinos que se
+# vuelven a consultar cuando cambia un artículo.
+RELATED_COUNT = 3
+RELATED_TERMS = 16
+RELATED_TF_KEEP = 64
+RELATED_POSTINGS_MAX = 50
+RELATED_RECHECK = 12
+# Artículos del bloque “Más leídos” de blog.html (primero los de popular_rank, luego por visitas).
+POPULAR_COUNT = 3
+CHANGES_PATH = ROOT / "blog" / ".build-changes.json"
+# build.py serve: páginas renderizadas que se guardan en memoria y cada cuánto (s) se re-escanean las fuentes.
+PREVIEW_PORT = 8000
+PREVIEW_CACHE_PAGES = 256
+PREVIEW_SCAN_INTERVAL = 0.5
+SERVER_PATH = ROOT / "server.js"
+PROFILE_DIR = ROOT / "blog" / ".build-profile"
+RESPONSIVE_DIR = ROOT / "blog" / "img" / "responsive"
+RESPONSIVE_WIDTHS = (480, 960, 1440)
+IMAGE_SAVE_OPTIONS = {
+    "AVIF": {"quality": 50},
+    "WEBP": {"quality": 78, "method": 6},
+    "JPEG": {"quality": 82, "optimize": True, "progressive": True},
+    "PNG": {"optimize": True},
+}
+# build.py serve lo desactiva: la vista previa no escribe nada (sin derivados, la imagen original).
+ENCODE_DERIVATIVES = True
+IMAGE_MIME = {"AVIF": "image/avif", "WEBP": "image/webp", "JPEG": "image/jpeg", "PNG": "image/png"}
+HERO_IMAGE_SIZES = "(max-width: 1200px) 100vw, 1136px"
+CARD_IMAGE_SIZES = "(max-width: 640px) 100vw, (max-width: 1200px) 50vw, 360px"
+# Las imágenes del cuerpo van en el mismo panel que la principal del artículo.
+INLINE_IMAGE_SIZES = HERO_IMAGE_SIZES
+# Todas las imágenes salvo la principal del artículo: se cargan al acercarse y se decodifican sin bloquear.
+LAZY_IMAGE_ATTRS = " loading=\"lazy\" decoding=\"async\""
+PRECOMPRESS_SUFFIXES = (".html", ".json")
+ASSET_MANIFEST_PATH = ROOT / "blog" / "asset-manifest.json"
+FINGERPRINT_SUFFIXES = frozenset({".css", ".js", ".png", ".jpg", ".jpeg", ".webp", ".avif", ".gif", ".svg", ".ico"})
+# nombre.<16 hex>.ext: mismo formato que css/ps-shell.<hash>.css; server.js los sirve como immutable.
+FINGERPRINTED_RE = re.compile(r"\.([0-9a-f]{16})(\.[A-Za-z0-9]+)$")
+# Bloques cuyo contenido no se toca al minificar (el texto de <pre> y los scripts,
+# incluido el JSON-LD) y comentarios HTML, en una sola pasada de izquierda a derecha.
+MINIFY_TOKEN_RE = re.compile(r"<!--.*?-->|<(pre|script|textarea)\b.*?</\1\s*>|<style\b[^>]*>(.*?)</style\s*>", re.I | re.S)
+MINIFY_SPACE_RE = re.compile(r"\s+")
+CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+
+
+MONTHS_ES = {
+    1: "ene",
+    2: "feb",
+    3: "mar",
+    4: "abr",
+    5: "may",
+    6: "jun",
+    7: "jul",
+    8: "ago",
+    9: "sep",
+    10: "oct",
+    11: "nov",
+    12: "dic",
+}
+
+LEGAL_PRE_ENCUADRE = (
+    "La evaluación personalizada, si se solicita, se realiza bajo el marco legal de una empresa de seguridad homologada."
+)
+WHATSAPP_PRENOTE = (
+    "Si durante la conversación solicitas una evaluación técnica, se te explicará previamente el proceso y el marco legal aplicable."
+)
+GOOGLE_TAG_SNIPPET = """  <!-- Google tag (gtag.js) -->
+  <script async src="https://www.googletagmanager.com/gtag/js?id=G-4665672QWS"></script>
+  <script>
+    window.dataLayer = window.dataLayer || [];
+    function gtag(){dataLayer.push(arguments);}
+    gtag('js', new Date());
+
+    gtag('config', 'G-4665672QWS');
+  </script>
+"""
+
+
+@dataclass(frozen=True)
+class Post:
+    title: str
+    slug: str
+    date_iso: str
+    tag: str
+    read_time: int
+    popular_rank: int | None
+    image: str
+    image_alt: str
+    excerpt: str
+    quick_title: str
+    quick_summary: str
+    conclusion: str
+    body_md: str
+
+    @property
+    def href(self) -> str:
+        return f"blog/posts/{self.slug}.html"
+
+    @property
+    def date_human(self) -> str:
+        return human_date(self.date_iso)
+
+
+@dataclass(frozen=True)
+class Card:
+    """Lo que los listados y el índice de búsqueda necesitan de un artículo.
+
+    El build solo conserva esto por artículo: el Post completo (con body_md) y su HTML
+    se descartan en cuanto se escribe la página. __slots__ se declara a mano (sin
+    dataclass(slots=True), que pide Python 3.10), así que los campos no tienen valor por defecto.
+    """
+
+    __slots__ = ("slug", "title", "excerpt", "tag", "date_iso", "read_time", "image", "image_alt", "popular_rank")
+
+    slug: str
+    title: str
+    excerpt: str
+    tag: str
+    date_iso: str
+    read_time: int
+    image: str
+    image_alt: str
+    popular_rank: int | None
+
+    def __getstate__(self) -> Tuple[object, ...]:
+        # Las tarjetas vuelven de los procesos del pool: sin __dict__ y congeladas, pickle
+        # no puede restaurarlas con setattr.
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state: Tuple[object, ...]) -> None:
+        for name, value in zip(self.__slots__, state):
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_post(cls, post: Post) -> "Card":
+        return cls(
+            slug=post.slug,
+            title=post.title,
+            excerpt=post.excerpt,
+            tag=post.tag,
+            date_iso=post.date_iso,
+            read_time=post.read_time,
+            image=post.image,
+            image_alt=post.image_alt,
+            popular_rank=post.popular_rank,
+        )
+
+    @property
+    def href(self) -> str:
+        return f"blog/posts/{self.slug}.html"
+
+    @property
+    def date_human(self) -> str:
+        return human_date(self.date_iso)
+
+
+def human_date(date_iso: str) -> str:
+    year, month, day = (int(x) for x in date_iso.split("-"))
+    return f"{day} {MONTHS_ES.get(month, str(month))} {year}"
+
+
+def parse_front_matter(md: str) -> Tuple[Dict[str, str], str]:
+    if not md.startswith("---"):
+        return {}, md.lstrip("\n")
+    parts = md.split("\n")
+    if len(parts) < 3:
+        raise ValueError("Front matter incompleto.")
+    if parts[0].strip() != "---":
+        raise ValueError("Front matter inválido.")
+
+    meta: Dict[str, str] = {}
+    i = 1
+    while i < len(parts):
+        line = parts[i]
+        if line.strip() == "---":
+            i += 1
+            break
+        if not line.strip():
+            i += 1
+            continue
+        if ":" not in line:
+            raise ValueError(f"Línea inválida en front matter: {line!r}")
+        key, value = line.split(":", 1)
+        meta[key.strip()] = value.strip()
+        i += 1
+
+    body = "\n".join(parts[i:]).lstrip("\n")
+    return meta, body
+
+
+def slugify(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.lower().strip()
+    text = re.sub(r"[^\w\s-]", "", text)
+    text = re.sub(r"[\s_-]+", "-", text)
+    text = re.sub(r"^-+|-+$", "", text)
+    return text or "articulo"
+
+
+def strip_md(md: str) -> str:
+    md = re.sub(r"^#{1,6}\s+", "", md, flags=re.M)
+    md = re.sub(r"!\[(.*?)\]\((.*?)\)", r"\1", md)
+    md = re.sub(r"\[(.*?)\]\((.*?)\)", r"\1", md)
+    md = md.replace("👉", " ")
+    md = re.sub(r"[`*_>#]", " ", md)
+    md = re.sub(r"\s+", " ", md).strip()
+    return md
+
+
+def normalize_image_path(image: str) -> str:
+    image = (image or "").strip()
+    if not image or image.startswith(("http://", "https://")):
+        return image
+
+    image = image.lstrip("./")
+    candidate = (ROOT / image).resolve()
+    if candidate.exists():
+        return image
+
+    if "/" not in image:
+        candidate_blog = (ROOT / "blog" / image).resolve()
+        if candidate_blog.exists():
+            return f"blog/{image}"
+
+    return image
+
+
+def compute_quick_title(title: str, max_len: int = 48) -> str:
+    t = re.split(r"[:(–-]", title, maxsplit=1)[0].strip()
+    if len(t) > max_len:
+        t = t[:max_len].rstrip() + "…"
+    return t
+
+
+def compute_quick_summary(excerpt: str, max_len: int = 120) -> str:
+    return truncate_text(excerpt, max_len)
+
+
+MANDATORY_KEYWORDS = (
+    "riesgo real",
+    "accesos secundarios",
+    "rutinas previsibles",
+    "evaluación profesional",
+    "intrusión",
+    "exposición",
+)
+CTA_MARKERS = ("Calcular mi Índice IEI™", "/diagnostico")
+SEO_BLOCK = (
+    "\n\n## Evaluación del riesgo real\n\n"
+    "Muchos inmuebles parecen seguros porque se observan desde la rutina "
+    "y no desde la exposición real. Esta diferencia cambia por completo "
+    "cómo se percibe el riesgo.\n"
+)
+CTA_BLOCK = (
+    "\n\n## Hablar con un experto\n\n"
+    "Si quieres contrastar tu caso, reviso tu vivienda o negocio con un diagnóstico sin compromiso.\n\n"
+    "👉 Una evaluación profesional no añade sistemas. Revela exposición real.\n"
+)
+DEFAULT_CONCLUSION = "Contrastar el riesgo aporta claridad para decidir."
+# Equivalentes por líneas con re.M: [^\S\n] es un espacio que no cruza de línea.
+TITLE_LINE_RE = re.compile(r"^[^\S\n]*#[^\S\n]+(.+?)[^\S\n]*$\n?", re.M)
+FIRST_IMAGE_RE = re.compile(r"!\[(.*?)\]\((.*?)\)")
+MD_LINK_RE = re.compile(r"\[(.*?)\]\((.*?)\)")
+# Para contar palabras basta con convertir en espacios lo que strip_md() quita o cambia por espacios.
+MD_WORD_SEPARATORS = ("`", "*", "_", ">", "#", "👉")
+
+
+@dataclass(frozen=True)
+class PostAnalysis:
+    """Todo lo que read_post() deriva del cuerpo de un artículo, calculado de una vez.
+
+    No guarda el cuerpo (la caché de analyze_post() no debe retener artículos enteros): solo
+    dónde está la línea del título, para quitarla con without_title().
+    """
+
+    title: str | None
+    title_span: Tuple[int, int] | None  # línea del título en el cuerpo analizado
+    words: int  # len(strip_md(body).split())
+    image: Tuple[str, str] | None
+    has_paragraph: bool
+    paragraph: str  # primer párrafo de texto, sin Markdown (candidato a extracto)
+    conclusion: str  # última línea 👉, sin Markdown
+    has_keyword: bool
+    has_cta: bool
+
+    def without_title(self, body: str) -> str:
+        """El cuerpo analizado sin la línea del título."""
+        if self.title_span is None:
+            return body
+        start, end = self.title_span
+        return (body[:start] + body[end:]).lstrip("\n")
+
+
+# Análisis recientes por hash de contenido (el del .md, el mismo que guarda el manifiesto).
+ANALYSIS_CACHE_SIZE = 64
+ANALYSIS_CACHE: OrderedDict[str, PostAnalysis] = OrderedDict()
+
+
+def analyze_post(body: str, key: str = "") -> PostAnalysis:
+    """analyze_body() memoizado por key (hash del contenido; si falta, se calcula el del cuerpo)."""
+    key = key or content_hash(body.encode("utf-8"))
+    analysis = ANALYSIS_CACHE.get(key)
+    if analysis is not None:
+        ANALYSIS_CACHE.move_to_end(key)
+        return analysis
+    analysis = ANALYSIS_CACHE[key] = analyze_body(body)
+    if len(ANALYSIS_CACHE) > ANALYSIS_CACHE_SIZE:
+        ANALYSIS_CACHE.popitem(last=False)
+    return analysis
+
+
+def analyze_body(body: str) -> PostAnalysis:
+    """Título, imagen, primer párrafo, conclusión 👉, palabras y keywords de un cuerpo Markdown.
+
+    Cada dato sale de una sola búsqueda sobre el texto completo (el título y la imagen
+    hacia delante, la conclusión hacia atrás, el párrafo se corta en cuanto termina), así
+    que el coste en Python no crece con la longitud del artículo.
+    """
+    lowered = body.lower()
+    has_keyword = any(kw in lowered for kw in MANDATORY_KEYWORDS)
+    has_cta = any(marker in body for marker in CTA_MARKERS)
+
+    title = None
+    title_span = None
+    m = TITLE_LINE_RE.search(body)
+    if m:
+        title = m.group(1).strip()
+        title_span = m.span()
+        body = (body[: m.start()] + body[m.end() :]).lstrip("\n")
+
+    image = None
+    m = FIRST_IMAGE_RE.search(body)
+    if m:
+        path = (m.group(2) or "").strip()
+        image = (path[2:] if path.startswith("./") else path, (m.group(1) or "").strip())
+
+    buff: List[str] = []
+    for line in body.splitlines():
+        line = line.strip()
+        if not line:
+            if buff:
+                break
+            continue
+        if line.startswith(("#", "- ", "![")):
+            continue
+        buff.append(line)
+
+    # Última línea que empieza por 👉, buscando hacia atrás desde el final.
+    conclusion = ""
+    end = len(body)
+    while (idx := body.rfind("👉", 0, end)) != -1:
+        line_start = body.rfind("\n", 0, idx) + 1
+        if not body[line_start:idx].strip():
+            line_end = body.find("\n", idx)
+            line = body[idx : line_end if line_end != -1 else len(body)]
+            conclusion = strip_md(line.lstrip("👉").strip())[:180]
+            break
+        end = idx
+
+    text = MD_LINK_RE.sub(r"\1", FIRST_IMAGE_RE.sub(r"\1", body))
+    for ch in MD_WORD_SEPARATORS:
+        text = text.replace(ch, " ")
+    return PostAnalysis(
+        title=title,
+        title_span=title_span,
+        words=len(text.split()),
+        image=image,
+        has_paragraph=bool(buff),
+        paragraph=strip_md(" ".join(buff)),
+        conclusion=conclusion,
+        has_keyword=has_keyword,
+        has_cta=has_cta,
+    )
+
+
+def truncate_text(text: str, max_len: int) -> str:
+    text = text[: max_len + 1].strip()
+    if len(text) > max_len:
+        text = text[:max_len].rstrip() + "…"
+    return text
+
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)(?:\s+#+)?\s*$")
+ULIST_RE = re.compile(r"^[-*+]\s+(.*)$")
+OLIST_RE = re.compile(r"^(\d{1,9})[.)]\s+(.*)$")
+QUOTE_RE = re.compile(r"^>\s?(.*)$")
+FENCE_RE = re.compile(r"^(```|~~~)")
+RULE_RE = re.compile(r"^(?:-{3,}|\*{3,}|_{3,})$")
+BLOCK_START_CHARS = frozenset("#>`~-*+_0123456789")
+# Ruta de un enlace o imagen: sin espacios, con paréntesis equilibrados de un nivel (…/Cerradura_(mecanismo)).
+MD_URL = r"(?:[^()\s]|\([^()\s]*\))+"
+IMAGE_ONLY_RE = re.compile(rf"^!\[([^\]]*)\]\(({MD_URL})\)$")
+INLINE_RE = re.compile(
+    r"`(?P<code>[^`]+)`"
+    r"|\\(?P<esc>[\\`*_{}\[\]()#+\-.!])"
+    rf"|!\[(?P<alt>[^\]]*)\]\((?P<src>{MD_URL})\)"
+    rf"|\[(?P<text>(?:[^\]\\]|\\.)+)\]\((?P<href>{MD_URL})\)"
+    r"|\*\*\*(?P<strong_em>[^*\s](?:.*?[^*\s])?)\*\*\*"
+    r"|\*\*(?P<strong>.+?)\*\*"
+    r"|__(?P<strong_u>.+?)__"
+    r"|(?<!\w)_(?P<em_u>(?:[^_\\]|\\.)+?)_(?!\w)"
+    r"|\*(?P<em>(?![\s*])(?:[^*\\]|\\.)+?(?<!\s))\*"
+)
+# Las mismas imágenes que reconoce INLINE_RE (sin espacios en la ruta).
+BODY_IMAGE_RE = re.compile(rf"!\[[^\]]*\]\(({MD_URL})\)")
+
+
+def md_blocks(md: str) -> List[Tuple[str, str, List[str]]]:
+    """Una sola pasada por líneas: agrupa el Markdown en bloques (tipo, texto, items)."""
+    blocks: List[Tuple[str, str, List[str]]] = []
+    para: List[str] = []
+    quote: List[str] = []
+    items: List[str] = []
+    list_kind = ""
+    fence = ""
+    code: List[str] = []
+
+    def flush() -> None:
+        nonlocal list_kind
+        if para:
+            blocks.append(("p", "\n".join(para), []))
+            para.clear()
+        if quote:
+            blocks.append(("quote", "\n".join(quote), []))
+            quote.clear()
+        if items:
+            blocks.append((list_kind, "", list(items)))
+            items.clear()
+            list_kind = ""
+
+    for raw_line in md.splitlines():
+        if fence:
+            if raw_line.strip().startswith(fence):
+                blocks.append(("code", "\n".join(code), []))
+                code.clear()
+                fence = ""
+            else:
+                code.append(raw_line)
+            continue
+
+        line = raw_line.strip()
+        if not line:
+            flush()
+            continue
+
+        # Casi todas las líneas son texto: se decide por el primer carácter
+        # antes de probar ningún patrón de bloque.
+        if line[0] not in BLOCK_START_CHARS:
+            if quote or items:
+                flush()
+            para.append(line)
+            continue
+
+        m = FENCE_RE.match(line)
+        if m:
+            flush()
+            fence = m.group(1)
+            continue
+
+        m = QUOTE_RE.match(line)
+        if m:
+            if not quote:
+                flush()
+            quote.append(m.group(1).strip())
+            continue
+
+        m = HEADING_RE.match(line)
+        if m:
+            flush()
+            # El h1 es el título del artículo: los niveles del cuerpo bajan a h3/h4.
+            blocks.append(("h3" if len(m.group(1)) <= 2 else "h4", m.group(2), []))
+            continue
+
+        if RULE_RE.match(line):
+            flush()
+            blocks.append(("hr", "", []))
+            continue
+
+        m = ULIST_RE.match(line)
+        kind, item = ("ul", m.group(1)) if m else ("", "")
+        if not m:
+            m = OLIST_RE.match(line)
+            kind, item = ("ol", m.group(2)) if m else ("", "")
+        if kind:
+            if list_kind != kind:
+                flush()
+                list_kind = kind
+            items.append(item.strip())
+            continue
+
+        if items and raw_line[:1].isspace():
+            items[-1] += "\n" + line
+            continue
+
+        if quote or items:
+            flush()
+        para.append(line)
+
+    if fence:
+        blocks.append(("code", "\n".join(code), []))
+    flush()
+    return blocks
+
+
+def inline_format(text: str, asset_prefix: str = "") -> str:
+    # Se escapa una sola vez: los marcadores Markdown no se ven afectados por html.escape.
+    text = html.escape(text)
+    if "*" not in text and "_" not in text and "`" not in text and "[" not in text and "\\" not in text:
+        return text
+    return _inline_escaped(text, asset_prefix)
+
+
+def _inline_escaped(text: str, asset_prefix: str) -> str:
+    out: List[str] = []
+    pos = 0
+    for m in INLINE_RE.finditer(text):
+        out.append(text[pos : m.start()])
+        pos = m.end()
+        if m.group("code") is not None:
+            out.append(f"<code>{m.group('code')}</code>")
+        elif m.group("esc") is not None:
+            out.append(m.group("esc"))
+        elif m.group("src") is not None:
+            src = normalize_image_path(html.unescape(m.group("src")))
+            alt = html.unescape(m.group("alt"))
+            out.append(render_image(src, alt, asset_prefix, sizes=INLINE_IMAGE_SIZES, lazy=True))
+        elif m.group("href") is not None:
+            label = _inline_escaped(m.group("text"), asset_prefix)
+            out.append(f"<a href=\"{m.group('href')}\">{label}</a>")
+        elif m.group("strong_em") is not None:
+            out.append(f"<b><i>{_inline_escaped(m.group('strong_em'), asset_prefix)}</i></b>")
+        elif m.group("strong") is not None or m.group("strong_u") is not None:
+            out.append(f"<b>{_inline_escaped(m.group('strong') or m.group('strong_u'), asset_prefix)}</b>")
+        else:
+            out.append(f"<i>{_inline_escaped(m.group('em') or m.group('em_u'), asset_prefix)}</i>")
+    out.append(text[pos:])
+    return "".join(out)
+
+
+def md_to_html(md: str, asset_prefix: str = "", hero_image: str = "") -> str:
+    out: List[str] = []
+    for kind, text, items in md_blocks(md):
+        if kind == "p":
+            m = IMAGE_ONLY_RE.match(text)
+            if m and hero_image and normalize_image_path(m.group(2)) == hero_image:
+                # Ya se muestra como imagen principal del artículo.
+                continue
+            out.append(f"<p>{inline_format(text, asset_prefix)}</p>")
+        elif kind == "quote":
+            out.append(f"<div class=\"quote\">{inline_format(text, asset_prefix)}</div>")
+        elif kind in ("h3", "h4"):
+            out.append(f"<{kind}>{inline_format(text, asset_prefix)}</{kind}>")
+        elif kind == "ul":
+            out.append("<ul class=\"checklist\">")
+            for item in items:
+                out.append(f"<li><span class=\"check\">✓</span><span>{inline_format(item, asset_prefix)}</span></li>")
+            out.append("</ul>")
+        elif kind == "ol":
+            out.append("<ol class=\"checklist\">")
+            for n, item in enumerate(items, 1):
+                out.append(f"<li><span class=\"check\">{n}</span><span>{inline_format(item, asset_prefix)}</span></li>")
+            out.append("</ol>")
+        elif kind == "code":
+            out.append(f"<pre><code>{html.escape(text)}</code></pre>")
+        elif kind == "hr":
+            out.append("<hr>")
+    return "\n        ".join(out)
+
+
+def read_post(md_path: Path, drafts: bool = False) -> Post:
+    data = md_path.read_bytes()
+    # El cuerpo depende solo del fichero: su hash es la clave del análisis memoizado.
+    digest = content_hash(data)
+    raw = data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+    meta, body = parse_front_matter(raw)
+    title = (meta.get("title") or "").strip()
+
+    # ------------------------------------------------------
+    # 🔥 OPTIMIZADOR AUTOMÁTICO SEO + COPYWRITING PUNTO SEGURO
+    # ------------------------------------------------------
+
+    # 1. Asegurar que el artículo tiene H1 correcto
+    if not body.lstrip().startswith("#"):
+        body = f"# {title}\n\n" + body
+    analysis = analyze_post(body, digest)
+
+    # 2. Keywords SEO obligatorias: añade un bloque SEO si faltan
+    # 3. CTA suave automático si falta
+    extra = [block for block, missing in ((SEO_BLOCK, not analysis.has_keyword), (CTA_BLOCK, not analysis.has_cta)) if missing]
+
+    # 4. Reasigna contenido modificado al post: los bloques añadidos son fijos y ya
+    # vienen analizados, así que solo se combinan sus resultados con los del cuerpo.
+    parts = [analysis] + [analyze_post(block) for block in extra]
+    bodies = [analysis.without_title(body)] + [part.without_title(block) for part, block in zip(parts[1:], extra)]
+    body = bodies[0] + "".join(extra)
+    title_from_body = analysis.title
+
+    if not drafts and meta.get("draft", "").strip().lower() in {"1", "true", "yes", "y"}:
+        raise ValueError(f"{md_path}: draft=true (omite o cambia a false para publicar)")
+
+    title = (meta.get("title") or title_from_body or "").strip()
+    if not title:
+        raise ValueError(f"{md_path}: falta title (en front matter o como '# Título' al inicio).")
+
+    slug = (meta.get("slug") or md_path.stem or slugify(title)).strip()
+    slug = slugify(slug)
+
+    date_iso = (meta.get("date") or "").strip()
+    if date_iso:
+        date.fromisoformat(date_iso)
+    else:
+        date_iso = date.today().isoformat()
+
+    tag = (meta.get("tag") or "Blog").strip()
+    popular_rank = None
+    if meta.get("popular_rank"):
+        try:
+            popular_rank = int(meta["popular_rank"])
+        except ValueError as e:
+            raise ValueError(f"{md_path}: popular_rank debe ser un entero (1,2,3...).") from e
+        if popular_rank < 1:
+            raise ValueError(f"{md_path}: popular_rank debe ser >= 1.")
+
+    image = normalize_image_path(meta.get("image") or "")
+    image_alt = (meta.get("image_alt") or "").strip()
+    img = analysis.image
+    if not image and img:
+        image = normalize_image_path(img[0])
+        image_alt = image_alt or img[1]
+    image = image or "portada_facebook.png"
+    image_alt = image_alt or title
+
+    excerpt = (meta.get("excerpt") or "").strip()
+    if not excerpt:
+        # Primer párrafo del cuerpo o, si no hay, el de los bloques añadidos.
+        first = next((part for part in parts if part.has_paragraph), None)
+        text = first.paragraph if first else ""
+        if not text:
+            text = " ".join(plain for plain in map(strip_md, bodies) if plain)
+        excerpt = truncate_text(text, 160)
+    quick_title = (meta.get("quick_title") or "").strip() or compute_quick_title(title)
+    quick_summary = (meta.get("quick_summary") or "").strip() or compute_quick_summary(excerpt)
+    conclusion = (meta.get("conclusion") or "").strip()
+    if not conclusion:
+        conclusion = next((part.conclusion for part in reversed(parts) if part.conclusion), "") or DEFAULT_CONCLUSION
+    if meta.get("read_time"):
+        read_time = int(meta["read_time"])
+    else:
+        words = sum(part.words for part in parts)
+        read_time = max(3, int(math.ceil(words / 220))) if words else 3
+
+    return Post(
+        title=title,
+        slug=slug,
+        date_iso=date_iso,
+        tag=tag,
+        read_time=read_time,
+        popular_rank=popular_rank,
+        image=image,
+        image_alt=image_alt,
+        excerpt=excerpt,
+        quick_title=quick_title,
+        quick_summary=quick_summary,
+        conclusion=conclusion,
+        body_md=body,
+    )
+
+
+def rel_image_for_post(image_path: str, prefix: str) -> str:
+    if image_path.startswith(("http://", "https://")):
+        return image_path
+    normalized = image_path.lstrip("/")
+    return f"{prefix}{normalized}" if normalized else image_path
+
+
+@dataclass(frozen=True)
+class ResponsiveImage:
+    """Derivados redimensionados de una imagen local, generados por responsive_image()."""
+
+    width: int
+    height: int
+    fallback: str
+    # (mime, ((ancho, ruta relativa), ...)); el último mime es el formato de respaldo.
+    variants: Tuple[Tuple[str, Tuple[Tuple[int, str], ...]], ...]
+
+    def srcset(self, candidates: Tuple[Tuple[int, str], ...], prefix: str) -> str:
+        return ", ".join(f"{rel_image_for_post(path, prefix)} {w}w" for w, path in candidates)
+
+
+@functools.lru_cache(maxsize=None)
+def image_digest(image: str) -> str:
+    if not image or image.startswith(("http://", "https://")):
+        return ""
+    try:
+        return content_hash((ROOT / image).read_bytes())[:16]
+    except OSError:
+        return ""
+
+
+def images_digest(images: Sequence[str]) -> str:
+    """image_digest() de todas las imágenes de una página; con una sola, el mismo valor."""
+    return ",".join(image_digest(image) for image in images)
+
+
+def body_images(md: str) -> List[str]:
+    """Imágenes locales del cuerpo de un artículo, sin repetir: si cambian, la página se re-renderiza."""
+    images = (normalize_image_path(src) for src in BODY_IMAGE_RE.findall(md))
+    return list(dict.fromkeys(image for image in images if image and not image.startswith(("http://", "https://"))))
+
+
+def encode_derivatives(src: Path, digest: str) -> Dict[str, object] | None:
+    try:
+        with Image.open(src) as opened:
+            im = ImageOps.exif_transpose(opened)
+            im.load()
+    except (OSError, Image.DecompressionBombError):
+        return None
+
+    width, height = im.size
+    has_alpha = "A" in im.getbands() or "transparency" in im.info
+    fallback = "PNG" if has_alpha else "JPEG"
+    Image.init()
+    formats = [fmt for fmt in ("AVIF", "WEBP") if fmt in Image.SAVE] + [fallback]
+    widths = sorted({w for w in RESPONSIVE_WIDTHS if w < width} | {min(width, RESPONSIVE_WIDTHS[-1])})
+
+    RESPONSIVE_DIR.mkdir(parents=True, exist_ok=True)
+    stem = slugify(src.stem)
+    variants: Dict[str, List[List[object]]] = {}
+    for w in widths:
+        resized = im if w == width else im.resize((w, max(1, round(height * w / width))), Image.Resampling.LANCZOS)
+        resized = resized.convert("RGBA" if has_alpha else "RGB")
+        for fmt in formats:
+            out_path = RESPONSIVE_DIR / f"{stem}-{digest}-{w}.{fmt.lower().replace('jpeg', 'jpg')}"
+            if not out_path.exists():
+                buf = io.BytesIO()
+                resized.save(buf, fmt, **IMAGE_SAVE_OPTIONS[fmt])
+                write_atomic(out_path, buf.getvalue())
+            variants.setdefault(IMAGE_MIME[fmt], []).append([w, rel_output(out_path)])
+
+    largest = widths[-1]
+    meta: Dict[str, object] = {
+        "source": rel_output(src),
+        "width": largest,
+        "height": max(1, round(height * largest / width)),
+        "fallback": variants[IMAGE_MIME[fallback]][-1][1],
+        "variants": [[mime, candidates] for mime, candidates in variants.items()],
+    }
+    write_atomic(RESPONSIVE_DIR / f"{digest}.json", json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+    return meta
+
+
+@functools.lru_cache(maxsize=None)
+def responsive_image(image: str) -> ResponsiveImage | None:
+    """Derivados AVIF/WebP + respaldo por ancho, cacheados por hash del original.
+
+    Si los derivados de ese contenido ya existen en blog/img/responsive/ no se vuelve a codificar nada.
+    """
+    if Image is None:
+        return None
+    digest = image_digest(image)
+    if not digest:
+        return None
+    try:
+        meta = json.loads((RESPONSIVE_DIR / f"{digest}.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        if not ENCODE_DERIVATIVES:
+            return None
+        meta = encode_derivatives(ROOT / image, digest)
+    if not meta:
+        return None
+    return ResponsiveImage(
+        width=int(meta["width"]),
+        height=int(meta["height"]),
+        fallback=str(meta["fallback"]),
+        variants=tuple(
+            (mime, tuple((int(w), str(path)) for w, path in candidates)) for mime, candidates in meta["variants"]
+        ),
+    )
+
+
+def hero_preload(image: str, prefix: str) -> str:
+    """<link rel="preload"> de la imagen principal, con el mismo srcset/sizes que el <img> del hero.
+
+    Con derivados se precarga solo el primer formato del <picture> (con type, el navegador
+    que no lo soporta no descarga nada): precargar el respaldo bajaría dos imágenes.
+    """
+    info = responsive_image(image)
+    if info is None:
+        href = html.escape(rel_image_for_post(image, prefix))
+        return f"<link rel=\"preload\" as=\"image\" href=\"{href}\" fetchpriority=\"high\">"
+    mime, candidates = info.variants[0]
+    return (
+        f"<link rel=\"preload\" as=\"image\" type=\"{mime}\" imagesrcset=\"{html.escape(info.srcset(candidates, prefix))}\" "
+        f"imagesizes=\"{HERO_IMAGE_SIZES}\" fetchpriority=\"high\">"
+    )
+
+
+def render_image(image: str, alt: str, prefix: str, *, sizes: str, lazy: bool) -> str:
+    # La imagen que no es diferida es la principal del artículo (candidata a LCP): prioridad alta.
+    loading = LAZY_IMAGE_ATTRS if lazy else " fetchpriority=\"high\""
+    info = responsive_image(image)
+    if info is None:
+        src = rel_image_for_post(image, prefix)
+        return f"<img src=\"{html.escape(src)}\" alt=\"{html.escape(alt)}\"{loading}>"
+    sources = "".join(
+        f"<source type=\"{mime}\" srcset=\"{html.escape(info.srcset(candidates, prefix))}\" sizes=\"{sizes}\">"
+        for mime, candidates in info.variants[:-1]
+    )
+    fallback_srcset = html.escape(info.srcset(info.variants[-1][1], prefix))
+    return (
+        f"<picture>{sources}"
+        f"<img src=\"{html.escape(rel_image_for_post(info.fallback, prefix))}\" srcset=\"{fallback_srcset}\" "
+        f"sizes=\"{sizes}\" width=\"{info.width}\" height=\"{info.height}\" alt=\"{html.escape(alt)}\"{loading}>"
+        f"</picture>"
+    )
+
+
+URL_ATTR_RE = re.compile(
+    r"(?P<attr>\b(?:href|src)\s*=\s*[\"'])(?P<url>[^\"']+)(?P<end>[\"'])",
+    re.IGNORECASE,
+)
+MAIN_OPEN = "<main id=\"main\">"
+MAIN_CLOSE = "</main>"
+# --shell-assets: "inline" copia index.html tal cual; "external" saca el <style> y los
+# <script> inline a css/ y js/ con hash en el nombre; "critical" además deja inline solo
+# el CSS que usa el principio de cada página.
+SHELL_ASSET_MODES = ("inline", "external", "critical")
+SHELL_STYLE_RE = re.compile(r"<style\b[^>]*>(?P<css>.*?)</style\s*>\n?", re.I | re.S)
+SHELL_SCRIPT_RE = re.compile(r"<script(?P<attrs>[^>]*)>(?P<js>.*?)</script\s*>\n?", re.I | re.S)
+SCRIPT_SRC_RE = re.compile(r"\bsrc\s*=", re.I)
+SCRIPT_TYPE_RE = re.compile(r"\btype\s*=\s*[\"']?([^\"'\s>]+)", re.I)
+SCRIPT_ASYNC_RE = re.compile(r"\b(?:async|defer)\b", re.I)
+JS_TYPES = frozenset({"text/javascript", "application/javascript"})
+FONT_STYLESHEET_RE = re.compile(
+    r"<link\b(?=[^>]*\brel\s*=\s*[\"']stylesheet[\"'])"
+    r"(?=[^>]*\bhref\s*=\s*[\"'](?P<href>https://fonts\.googleapis\.com/[^\"']+)[\"'])[^>]*>",
+    re.I,
+)
+CRITICAL_CSS_SLOT = "<!--ps:critical-css-->"
+TEMPLATE_COMMENT_RE = re.compile(r"\{#.*?#\}", re.S)
+TEMPLATE_TAG_RE = re.compile(r"\{\{(.*?)\}\}", re.S)
+TEMPLATE_SLOT_RE = re.compile(r"\s*([A-Za-z_]\w*)\s*(\|\s*safe\s*)?")
+ABOVE_FOLD_CHARS = 4096
+SELECTOR_NOISE_RE = re.compile(r"\[[^\]]*\]|::?[\w-]+(?:\([^)]*\))?")
+SELECTOR_NAME_RE = re.compile(r"([.#]?)(-?[A-Za-z_][\w-]*)")
+HTML_TAG_RE = re.compile(r"<([A-Za-z][\w-]*)")
+HTML_CLASS_RE = re.compile(r"\bclass\s*=\s*[\"']([^\"']*)[\"']", re.I)
+HTML_ID_RE = re.compile(r"\bid\s*=\s*[\"']([^\"']*)[\"']", re.I)
+
+
+@functools.lru_cache(maxsize=None)
+def asset_fingerprint(rel_path: str) -> str:
+    """Copia con hash de un asset local ("css/ps-ui.css" -> "css/ps-ui.<hash>.css"); "" si no aplica."""
+    suffix = posixpath.splitext(rel_path)[1]
+    if (
+        suffix.lower() not in FINGERPRINT_SUFFIXES
+        or FINGERPRINTED_RE.search(rel_path)
+        or (ROOT / rel_path).parent == RESPONSIVE_DIR  # ya llevan el hash de la imagen en el nombre
+    ):
+        return ""
+    try:
+        data = (ROOT / rel_path).read_bytes()
+    except OSError:
+        return ""
+    return f"{rel_path[: -len(suffix)]}.{content_hash(data)[:16]}{suffix}"
+
+
+def fingerprint_url(url: str, prefix: str) -> str:
+    """Cambia la URL de un asset local por la de su copia con hash (sin el ?v= manual)."""
+    if url.startswith(("#", "//", "http://", "https://", "mailto:", "tel:", "data:")):
+        return url
+    base, fragment = url.split("#", 1) if "#" in url else (url, "")
+    base = base.split("?", 1)[0]
+    if base.startswith("/"):
+        lead, rel = "/", base[1:]
+    elif prefix and base.startswith(prefix):
+        lead, rel = prefix, base[len(prefix) :].lstrip("/")
+    elif not prefix:
+        lead, rel = "", base
+    else:
+        return url
+    rel = posixpath.normpath(rel)
+    if rel.startswith(("..", "/")) or rel == ".":
+        return url
+    fingerprinted = asset_fingerprint(rel)
+    if not fingerprinted:
+        return url
+    return f"{lead}{fingerprinted}" + (f"#{fragment}" if fragment else "")
+
+
+def page_fingerprints(page_html: str) -> Dict[str, str]:
+    """{original: copia con hash} de los assets con hash que referencia una página ya generada."""
+    found: Dict[str, str] = {}
+    for m in URL_ATTR_RE.finditer(page_html):
+        rel = re.sub(r"^(?:\.\./)+|^/", "", m.group("url").split("#", 1)[0])
+        match = FINGERPRINTED_RE.search(rel)
+        if not match:
+            continue
+        original = rel[: match.start()] + match.group(2)
+        if asset_fingerprint(original) == rel:
+            found[original] = rel
+    return found
+
+
+def prefix_relative_urls(base_html: str, prefix: str, fingerprint: bool = False) -> str:
+    if not prefix and not fingerprint:
+        return base_html
+
+    def needs_prefix(url: str) -> bool:
+        return not url.startswith(
+            ("#", "http://", "https://", "mailto:", "tel:", "data:", "/")
+        )
+
+    def apply_prefix(url: str) -> str:
+        if not needs_prefix(url) or url.startswith(prefix) or url.startswith("../"):
+            return url
+        normalized = url[2:] if url.startswith("./") else url
+        base = normalized
+        suffix = ""
+        for sep in ("#", "?"):
+            if sep in base:
+                base, rest = base.split(sep, 1)
+                suffix = sep + rest
+                break
+        if not base:
+            return url
+        return f"{prefix}{base}{suffix}"
+
+    def repl(match: re.Match[str]) -> str:
+        url = match.group("url")
+        updated = apply_prefix(url) if prefix else url
+        if fingerprint:
+            updated = fingerprint_url(updated, prefix)
+        if updated == url:
+            return match.group(0)
+        return f"{match.group('attr')}{updated}{match.group('end')}"
+
+    return URL_ATTR_RE.sub(repl, base_html)
+
+
+def ensure_google_tag(base_html: str) -> str:
+    if "googletagmanager.com/gtag/js?id=G-4665672QWS" in base_html:
+        return base_html
+    marker = "<head>"
+    idx = base_html.find(marker)
+    if idx == -1:
+        return base_html
+    insert_at = idx + len(marker)
+    return base_html[:insert_at] + "\n" + GOOGLE_TAG_SNIPPET + base_html[insert_at:]
+
+
+def classic_script(attrs: str) -> bool:
+    match = SCRIPT_TYPE_RE.search(attrs)
+    return match is None or match.group(1).lower() in JS_TYPES
+
+
+def defer_shell_resources(base_html: str) -> str:
+    """Orden de carga de la plantilla: el CSS de Google Fonts no bloquea el render y los scripts externos van con defer.
+
+    Un script externo solo pasa a defer si detrás no queda ningún script inline ejecutable:
+    ese inline se ejecutaría antes que él y podría usar lo que define. Los async, los
+    módulos y el JSON-LD no se tocan.
+    """
+    base = FONT_STYLESHEET_RE.sub(
+        lambda m: (
+            f"<link rel=\"stylesheet\" href=\"{m.group('href')}\" media=\"print\" onload=\"this.media='all'\">\n"
+            f"  <noscript>{m.group(0)}</noscript>"
+        ),
+        base_html,
+    )
+    scripts = list(SHELL_SCRIPT_RE.finditer(base))
+    last_inline = max(
+        (m.start() for m in scripts if not SCRIPT_SRC_RE.search(m.group("attrs")) and classic_script(m.group("attrs"))),
+        default=-1,
+    )
+    out: List[str] = []
+    pos = 0
+    for m in scripts:
+        attrs = m.group("attrs")
+        if (
+            m.start() < last_inline
+            or not SCRIPT_SRC_RE.search(attrs)
+            or SCRIPT_ASYNC_RE.search(attrs)
+            or not classic_script(attrs)
+        ):
+            continue
+        out.append(base[pos : m.start()])
+        out.append("<script defer" + m.group(0)[len("<script") :])
+        pos = m.end()
+    out.append(base[pos:])
+    return "".join(out)
+
+
+def shell_asset_path(kind: str, text: str) -> str:
+    # Mismo contenido, mismo nombre: el navegador puede cachearlo sin revalidar.
+    return f"{kind}/ps-shell.{content_hash(text.encode('utf-8'))[:16]}.{kind}"
+
+
+def extract_shell_assets(base_html: str, critical: bool) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    """Saca el <style> y los <script> inline de la plantilla. Devuelve (html, ((ruta, texto), ...)).
+
+    Los scripts se unen en un solo fichero con defer, en el orden del documento; los
+    que tienen src o type (JSON-LD) se quedan como están.
+    """
+    assets: List[Tuple[str, str]] = []
+    css_parts: List[str] = []
+
+    def style_repl(match: re.Match[str]) -> str:
+        css_parts.append(match.group("css").strip())
+        return "\x00style\x00" if len(css_parts) == 1 else ""
+
+    base = SHELL_STYLE_RE.sub(style_repl, base_html)
+    if css_parts:
+        css = "\n\n".join(css_parts) + "\n"
+        css_path = shell_asset_path("css", css)
+        assets.append((css_path, css))
+        link = f"<link rel=\"stylesheet\" href=\"/{css_path}\">\n"
+        if critical:
+            # El CSS completo sigue en la misma posición de la cascada, pero sin bloquear el render.
+            link = (
+                f"{CRITICAL_CSS_SLOT}\n"
+                f"  <link rel=\"stylesheet\" href=\"/{css_path}\" media=\"print\" onload=\"this.media='all'\">\n"
+                f"  <noscript><link rel=\"stylesheet\" href=\"/{css_path}\"></noscript>\n"
+            )
+        base = base.replace("\x00style\x00", link, 1)
+
+    js_parts: List[str] = []
+
+    def script_repl(match: re.Match[str]) -> str:
+        attrs = match.group("attrs")
+        if re.search(r"\b(src|type)\s*=", attrs, re.I):
+            return match.group(0)
+        js_parts.append(match.group("js").strip())
+        return "\x00script\x00" if len(js_parts) == 1 else ""
+
+    base = SHELL_SCRIPT_RE.sub(script_repl, base)
+    if js_parts:
+        js = "\n;\n".join(js_parts) + "\n"
+        js_path = shell_asset_path("js", js)
+        assets.append((js_path, js))
+        base = base.replace("\x00script\x00", f"<script src=\"/{js_path}\" defer></script>\n", 1)
+    return base, tuple(assets)
+
+
+@functools.lru_cache(maxsize=None)
+def css_blocks(css: str) -> Tuple[Tuple[str, str], ...]:
+    """(preludio, cuerpo) de cada bloque de primer nivel; los @media se vuelven a partir aparte."""
+    css = CSS_COMMENT_RE.sub("", css)
+    blocks: List[Tuple[str, str]] = []
+    depth = 0
+    start = 0
+    body_start = 0
+    for i, ch in enumerate(css):
+        if ch == "{":
+            if depth == 0:
+                body_start = i
+            depth += 1
+        elif ch == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                prelude = css[start:body_start].rsplit(";", 1)[-1].strip()
+                blocks.append((prelude, css[body_start + 1 : i].strip()))
+                start = i + 1
+    return tuple(blocks)
+
+
+def html_selectors(html_text: str) -> Tuple[frozenset, frozenset, frozenset]:
+    """(tags, clases, ids) presentes en un fragmento HTML."""
+    tags = {t.lower() for t in HTML_TAG_RE.findall(html_text)}
+    classes = {c for attr in HTML_CLASS_RE.findall(html_text) for c in attr.split()}
+    ids = set(HTML_ID_RE.findall(html_text))
+    return frozenset(tags), frozenset(classes), frozenset(ids)
+
+
+def selector_used(prelude: str, tags: frozenset, classes: frozenset, ids: frozenset) -> bool:
+    for selector in prelude.split(","):
+        names = SELECTOR_NAME_RE.findall(SELECTOR_NOISE_RE.sub(" ", selector))
+        if all(
+            (name in classes) if kind == "." else (name in ids) if kind == "#" else (name.lower() in tags)
+            for kind, name in names
+        ):
+            return True
+    return False
+
+
+@functools.lru_cache(maxsize=64)
+def critical_css(css: str, tags: frozenset, classes: frozenset, ids: frozenset) -> str:
+    """Reglas de css cuyos selectores casan con los tags/clases/ids dados (se descartan @font-face, @keyframes…)."""
+    out: List[str] = []
+    for prelude, body in css_blocks(css):
+        if prelude.startswith(("@media", "@supports")):
+            inner = "".join(f"{p}{{{b}}}" for p, b in css_blocks(body) if selector_used(p, tags, classes, ids))
+            if inner:
+                out.append(f"{prelude}{{{inner}}}")
+        elif not prelude.startswith("@") and selector_used(prelude, tags, classes, ids):
+            out.append(f"{prelude}{{{body}}}")
+    return "\n".join(out)
+
+
+@dataclass(frozen=True)
+class ShellOptions:
+    """Opciones de build que cambian la plantilla base (clave de page_shell)."""
+
+    assets: str = "inline"
+    fingerprint: bool = False
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> "ShellOptions":
+        return cls(assets=args.shell_assets, fingerprint=args.fingerprint)
+
+
+DEFAULT_SHELL = ShellOptions()
+
+
+@dataclass(frozen=True)
+class PageShell:
+    """Plantilla base (index.html) ya preparada y partida alrededor de <main>.
+
+    assets son los ficheros que el build debe escribir (--shell-assets external/critical);
+    critical es el CSS completo del que se extrae, por página, el CSS crítico. Con
+    fingerprint, las URLs del contenido pasan por el mismo prefix_relative_urls que la plantilla.
+    head_end es la posición de </head> en head, donde van las pistas de carga de cada página.
+    """
+
+    head: str
+    tail: str
+    head_end: int = -1
+    assets: Tuple[Tuple[str, str], ...] = ()
+    critical: str = ""
+    prefix: str = ""
+    fingerprint: bool = False
+
+    @classmethod
+    def from_html(cls, base_html: str, path_prefix: str = "", shell: ShellOptions = DEFAULT_SHELL) -> "PageShell":
+        base = ensure_google_tag(base_html)
+        extracted: Tuple[Tuple[str, str], ...] = ()
+        if shell.assets != "inline":
+            base, extracted = extract_shell_assets(base, critical=shell.assets == "critical")
+        base = defer_shell_resources(base)
+        base = prefix_relative_urls(base, path_prefix, shell.fingerprint)
+        start = base.find(MAIN_OPEN)
+        end = base.find(MAIN_CLOSE, start + len(MAIN_OPEN)) if start != -1 else -1
+        if end == -1:
+            raise ValueError("No se encontró <main id=\"main\"> en index.html")
+        critical = ""
+        if shell.assets == "critical":
+            critical = next((text for path, text in extracted if path.endswith(".css")), "")
+        return cls(
+            head=base[: start + len(MAIN_OPEN)],
+            tail=base[end:],
+            head_end=base.find("</head>", 0, start),
+            assets=extracted,
+            critical=critical,
+            prefix=path_prefix,
+            fingerprint=shell.fingerprint,
+        )
+
+    def render(self, content_html: str, head_html: str = "") -> str:
+        if self.fingerprint:
+            content_html = prefix_relative_urls(content_html, self.prefix, fingerprint=True)
+        head = self.head
+        if head_html and self.head_end != -1:
+            if self.fingerprint:
+                head_html = prefix_relative_urls(head_html, self.prefix, fingerprint=True)
+            head = f"{head[: self.head_end]}  {head_html}\n{head[self.head_end :]}"
+        if self.critical:
+            head = head.replace(CRITICAL_CSS_SLOT, f"<style>\n{self.critical_for(content_html)}\n</style>", 1)
+        return f"{head}\n{content_html}\n{self.tail}"
+
+    def critical_for(self, content_html: str) -> str:
+        # "Por encima del pliegue" = cabecera de la plantilla + primeros bytes del contenido.
+        body = self.head[self.head.find("<body") :]
+        tags, classes, ids = html_selectors(body + content_html[:ABOVE_FOLD_CHARS])
+        return critical_css(self.critical, tags | {"html", "body"}, classes, ids)
+
+
+@functools.lru_cache(maxsize=None)
+def page_shell(path_prefix: str = "", shell: ShellOptions = DEFAULT_SHELL) -> PageShell:
+    # Se lee y prepara una sola vez por build, por prefijo ("" o "../../") y por opciones.
+    return PageShell.from_html(INDEX_PATH.read_text(encoding="utf-8"), path_prefix, shell)
+
+
+def build_page(
+    content_html: str, *, path_prefix: str = "", shell: ShellOptions = DEFAULT_SHELL, head_html: str = ""
+) -> str:
+    return page_shell(path_prefix, shell).render(content_html, head_html)
+
+
+@dataclass(frozen=True)
+class Template:
+    """Plantilla compilada: literales y huecos alternados, listos para un solo "".join().
+
+    {{ nombre }} se escapa como HTML y {{ nombre|safe }} se inserta tal cual; {# … #} es un
+    comentario. Los valores fijos (constants) se resuelven al compilar y quedan dentro de los
+    literales, así que renderizar solo copia los valores de cada página en sus huecos.
+    """
+
+    parts: Tuple[str, ...]
+    slots: Tuple[Tuple[int, str, bool], ...]
+    name: str = "plantilla"
+
+    @classmethod
+    def compile(cls, text: str, constants: Dict[str, object] | None = None, name: str = "plantilla") -> "Template":
+        constants = constants or {}
+        # Los comentarios conservan sus saltos de línea para que los errores citen la línea real.
+        text = TEMPLATE_COMMENT_RE.sub(lambda m: "\n" * m.group(0).count("\n"), text)
+        parts: List[str] = []
+        slots: List[Tuple[int, str, bool]] = []
+        literal: List[str] = []
+        pos = 0
+        for m in TEMPLATE_TAG_RE.finditer(text):
+            slot = TEMPLATE_SLOT_RE.fullmatch(m.group(1))
+            if slot is None:
+                line = text.count("\n", 0, m.start()) + 1
+                raise ValueError(f"{name}:{line}: etiqueta de plantilla no válida: {m.group(0)}")
+            literal.append(text[pos : m.start()])
+            pos = m.end()
+            key, escape = slot.group(1), slot.group(2) is None
+            if key in constants:
+                value = str(constants[key])
+                literal.append(html.escape(value) if escape else value)
+                continue
+            parts.append("".join(literal))
+            literal = []
+            slots.append((len(parts), key, escape))
+            parts.append("")
+        literal.append(text[pos:])
+        parts.append("".join(literal))
+        parts[0] = parts[0].lstrip()
+        parts[-1] = parts[-1].rstrip()
+        return cls(parts=tuple(parts), slots=tuple(slots), name=name)
+
+    def render(self, values: Dict[str, object]) -> str:
+        out = list(self.parts)
+        for index, key, escape in self.slots:
+            try:
+                value = str(values[key])
+            except KeyError:
+                raise ValueError(f"{self.name}: falta el valor de {{{{ {key} }}}}") from None
+            out[index] = html.escape(value) if escape else value
+        return "".join(out)
+
+
+@functools.lru_cache(maxsize=None)
+def post_template(asset_prefix: str = "") -> Template:
+    # Se compila una sola vez por build y prefijo, con los bloques fijos ya renderizados.
+    return Template.compile(
+        POST_TEMPLATE_PATH.read_text(encoding="utf-8"),
+        {
+            "legal": LEGAL_PRE_ENCUADRE,
+            "how_it_works": how_it_works_block(),
+            "expert_invite": expert_invite_block(asset_prefix),
+        },
+        name=str(POST_TEMPLATE_PATH),
+    )
+
+
+def templates_hash() -> str:
+    # Plantilla base y plantilla del artículo: si cambia cualquiera, se regenera todo.
+    return content_hash(INDEX_PATH.read_bytes() + b"\0" + POST_TEMPLATE_PATH.read_bytes())
+
+
+@functools.lru_cache(maxsize=None)
+def how_it_works_block() -> str:
+    return f"""
+    <section>
+      <div class="container">
+        <div class="section-title">
+          <h2>Cómo funciona Punto Seguro</h2>
+        </div>
+
+        <div class="steps">
+          <div class="step">
+            <div class="n">1</div>
+            <h3>Paso 1 – Información y criterio</h3>
+            <p>Contenido preventivo para comprender la exposición real a intrusión. Sin registro, sin datos personales, sin compromiso.</p>
+          </div>
+          <div class="step">
+            <div class="n">2</div>
+            <h3>Paso 2 – Consulta voluntaria</h3>
+            <p>El usuario puede iniciar una conversación directa para contrastar su situación concreta, sin obligación de avanzar.</p>
+          </div>
+          <div class="step">
+            <div class="n">3</div>
+            <h3>Paso 3 – Evaluación técnica (opcional)</h3>
+            <p>Si se solicita una evaluación profesional personalizada, esta se realiza bajo el marco legal correspondiente, con registro de datos conforme a la normativa de seguridad privada.</p>
+          </div>
+        </div>
+      </div>
+    </section>
+    """.strip()
+
+
+@functools.lru_cache(maxsize=None)
+def expert_invite_block(asset_prefix: str = "") -> str:
+    return f"""
+    <section class="expert-invite">
+
+      <p class="expert-invite-intro">
+        Si necesitas contrastar si tu vivienda, local u oficina
+        está correctamente protegida,
+        puedes hablar directamente conmigo.
+      </p>
+
+      <a
+        href="/diagnostico"
+        class="expert-invite-action"
+        target="_blank"
+        rel="noopener noreferrer"
+      >
+        <img src="{asset_prefix}logo-punto-seguro.png" alt="Diagnóstico"{LAZY_IMAGE_ATTRS}>
+        <span>Calcular mi Índice IEI™</span>
+      </a>
+
+      <p class="expert-invite-note">
+        {WHATSAPP_PRENOTE}
+      </p>
+
+      <p class="expert-invite-note">
+        Conversación directa · Sin formularios · Sin compromiso<br>
+        Resolver una duda a tiempo evita decisiones equivocadas después.
+      </p>
+
+    </section>
+    """.strip()
+
+
+def related_block(related: Sequence[Card], asset_prefix: str = "") -> str:
+    if not related:
+        return ""
+    return f"""
+    <section class="related-posts">
+      <div class="container">
+        <div class="section-title">
+          <h2>Lecturas relacionadas</h2>
+        </div>
+        <div class="grid">
+          {render_blog_cards(list(related), asset_prefix)}
+        </div>
+      </div>
+    </section>
+    """.strip()
+
+
+def post_hints(post: Post, related: Sequence[Card] = (), asset_prefix: str = "") -> str:
+    """Pistas de carga del artículo para el <head>: precarga de la imagen principal y prefetch del siguiente probable.
+
+    El siguiente probable es la primera lectura relacionada (la más parecida, enlazada en la
+    propia página); cambia con la lista de relacionadas, que ya decide cuándo re-renderizar.
+    """
+    hints: List[str] = []
+    if post.image.strip():
+        hints.append(hero_preload(post.image, asset_prefix))
+    if related:
+        hints.append(f"<link rel=\"prefetch\" href=\"{html.escape(asset_prefix + related[0].href)}\">")
+    return "\n  ".join(hints)
+
+
+def render_post_content(post: Post, asset_prefix: str = "", related: Sequence[Card] = ()) -> str:
+    hero_image = ""
+    if post.image.strip():
+        hero_image = (
+            f"<div class=\"hero-claim\">\n"
+            f"  {render_image(post.image, post.image_alt, asset_prefix, sizes=HERO_IMAGE_SIZES, lazy=False)}\n"
+            f"</div>"
+        )
+
+    return post_template(asset_prefix).render(
+        {
+            "title": post.title,
+            "slug": post.slug,
+            "excerpt": post.excerpt,
+            "tag": post.tag,
+            "date_human": post.date_human,
+            "read_time": post.read_time,
+            "hero_image": hero_image,
+            "content": md_to_html(post.body_md, asset_prefix, hero_image=post.image),
+            "conclusion": post.conclusion,
+            "related": related_block(related, asset_prefix),
+        }
+    )
+
+
+def popular_posts(posts_sorted: List[Card], views: Dict[str, int]) -> Tuple[Card, ...]:
+    """Los POPULAR_COUNT más leídos: primero los fijados con popular_rank, luego por visitas (y por fecha)."""
+    pinned = sorted((p for p in posts_sorted if p.popular_rank), key=lambda p: p.popular_rank)  # type: ignore[arg-type, return-value]
+    viewed = [p for p in posts_sorted if not p.popular_rank and views.get(p.slug)]
+    viewed.sort(key=lambda p: views[p.slug], reverse=True)  # Estable: a igualdad, el más reciente.
+    return tuple((pinned + viewed)[:POPULAR_COUNT])
+
+
+def popular_block(popular: Sequence[Card], prefix: str = "") -> str:
+    if not popular:
+        return ""
+    return f"""
+    <section class="popular-posts">
+      <div class="container">
+        <div class="section-title">
+          <h2>Más leídos</h2>
+        </div>
+        <div class="grid">
+          {render_blog_cards(list(popular), prefix)}
+        </div>
+      </div>
+    </section>
+    """.strip()
+
+
+def render_blog_cards(posts: List[Card], prefix: str = "") -> str:
+    chunks: List[str] = []
+    for post in posts:
+        image_html = ""
+        if post.image:
+            image_html = render_image(post.image, post.image_alt, prefix, sizes=CARD_IMAGE_SIZES, lazy=True)
+        chunks.append(
+            "\n".join(
+                [
+                    f"<a class=\"card\" href=\"{prefix}{post.href}\">",
+                    f"  {image_html}" if image_html else "  ",
+                    f"  <h3>{html.escape(post.title)}</h3>",
+                    f"  <p>{html.escape(post.excerpt)}</p>",
+                    f"  <p class=\"fineprint\">{html.escape(post.tag)} · {html.escape(post.date_human)} · {post.read_time} min</p>",
+                    "</a>",
+                ]
+            )
+        )
+    return "\n".join(chunks)
+
+
+@dataclass(frozen=True)
+class ListingPage:
+    """Una página del índice del blog o del listado de un tag."""
+
+    rel_path: str
+    number: int
+    total: int
+    posts: Tuple[Card, ...]
+    tag: str = ""
+    popular: Tuple[Card, ...] = ()
+
+    @property
+    def prefix(self) -> str:
+        return "../" * self.rel_path.count("/")
+
+
+def listing_path(number: int, tag_slug: str = "") -> str:
+    if tag_slug:
+        return f"blog/tag/{tag_slug}.html" if number == 1 else f"blog/tag/{tag_slug}/page/{number}.html"
+    return BLOG_INDEX_PATH.name if number == 1 else f"blog/page/{number}.html"
+
+
+def paginate(posts_sorted: List[Card], page_size: int, tag: str = "") -> List[ListingPage]:
+    tag_slug = slugify(tag) if tag else ""
+    chunks = [tuple(posts_sorted[i : i + page_size]) for i in range(0, len(posts_sorted), page_size)] or [()]
+    return [
+        ListingPage(rel_path=listing_path(n, tag_slug), number=n, total=len(chunks), posts=chunk, tag=tag)
+        for n, chunk in enumerate(chunks, 1)
+    ]
+
+
+def plan_listing_pages(posts_sorted: List[Card], page_size: int, popular: Tuple[Card, ...] = ()) -> List[ListingPage]:
+    pages = paginate(posts_sorted, page_size)
+    # “Más leídos” solo va en blog.html: si cambia el ranking, no se reescribe nada más.
+    pages[0] = replace(pages[0], popular=popular)
+    by_tag: Dict[str, List[Card]] = {}
+    for post in posts_sorted:
+        by_tag.setdefault(post.tag, []).append(post)
+    for tag in sorted(by_tag):
+        pages.extend(paginate(by_tag[tag], page_size, tag))
+    return pages
+
+
+def render_tag_nav(tags: List[str], prefix: str, current: str = "") -> str:
+    chips = [f"<a class=\"pill\" href=\"{prefix}{BLOG_INDEX_PATH.name}\">Todos</a>"] if current else []
+    for tag in tags:
+        if tag == current:
+            chips.append(f"<span class=\"pill\"><b>{html.escape(tag)}</b></span>")
+        else:
+            href = f"{prefix}{listing_path(1, slugify(tag))}"
+            chips.append(f"<a class=\"pill\" href=\"{href}\">{html.escape(tag)}</a>")
+    return f"<div class=\"hero-segment-pills\">{''.join(chips)}</div>"
+
+
+def render_pagination(page: ListingPage) -> str:
+    if page.total <= 1:
+        return ""
+    tag_slug = slugify(page.tag) if page.tag else ""
+    links: List[str] = []
+    if page.number > 1:
+        href = f"{page.prefix}{listing_path(page.number - 1, tag_slug)}"
+        links.append(f"<a class=\"btn btn-ghost\" href=\"{href}\" rel=\"prev\">← Más recientes</a>")
+    if page.number < page.total:
+        href = f"{page.prefix}{listing_path(page.number + 1, tag_slug)}"
+        links.append(f"<a class=\"btn btn-ghost\" href=\"{href}\" rel=\"next\">Anteriores →</a>")
+    return (
+        f"<nav class=\"section-title\" aria-label=\"Paginación\">\n"
+        f"          <p class=\"fineprint\">Página {page.number} de {page.total}</p>\n"
+        f"          {' '.join(links)}\n"
+        f"        </nav>"
+    )
+
+
+def render_blog_content(
+    posts_sorted: List[Card],
+    *,
+    prefix: str = "",
+    tag: str = "",
+    tags_html: str = "",
+    pagination_html: str = "",
+    popular_html: str = "",
+) -> str:
+    cards_html = render_blog_cards(posts_sorted, prefix)
+    intro = (
+        "Criterio aplicado a casos reales para entender exposición, rutina y puntos ignorados."
+    )
+    title = f"Blog Punto Seguro · {tag}" if tag else "Blog Punto Seguro"
+    heading = f"Publicaciones sobre {tag}" if tag else "Últimas publicaciones"
+
+    return f"""
+    <section class=\"hero\">
+      <div class=\"container hero-grid\">
+        <div>
+          <h1>{html.escape(title)}</h1>
+          <p class=\"hero-subtitle\">{html.escape(intro)}</p>
+          <p class=\"fineprint\">{html.escape(LEGAL_PRE_ENCUADRE)}</p>
+          {tags_html}
+          <input type=\"search\" class=\"pill\" placeholder=\"Buscar en el blog…\" aria-label=\"Buscar en el blog\" data-blog-search=\"{prefix}blog/search/\" data-blog-prefix=\"{prefix}\">
+        </div>
+      </div>
+    </section>
+
+    <section>
+      <div class=\"container\">
+        <div class=\"section-title\">
+          <h2>{html.escape(heading)}</h2>
+          <p>Lecturas breves para detectar exposición real y evitar decisiones basadas en percepciones.</p>
+        </div>
+        <div class=\"grid\" data-blog-search-results hidden></div>
+        <div class=\"grid\" data-blog-listing>
+          {cards_html}
+        </div>
+        <div data-blog-listing>
+          {pagination_html}
+        </div>
+      </div>
+    </section>
+    <script src=\"{prefix}js/blog-search.js\" defer></script>
+
+    {popular_html}
+
+    {how_it_works_block()}
+
+    {expert_invite_block(prefix)}
+    """.strip()
+
+
+def render_listing_page(page: ListingPage, tags: List[str], shell: ShellOptions = DEFAULT_SHELL) -> str:
+    content = render_blog_content(
+        list(page.posts),
+        prefix=page.prefix,
+        tag=page.tag,
+        tags_html=render_tag_nav(tags, page.prefix, page.tag) if tags else "",
+        pagination_html=render_pagination(page),
+        popular_html=popular_block(page.popular, page.prefix),
+    )
+    return build_page(content, path_prefix=page.prefix, shell=shell)
+
+
+def search_tokens(text: str) -> List[str]:
+    # Misma normalización que los slugs: sin acentos, en minúsculas y sin signos.
+    text = strip_md(text)
+    if not text:
+        return []
+    return [t for t in slugify(text).split("-") if len(t) > 1 and t not in SEARCH_STOPWORDS]
+
+
+def search_terms(post: Post) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Términos de búsqueda (término → bits de campo) y frecuencias del cuerpo, tokenizando cada campo una vez.
+
+    Las frecuencias se limitan a los RELATED_TF_KEEP términos más frecuentes (lecturas relacionadas).
+    """
+    terms: Dict[str, int] = {}
+    counts: Dict[str, int] = {}
+    for field, text in (("title", post.title), ("tag", post.tag), ("excerpt", post.excerpt)):
+        bit = SEARCH_FIELD_BITS[field]
+        for token in search_tokens(text):
+            terms[token] = terms.get(token, 0) | bit
+    bit = SEARCH_FIELD_BITS["body"]
+    for token in search_tokens(post.body_md):
+        terms[token] = terms.get(token, 0) | bit
+        counts[token] = counts.get(token, 0) + 1
+    if len(counts) > RELATED_TF_KEEP:
+        counts = dict(heapq.nsmallest(RELATED_TF_KEEP, counts.items(), key=lambda item: (-item[1], item[0])))
+    return terms, counts
+
+
+class RelatedIndex:
+    """Lecturas relacionadas por similitud coseno TF-IDF sobre el texto del cuerpo.
+
+    Cada artículo (por nombre de su .md) guarda un vector podado a sus RELATED_TERMS términos
+    de más peso. La similitud se calcula con un índice invertido (término → artículos con más
+    peso en él), sin construir la matriz N×N. Cuando cambian unos pocos artículos solo se
+    vuelven a consultar ellos, los que los tenían como relacionados y sus vecinos más cercanos;
+    el resto conserva su lista (y su IDF de entonces) hasta el siguiente build completo.
+    """
+
+    def __init__(self, df: Dict[str, int] | None = None, docs: int = 0) -> None:
+        self.df: Dict[str, int] = dict(df or {})
+        self.docs = docs
+        self.vectors: Dict[str, Dict[str, float]] = {}
+        self.related: Dict[str, List[str]] = {}
+        self.postings: Dict[str, List[Tuple[float, str]]] = {}
+
+    @property
+    def corpus(self) -> Dict[str, object]:
+        return {"df": self.df, "docs": self.docs}
+
+    def keep(self, name: str, entry: Dict[str, object]) -> None:
+        """Artículo sin cambios: conserva el vector y la lista guardados en su registro."""
+        self.vectors[name] = entry["vector"]  # type: ignore[assignment]
+        self.related[name] = list(entry["related"])  # type: ignore[call-overload]
+
+    def count(self, terms: Dict[str, int], sign: int) -> None:
+        """Suma (sign=1) o resta (sign=-1) a la frecuencia documental los términos del cuerpo de un artículo."""
+        self.docs += sign
+        body = SEARCH_FIELD_BITS["body"]
+        for term, bits in terms.items():
+            if bits & body:
+                n = self.df.get(term, 0) + sign
+                if n > 0:
+                    self.df[term] = n
+                else:
+                    self.df.pop(term, None)
+
+    def vectorize(self, counts: Dict[str, int], counted: bool = True) -> Dict[str, float]:
+        """Vector podado de un artículo. counted: si el artículo ya suma en la frecuencia documental.
+
+        Antes de podar se quitan los términos que ningún otro artículo tiene: no pueden
+        coincidir con nadie y, con su IDF máximo, desplazarían a los compartidos.
+        """
+        shared = 2 if counted else 1
+        weights = {
+            term: (1 + math.log(n)) * (math.log((1 + self.docs) / (1 + self.df[term])) + 1)
+            for term, n in counts.items()
+            if self.df.get(term, 0) >= shared
+        }
+        top = heapq.nsmallest(RELATED_TERMS, weights.items(), key=lambda item: (-item[1], item[0]))
+        norm = math.sqrt(sum(w * w for _, w in top)) or 1.0
+        return {term: round(w / norm, 6) for term, w in top}
+
+    def build_postings(self) -> None:
+        postings: Dict[str, List[Tuple[float, str]]] = {}
+        for name, vector in self.vectors.items():
+            for term, weight in vector.items():
+                postings.setdefault(term, []).append((weight, name))
+        self.postings = {
+            term: heapq.nsmallest(RELATED_POSTINGS_MAX, docs, key=lambda item: (-item[0], item[1]))
+            for term, docs in postings.items()
+        }
+
+    def nearest(self, name: str, count: int) -> List[str]:
+        # Las listas del índice están ordenadas, así que el orden de inserción (y el desempate
+        # de nlargest) es estable entre builds.
+        scores: Dict[str, float] = {}
+        get = scores.get
+        for term, weight in self.vectors[name].items():
+            for other_weight, other in self.postings.get(term, ()):
+                scores[other] = get(other, 0.0) + weight * other_weight
+        scores.pop(name, None)
+        return heapq.nlargest(count, scores, key=scores.__getitem__)
+
+    def update(self, changed: Set[str], removed: Set[str], full: bool) -> Set[str]:
+        """Recalcula las listas afectadas por los artículos cambiados o eliminados. Devuelve los consultados."""
+        for name in removed:
+            self.vectors.pop(name, None)
+            self.related.pop(name, None)
+        if not (full or changed or removed):
+            return set()
+        self.build_postings()
+        if full:
+            requery = set(self.vectors)
+        else:
+            gone = changed | removed
+            requery = set(changed)
+            requery.update(name for name, related in self.related.items() if gone.intersection(related))
+            for name in changed:
+                requery.update(self.nearest(name, RELATED_RECHECK))
+        for name in requery:
+            self.related[name] = self.nearest(name, RELATED_COUNT)
+        return requery
+
+
+def search_shard_key(term: str) -> str:
+    key = term[:2]
+    return key if key.isascii() and key.isalnum() else "x" + key.encode("utf-8").hex()
+
+
+def search_doc_ids(registry: post_registry.PostRegistry, posts_sorted: List[Card]) -> Dict[str, int]:
+    # Los artículos sin id lo reciben del más antiguo al más reciente: un id mayor es un artículo más nuevo.
+    return {post.slug: registry.doc_id(post.slug) for post in reversed(posts_sorted)}
+
+
+def build_search_index(
+    posts_sorted: List[Card], terms_by_slug: Dict[str, Dict[str, int]], doc_ids: Dict[str, int]
+) -> Dict[str, str]:
+    """Índice invertido por prefijo de 2 letras. Devuelve {ruta relativa: JSON}.
+
+    Cada shard guarda la lista ordenada de términos y, por término, una lista plana
+    [delta_doc, bits_campo, ...] con los ids de documento codificados en diferencias. Los
+    ids son los del registro, estables entre builds: un artículo nuevo solo cambia los
+    shards de sus términos, su fichero de documentos e index.json. Los huecos de artículos
+    retirados quedan a null en los ficheros de documentos.
+    """
+    by_id = sorted((doc_ids[post.slug], post) for post in posts_sorted)
+    postings: Dict[str, List[int]] = {}
+    for doc_id, post in by_id:
+        for term, bits in terms_by_slug.get(post.slug, {}).items():
+            postings.setdefault(term, []).extend((doc_id, bits))
+
+    shards: Dict[str, Tuple[List[str], List[List[int]]]] = {}
+    for term in sorted(postings):
+        flat = postings[term]
+        encoded: List[int] = []
+        prev = 0
+        for i in range(0, len(flat), 2):
+            encoded.extend((flat[i] - prev, flat[i + 1]))
+            prev = flat[i]
+        terms, lists = shards.setdefault(search_shard_key(term), ([], []))
+        terms.append(term)
+        lists.append(encoded)
+
+    def dumps(value: object) -> str:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+    base = SEARCH_DIR.relative_to(ROOT).as_posix()
+    files: Dict[str, str] = {}
+    for key, (terms, lists) in shards.items():
+        files[f"{base}/t-{key}.json"] = dumps({"terms": terms, "postings": lists})
+    doc_shards: Dict[int, List[object]] = {}
+    for doc_id, p in by_id:
+        docs = doc_shards.setdefault(doc_id // SEARCH_DOCS_PER_SHARD, [])
+        docs.extend([None] * (doc_id % SEARCH_DOCS_PER_SHARD - len(docs)))
+        docs.append([p.href, p.title, p.excerpt, p.tag, p.date_human, p.read_time, p.image, p.image_alt])
+    for n, docs in doc_shards.items():
+        files[f"{base}/d-{n}.json"] = dumps(docs)
+    files[f"{base}/index.json"] = dumps(
+        {
+            "version": 2,
+            "docs": by_id[-1][0] + 1 if by_id else 0,
+            "docs_per_shard": SEARCH_DOCS_PER_SHARD,
+            "fields": SEARCH_FIELD_BITS,
+            "stopwords": sorted(SEARCH_STOPWORDS),
+            "shards": sorted(shards),
+        }
+    )
+    return files
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def load_manifest() -> Dict[str, object]:
+    try:
+        manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest
+
+
+def save_manifest(manifest: Dict[str, object]) -> None:
+    write_atomic(
+        MANIFEST_PATH,
+        json.dumps(manifest, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8"),
+    )
+
+
+def write_if_changed(path: Path, text: str) -> str | None:
+    """Escribe solo si el contenido cambia. Devuelve "added", "changed" o None."""
+    data = text.encode("utf-8")
+    try:
+        current = path.read_bytes()
+    except FileNotFoundError:
+        write_atomic(path, data)
+        return "added"
+    if content_hash(current) == content_hash(data):
+        return None
+    write_atomic(path, data)
+    return "changed"
+
+
+def _collapse_space(text: str) -> str:
+    return MINIFY_SPACE_RE.sub(lambda m: "\n" if "\n" in m.group(0) else " ", text)
+
+
+def minify_html(text: str) -> str:
+    """Quita comentarios y colapsa espacios; <pre>, <script> y <textarea> quedan intactos."""
+    out: List[str] = []
+    pos = 0
+    for m in MINIFY_TOKEN_RE.finditer(text):
+        out.append(_collapse_space(text[pos : m.start()]))
+        token = m.group(0)
+        if token.startswith("<!--"):
+            # Los comentarios condicionales de IE sí cambian el render.
+            if token.startswith("<!--[if"):
+                out.append(token)
+        elif m.group(2) is not None:
+            css = _collapse_space(CSS_COMMENT_RE.sub("", m.group(2))).strip()
+            out.append(token[: m.start(2) - m.start()] + css + token[m.end(2) - m.start() :])
+        else:
+            out.append(token)
+        pos = m.end()
+    out.append(_collapse_space(text[pos:]))
+    return "".join(out).strip() + "\n"
+
+
+@dataclass
+class OutputStats:
+    """Bytes antes y después de minificar y comprimir las salidas escritas en este build."""
+
+    html_in: int = 0
+    html_out: int = 0
+    compressed: int = 0
+    compressed_in: int = 0
+    gzip: int = 0
+    brotli: int = 0
+
+    def summary(self) -> List[str]:
+        lines: List[str] = []
+        if self.html_in:
+            saved = 1 - self.html_out / self.html_in
+            lines.append(f"- HTML minificado: {kb(self.html_in)} → {kb(self.html_out)} (-{saved:.0%})")
+        if self.compressed:
+            line = f"- Precomprimidos: {self.compressed} ficheros, {kb(self.compressed_in)} → gzip {kb(self.gzip)}"
+            if self.brotli:
+                line += f", brotli {kb(self.brotli)}"
+            lines.append(line)
+        return lines
+
+
+def compressed_siblings(path: Path) -> List[Path]:
+    return [path.with_name(path.name + ".gz"), path.with_name(path.name + ".br")]
+
+
+def write_compressed(path: Path, data: bytes, stats: OutputStats | None = None) -> None:
+    gz_path, br_path = compressed_siblings(path)
+    # mtime=0: el .gz es reproducible y solo cambia si cambia el contenido.
+    gz_data = gzip.compress(data, compresslevel=9, mtime=0)
+    write_atomic(gz_path, gz_data)
+    if stats:
+        stats.compressed += 1
+        stats.compressed_in += len(data)
+        stats.gzip += len(gz_data)
+    if brotli is None:
+        if br_path.exists():
+            br_path.unlink()
+        return
+    br_data = brotli.compress(data, quality=11)
+    write_atomic(br_path, br_data)
+    if stats:
+        stats.brotli += len(br_data)
+
+
+def remove_output(path: Path) -> bool:
+    """Borra una salida junto con sus .gz/.br. Devuelve True si la salida existía."""
+    for sibling in compressed_siblings(path):
+        if sibling.exists():
+            sibling.unlink()
+    if not path.exists():
+        return False
+    path.unlink()
+    return True
+
+
+def write_output(path: Path, text: str, args: argparse.Namespace, stats: OutputStats | None = None) -> str | None:
+    """write_if_changed() con la etapa de salida: minifica el HTML y mantiene los .gz/.br al día.
+
+    Si el contenido no cambió no se recomprime (salvo que falte algún hermano); si cambió
+    y no se precomprime, se borran los hermanos para que nunca se sirva una versión vieja.
+    """
+    if args.minify and path.suffix == ".html":
+        minified = minify_html(text)
+        if stats:
+            stats.html_in += len(text.encode("utf-8"))
+            stats.html_out += len(minified.encode("utf-8"))
+        text = minified
+    status = write_if_changed(path, text)
+    if args.precompress and path.suffix in PRECOMPRESS_SUFFIXES:
+        gz_path, br_path = compressed_siblings(path)
+        if status or not gz_path.exists() or (brotli is not None and not br_path.exists()):
+            write_compressed(path, text.encode("utf-8"), stats)
+    elif status:
+        for sibling in compressed_siblings(path):
+            if sibling.exists():
+                sibling.unlink()
+    return status
+
+
+def output_options(args: argparse.Namespace) -> str:
+    # Cambiar de opciones de salida invalida el manifiesto: todas las salidas se reescriben.
+    return (
+        f"minify={int(args.minify)}:precompress={int(args.precompress)}:brotli={int(brotli is not None)}"
+        f":shell={args.shell_assets}:fingerprint={int(args.fingerprint)}"
+    )
+
+
+def budget_build(args: argparse.Namespace) -> Dict[str, object]:
+    # Opciones y entorno que cambian las medidas del presupuesto (la precompresión no: se mide el gzip igual).
+    return {
+        "minify": args.minify,
+        "shell_assets": args.shell_assets,
+        "fingerprint": args.fingerprint,
+        "pillow": Image is not None,
+    }
+
+
+def rel_output(path: Path) -> str:
+    return path.relative_to(ROOT).as_posix()
+
+
+def card_meta(card: Card) -> Dict[str, object]:
+    return asdict(card)
+
+
+def card_from_meta(meta: Dict[str, object]) -> Card:
+    return Card(**meta)  # type: ignore[arg-type]
+
+
+def generator_files() -> List[Path]:
+    """El generador: build.py, este fichero, los módulos del blog que importa y la plantilla del artículo."""
+    modules = (build_cache, budget, build_util, link_check, popularity, post_registry)
+    return [
+        Path(__file__).with_name("build.py"),
+        Path(__file__),
+        *(Path(module.__file__) for module in modules),  # type: ignore[arg-type]
+        POST_TEMPLATE_PATH,
+    ]
+
+
+def generator_version() -> str:
+    # Con o sin Pillow cambia el HTML de las imágenes: cuenta como otra versión del generador.
+    data = b"\0".join(path.read_bytes() for path in generator_files())
+    return content_hash(data + (b"\0pillow" if Image is not None else b""))
+
+
+def card_fields(post: Card) -> List[object]:
+    return [
+        post.slug,
+        post.title,
+        post.excerpt,
+        post.tag,
+        post.date_iso,
+        post.read_time,
+        post.image,
+        post.image_alt,
+        image_digest(post.image),
+    ]
+
+
+def cards_key(posts_sorted: List[Card]) -> str:
+    # Solo los campos que aparecen en las tarjetas de blog.html.
+    cards = [card_fields(p) for p in posts_sorted]
+    return content_hash(json.dumps(cards, ensure_ascii=False).encode("utf-8"))
+
+
+class BuildProfile:
+    """Tiempo de pared, CPU y bytes por etapa y por artículo (solo con --profile)."""
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.posts: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def stage(self, name: str, key: str = "") -> Iterator[None]:
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            totals = self._totals(self.stages, name)
+            totals["wall"] += wall
+            totals["cpu"] += cpu
+            totals["calls"] += 1
+            if key:
+                post = self.posts.setdefault(key, {"wall": 0.0, "cpu": 0.0})
+                post["wall"] += wall
+                post["cpu"] += cpu
+                post[name] = post.get(name, 0.0) + wall
+
+    def add_bytes(self, name: str, read: int = 0, written: int = 0) -> None:
+        totals = self._totals(self.stages, name)
+        totals["bytes_read"] += read
+        totals["bytes_written"] += written
+
+    @staticmethod
+    def _totals(table: Dict[str, Dict[str, float]], name: str) -> Dict[str, float]:
+        return table.setdefault(name, {"wall": 0.0, "cpu": 0.0, "calls": 0, "bytes_read": 0, "bytes_written": 0})
+
+    def slowest(self, top: int = 10) -> List[Tuple[str, Dict[str, float]]]:
+        return sorted(self.posts.items(), key=lambda item: item[1]["wall"], reverse=True)[:top]
+
+    def to_json(self, top: int = 10) -> Dict[str, object]:
+        return {
+            "stages": self.stages,
+            "posts": self.posts,
+            "slowest": [key for key, _ in self.slowest(top)],
+        }
+
+    def summary(self, top: int = 10) -> str:
+        lines = [f"{'etapa':<22} {'pared ms':>10} {'cpu ms':>10} {'llamadas':>9} {'leído':>10} {'escrito':>10}"]
+        for name, t in self.stages.items():
+            lines.append(
+                f"{name:<22} {t['wall'] * 1000:>10.2f} {t['cpu'] * 1000:>10.2f} {int(t['calls']):>9} "
+                f"{int(t['bytes_read']):>10} {int(t['bytes_written']):>10}"
+            )
+        slowest = self.slowest(top)
+        if slowest:
+            lines.append("")
+            lines.append(f"Artículos más lentos (top {len(slowest)}):")
+            for key, t in slowest:
+                lines.append(f"  {t['wall'] * 1000:>8.2f} ms  {key}")
+        return "\n".join(lines)
+
+
+class NullProfile:
+    """Sustituto sin coste de BuildProfile cuando --profile no está activo."""
+
+    _null_stage = nullcontext()
+
+    def stage(self, name: str, key: str = "") -> ContextManager[None]:
+        return self._null_stage
+
+    def add_bytes(self, name: str, read: int = 0, written: int = 0) -> None:
+        pass
+
+
+NULL_PROFILE = NullProfile()
+
+
+def load_post(
+    md_path: Path, profile: BuildProfile | NullProfile = NULL_PROFILE, drafts: bool = False
+) -> Post | None:
+    """read_post() con la ruta en los errores. Devuelve None si es un borrador (salvo con drafts)."""
+    try:
+        with profile.stage("read_post", md_path.name):
+            return read_post(md_path, drafts)
+    except ValueError as e:
+        msg = str(e)
+        if "draft=true" in msg:
+            return None
+        if not msg.startswith(str(md_path)):
+            raise ValueError(f"{md_path}: {msg}") from e
+        raise
+
+
+def analyze_source(
+    md_path: Path, profile: BuildProfile | NullProfile = NULL_PROFILE
+) -> Tuple[Card, Dict[str, int], Dict[str, int], List[str]] | None:
+    """Tarjeta, términos de búsqueda, frecuencias e imágenes del cuerpo de un .md. None si es un borrador."""
+    post = load_post(md_path, profile)
+    if post is None:
+        return None
+    with profile.stage("search_terms", md_path.name):
+        terms, counts = search_terms(post)
+    return Card.from_post(post), terms, counts, body_images(post.body_md)
+
+
+def source_entry(digest: str, card: Card, terms: Dict[str, int], images: List[str]) -> Dict[str, object]:
+    """Registro de un .md publicado en el manifiesto. "image" cubre la principal y las del cuerpo."""
+    entry: Dict[str, object] = {
+        "hash": digest,
+        "post": card_meta(card),
+        "search": terms,
+        "image": images_digest([card.image, *images]),
+    }
+    if images:
+        entry["body_images"] = images
+    return entry
+
+
+def entry_images(entry: Dict[str, object]) -> List[str]:
+    """Imagen principal e imágenes del cuerpo de un registro del manifiesto."""
+    return [entry["post"]["image"], *entry.get("body_images", [])]  # type: ignore[index]
+
+
+def render_source(
+    md_path: Path,
+    related: Sequence[Card] = (),
+    profile: BuildProfile | NullProfile = NULL_PROFILE,
+    shell: ShellOptions = DEFAULT_SHELL,
+) -> Tuple[Card, str] | None:
+    """Lee y renderiza la página de un .md con sus lecturas relacionadas. Devuelve None si es un borrador."""
+    post = load_post(md_path, profile)
+    if post is None:
+        return None
+    with profile.stage("render_post_content", md_path.name):
+        content_html = render_post_content(post, asset_prefix="../../", related=related)
+    with profile.stage("build_page", md_path.name):
+        out_html = build_page(
+            content_html, path_prefix="../../", shell=shell, head_html=post_hints(post, related, "../../")
+        )
+    return Card.from_post(post), out_html
+
+
+def apply_chunk(fn: Callable, items: List[Tuple], kwargs: Dict[str, object]) -> List:
+    return [fn(*item, **kwargs) for item in items]
+
+
+def stream_map(
+    fn: Callable, items: List[Tuple], jobs: int, profile: BuildProfile | NullProfile = NULL_PROFILE, **kwargs: object
+) -> Iterator:
+    """Aplica fn(*item) en streaming: los resultados salen en el orden de items según van estando listos.
+
+    Con procesos solo hay RENDER_WINDOW lotes en vuelo por proceso, así que la memoria
+    depende del tamaño del lote y no del número de artículos.
+    """
+    if jobs <= 1 or len(items) <= 1:
+        for item in items:
+            yield fn(*item, profile=profile, **kwargs)
+        return
+    workers = min(jobs, len(items))
+    chunksize = max(1, min(RENDER_CHUNK_MAX, len(items) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        window: Deque = deque()
+        for start in range(0, len(items), chunksize):
+            window.append(pool.submit(apply_chunk, fn, items[start : start + chunksize], kwargs))
+            if len(window) >= workers * RENDER_WINDOW:
+                yield from window.popleft().result()
+        while window:
+            yield from window.popleft().result()
+
+
+def link_refs(rel_path: str, profile: BuildProfile | NullProfile = NULL_PROFILE) -> List[Tuple[str, str]]:
+    with profile.stage("check_links", rel_path):
+        return link_check.page_refs(ROOT, rel_path)
+
+
+def check_links(
+    pages: List[str], jobs: int, profile: BuildProfile | NullProfile = NULL_PROFILE
+) -> Tuple[Dict[str, List[str]], str]:
+    """URLs locales que no resuelven a ningún fichero ni ruta de server.js, por página, y una línea de resumen.
+
+    El índice se construye una vez; las páginas se analizan en paralelo y cada URL distinta
+    de una página se busca en el índice (sin stat por enlace).
+    """
+    with profile.stage("check_links"):
+        index = link_check.SiteIndex.scan(ROOT, SERVER_PATH)
+    broken: Dict[str, List[str]] = {}
+    refs_total = 0
+    for rel_path, refs in zip(pages, stream_map(link_refs, [(rel_path,) for rel_path in pages], jobs, profile)):
+        refs_total += len(refs)
+        missing = [url for key, url in refs if key not in index]
+        if missing:
+            broken[rel_path] = missing
+    summary = (
+        f"{refs_total} referencias locales en {len(pages)} páginas "
+        f"(índice: {len(index.files)} ficheros y {len(index.routes)} rutas de server.js)"
+    )
+    return broken, summary
+
+
+def related_key(related: Sequence[Card]) -> str:
+    # Solo los campos que aparecen en las tarjetas del bloque de lecturas relacionadas.
+    return content_hash(json.dumps([card_fields(card) for card in related], ensure_ascii=False).encode("utf-8"))
+
+
+def check_registry(registered: post_registry.PostRegistry, names: List[str], previous_outputs: List[str]) -> None:
+    """Falla antes de renderizar si dos fuentes comparten prefijo o si hay páginas que ningún artículo genera.
+
+    Las páginas huérfanas salen de comparar el registro con las salidas del build anterior
+    (manifiesto), con un stat por candidata y sin recorrer blog/posts/.
+    """
+    duplicates = post_registry.duplicate_prefixes(names)
+    if duplicates:
+        prefix, sources = min(duplicates.items())
+        free = max(p for p in map(post_registry.source_prefix, names) if p is not None) + 1
+        raise SystemExit(
+            f"Prefijo {prefix:02d} duplicado en {CONTENT_DIR}: {', '.join(sources)}. "
+            f"Renombra uno de ellos (siguiente prefijo libre: {free:02d})."
+        )
+    if not registered.exists():
+        return
+    posts_dir = rel_output(POSTS_OUT_DIR) + "/"
+    # Un .md sin registrar cuyo slug es su nombre (el caso normal) no deja huérfana su página.
+    known = registered.posts.keys() | {name[:-3] for name in names}
+    orphans = sorted(
+        rel[len(posts_dir) :]
+        for rel in previous_outputs
+        if rel.startswith(posts_dir) and rel.endswith(".html") and rel[len(posts_dir) : -5] not in known
+        and (ROOT / rel).exists()
+    )
+    if orphans:
+        raise SystemExit(
+            f"Páginas huérfanas en {POSTS_OUT_DIR} (ningún .md registrado las genera): {', '.join(orphans)}. "
+            "Bórralas o restaura su .md."
+        )
+
+
+def run_build(args: argparse.Namespace, profile: BuildProfile | NullProfile = NULL_PROFILE) -> None:
+    if not CONTENT_DIR.exists():
+        raise SystemExit(f"No existe {CONTENT_DIR}")
+    POSTS_OUT_DIR.mkdir(parents=True, exist_ok=True)
+    clock = budget.StageClock()
+    # Si se codifican imágenes responsive (primer build tras clonar), los tiempos no son comparables.
+    responsive_key = build_cache.stat_key(RESPONSIVE_DIR)
+
+    # El manifiesto solo es válido si ni el generador ni las plantillas han cambiado.
+    stored = load_manifest()
+    generator_hash = generator_version()
+    shell_hash = templates_hash()
+    manifest = stored
+    options = output_options(args)
+    shell = ShellOptions.from_args(args)
+    # Si cambia cualquier asset con hash, todas las páginas que lo referencian quedan viejas.
+    stale_fingerprints = any(
+        asset_fingerprint(original) != fingerprinted
+        for original, fingerprinted in manifest.get("fingerprints", {}).items()  # type: ignore[union-attr]
+    )
+    if (
+        args.force
+        or manifest.get("generator") != generator_hash
+        or manifest.get("shell") != shell_hash
+        or manifest.get("options") != options
+        or stale_fingerprints
+    ):
+        manifest = {}
+    # Registros resueltos de cada .md: si su firma de stat no cambió, ni siquiera se lee.
+    cache = build_cache.PostCache(generator_hash)
+    previous: Dict[str, Dict[str, object]] = cache.sources if manifest else {}
+
+    # Registro de la ejecución anterior (salidas huérfanas) y el de esta (slugs duplicados).
+    md_paths = sorted(CONTENT_DIR.glob("*.md"))
+    registered = post_registry.PostRegistry.load()
+    check_registry(registered, [md_path.name for md_path in md_paths], stored.get("outputs", []))  # type: ignore[arg-type]
+    registry = post_registry.PostRegistry(next_prefix=registered.next_prefix, next_doc=registered.next_doc)
+
+    def claim(card: Card, name: str) -> None:
+        owner = registry.posts.get(card.slug)
+        if owner is not None and owner != name:
+            raise SystemExit(
+                f"Slug duplicado '{card.slug}': lo generan {owner} y {name}. Cambia el slug de uno de los dos."
+            )
+        registry.register(card.slug, name, registered.docs.get(card.slug))
+
+    sources: Dict[str, Dict[str, object]] = {}
+    stats: Dict[str, Tuple[int, int]] = {}
+    cards: Dict[str, Card] = {}
+    pending: List[Tuple[Path, str]] = []
+    with profile.stage("scan"):
+        for md_path in md_paths:
+            stat = build_cache.stat_key(md_path)
+            if stat is not None:
+                stats[md_path.name] = stat
+            digest = cache.digest(md_path.name, stat) if previous else None
+            if digest is None:
+                data = md_path.read_bytes()
+                profile.add_bytes("scan", read=len(data))
+                digest = content_hash(data)
+            entry = previous.get(md_path.name)
+            if entry and entry.get("hash") == digest:
+                if entry.get("draft"):
+                    sources[md_path.name] = entry
+                    continue
+                cached = card_from_meta(entry["post"])  # type: ignore[arg-type]
+                unchanged_image = entry.get("image", "") == images_digest(entry_images(entry))
+                if unchanged_image and (POSTS_OUT_DIR / f"{cached.slug}.html").exists():
+                    claim(cached, md_path.name)
+                    sources[md_path.name] = entry
+                    cards[md_path.name] = cached
+                    continue
+            pending.append((md_path, digest))
+    clock.lap("scan")
+
+    changes: Dict[str, List[str]] = {"added": [], "changed": [], "deleted": []}
+    output_stats = OutputStats()
+    # Presupuesto de peso y tiempo (--budget): se mide cada página renderizada.
+    budget_gate = args.budget or args.update_budget
+    meter = budget.PageMeter(ROOT)
+    measured: Dict[str, Dict[str, object]] = {}
+
+    def emit(rel_path: str, text: str, key: str = "") -> bool:
+        out_path = ROOT / rel_path
+        with profile.stage("write", key):
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            with clock.aside():
+                status = write_output(out_path, text, args, output_stats)
+        if budget_gate and rel_path.endswith(".html"):
+            with profile.stage("budget"):
+                measured[rel_path] = meter.measure(rel_path, text)
+        if not status:
+            return False
+        profile.add_bytes("write", written=len(text.encode("utf-8")))
+        changes[status].append(rel_path)
+        return True
+
+    # Copias con hash antes que las páginas que las referencian.
+    fingerprints: Dict[str, str] = dict(manifest.get("fingerprints", {}))  # type: ignore[arg-type]
+
+    def write_fingerprinted(page_html: str) -> None:
+        if not args.fingerprint:
+            return
+        with profile.stage("fingerprint"):
+            for original, fingerprinted in page_fingerprints(page_html).items():
+                fingerprints[original] = fingerprinted
+                if not (ROOT / fingerprinted).exists():
+                    write_atomic(ROOT / fingerprinted, (ROOT / original).read_bytes())
+                    changes["added"].append(fingerprinted)
+
+    # CSS y JS extraídos de index.html (vacío con --shell-assets inline).
+    shell_assets = page_shell("", shell).assets
+    for rel_path, text in shell_assets:
+        emit(rel_path, text)
+
+    # Lecturas relacionadas: sin manifiesto válido se recalculan todas; si no, se parte de
+    # la frecuencia documental guardada y los artículos sin cambios conservan su vector.
+    full = not previous
+    related_index = RelatedIndex() if full else RelatedIndex(**cache.corpus)  # type: ignore[arg-type]
+    for name, entry in previous.items():
+        if entry.get("draft"):
+            continue
+        if sources.get(name) is entry:
+            related_index.keep(name, entry)
+        else:
+            related_index.count(entry["search"], -1)  # type: ignore[arg-type]
+
+    # Primera pasada por los pendientes: tarjeta, términos de búsqueda y frecuencias del cuerpo.
+    counts_by_name: Dict[str, Dict[str, int]] = {}
+    results = stream_map(analyze_source, [(md_path,) for md_path, _ in pending], args.jobs, profile)
+    for (md_path, digest), result in zip(pending, results):
+        if result is None:
+            sources[md_path.name] = {"hash": digest, "draft": True}
+            continue
+        card, terms, counts, images = result
+        claim(card, md_path.name)
+        sources[md_path.name] = source_entry(digest, card, terms, images)
+        cards[md_path.name] = card
+        related_index.count(terms, 1)
+        counts_by_name[md_path.name] = counts
+    clock.lap("analyze")
+
+    with profile.stage("related"):
+        for name, counts in counts_by_name.items():
+            related_index.vectors[name] = related_index.vectorize(counts)
+        removed = {name for name, entry in previous.items() if not entry.get("draft") and name not in cards}
+        requeried = related_index.update(set(counts_by_name), removed, full)
+        # Se renderizan los pendientes y los artículos cuyo bloque de relacionadas cambia.
+        to_render: List[Tuple[Path, Tuple[Card, ...]]] = []
+        for name in sorted(counts_by_name.keys() | requeried):
+            related = tuple(cards[other] for other in related_index.related.get(name, []))
+            key = related_key(related)
+            entry = sources[name]
+            if name in counts_by_name or entry.get("related_key") != key:
+                to_render.append((CONTENT_DIR / name, related))
+            sources[name] = {
+                **entry,
+                "vector": related_index.vectors[name],
+                "related": related_index.related.get(name, []),
+                "related_key": key,
+            }
+    counts_by_name.clear()
+    clock.lap("related")
+
+    # Cada artículo se escribe en cuanto está renderizado y solo se queda su tarjeta.
+    rendered = 0
+    results = stream_map(render_source, to_render, args.jobs, profile, shell=shell)
+    for (md_path, _), result in zip(to_render, results):
+        if result is None:
+            continue
+        card, out_html = result
+        write_fingerprinted(out_html)
+        emit(rel_output(POSTS_OUT_DIR / f"{card.slug}.html"), out_html, md_path.name)
+        rendered += 1
+    clock.lap("render")
+
+    posts_sorted = sorted(cards.values(), key=lambda p: (p.date_iso, p.slug), reverse=True)
+
+    # Los borradores conservan su entrada (y su prefijo); los slugs que ya no genera
+    # ninguna fuente se liberan junto con su página.
+    for name, entry in sources.items():
+        if entry.get("draft"):
+            slug = registered.by_source.get(name, name[:-3])
+            if slug not in registry.posts:
+                registry.register(slug, name, registered.docs.get(slug))
+    for slug in sorted(registered.posts.keys() - registry.posts.keys()):
+        stale = POSTS_OUT_DIR / f"{slug}.html"
+        if remove_output(stale):
+            changes["deleted"].append(rel_output(stale))
+    doc_ids = search_doc_ids(registry, posts_sorted)
+    registry.save()
+
+    # blog.html, blog/page/N.html y los listados por tag dependen de las tarjetas; blog.html,
+    # además, de las visitas (solo se leen los eventos nuevos del log).
+    with profile.stage("popularity"):
+        views, views_summary = popularity.load_views({p.slug for p in posts_sorted})
+        popular = popular_posts(posts_sorted, views)
+    listing_pages = plan_listing_pages(posts_sorted, args.page_size, popular)
+    index_key = f"{args.page_size}:{cards_key(posts_sorted)}"
+    popular_key = cards_key(list(popular))
+    listings_updated = 0
+    if manifest.get("index") != index_key or not all((ROOT / page.rel_path).exists() for page in listing_pages):
+        stale_listings = listing_pages
+    else:
+        stale_listings = listing_pages[:1] if manifest.get("popular") != popular_key else []
+    if stale_listings:
+        tags = sorted({p.tag for p in posts_sorted})
+        for page in stale_listings:
+            with profile.stage("render_blog_content"):
+                page_html = render_listing_page(page, tags, shell)
+            write_fingerprinted(page_html)
+            listings_updated += emit(page.rel_path, page_html)
+    clock.lap("listings")
+
+    if args.fingerprint:
+        emit(
+            rel_output(ASSET_MANIFEST_PATH),
+            json.dumps(fingerprints, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
+        )
+
+    # El índice de búsqueda cambia con las tarjetas o con el texto de cualquier artículo.
+    search_paths: List[str] = manifest.get("search_files", [])  # type: ignore[assignment]
+    if rendered or manifest.get("index") != index_key or not all((ROOT / rel).exists() for rel in search_paths):
+        terms_by_slug = {
+            entry["post"]["slug"]: entry["search"]  # type: ignore[index]
+            for entry in sources.values()
+            if not entry.get("draft")
+        }
+        with profile.stage("search_index"):
+            search_files = build_search_index(posts_sorted, terms_by_slug, doc_ids)
+        for rel_path, text in search_files.items():
+            emit(rel_path, text)
+        search_paths = sorted(search_files)
+    clock.lap("search_index")
+
+    # Solo se borran salidas que el propio build generó en una ejecución anterior.
+    outputs = sorted(
+        {rel_output(POSTS_OUT_DIR / f"{p.slug}.html") for p in posts_sorted}
+        | {page.rel_path for page in listing_pages}
+        | set(search_paths)
+        | {rel_path for rel_path, _ in shell_assets}
+        | set(fingerprints.values())
+        | ({rel_output(ASSET_MANIFEST_PATH)} if args.fingerprint else set())
+    )
+    for stale in sorted(set(stored.get("outputs", [])) - set(outputs)):  # type: ignore[arg-type]
+        if remove_output(ROOT / stale):
+            changes["deleted"].append(stale)
+
+    # Las páginas que no se han vuelto a renderizar conservan su medida del build anterior.
+    violations: List[str] = []
+    budget_pages: Dict[str, Dict[str, int]] = {}
+    budget_skipped: List[str] = []
+    if budget_gate:
+        stages = clock.totals()
+        with profile.stage("budget"):
+            budget_pages, report = budget.merge_report(measured, outputs, options, meter)
+            budget.save_json(budget.REPORT_PATH, report)
+            baseline = budget.load_json(budget.BASELINE_PATH)
+            build = budget_build(args)
+            if args.update_budget:
+                budget.save_json(budget.BASELINE_PATH, budget.new_baseline(baseline, budget_pages, stages, build))
+            elif not baseline:
+                raise SystemExit(f"{budget.BASELINE_PATH} no es válido. Regenéralo con --update-budget")
+            else:
+                # Con otras opciones u otro entorno (p. ej. sin Pillow no hay derivados) nada es comparable.
+                budget_skipped = budget.mismatch(baseline, build)
+                # Los tiempos solo son comparables entre builds completos que no codifican imágenes.
+                timed = full and build_cache.stat_key(RESPONSIVE_DIR) == responsive_key
+                if not budget_skipped:
+                    violations = budget.check(baseline, budget_pages, stages if timed else None)
+
+    # Después del presupuesto: la comprobación de enlaces no cuenta en los tiempos por etapa.
+    broken: Dict[str, List[str]] = {}
+    if args.check_links:
+        checked = [rel for rel in outputs if rel.endswith((".html", ".css"))]
+        broken, links_summary = check_links(checked, args.jobs, profile)
+
+    with profile.stage("manifest"):
+        save_manifest(
+            {
+                "version": MANIFEST_VERSION,
+                "generator": generator_hash,
+                "shell": shell_hash,
+                "options": options,
+                "fingerprints": fingerprints,
+                "index": index_key,
+                "popular": popular_key,
+                "outputs": outputs,
+                "search_files": search_paths,
+            }
+        )
+        write_atomic(args.changes, json.dumps(changes, ensure_ascii=False, indent=2).encode("utf-8"))
+        # Sello para build_cache.up_to_date(): todo lo que, si cambia, obliga a pasar por aquí.
+        inputs = (
+            generator_files()
+            + [INDEX_PATH, MANIFEST_PATH, registry.path, POSTS_OUT_DIR, budget.BASELINE_PATH]
+            + [popularity.EVENTS_PATH]
+            + [ROOT / p.image for p in posts_sorted if p.image and not p.image.startswith(("http://", "https://"))]
+            + [ROOT / image for entry in sources.values() for image in entry.get("body_images", [])]
+            + [ROOT / original for original in fingerprints]
+            + [ROOT / asset for asset in meter.sizes]
+        )
+        cache.corpus = related_index.corpus
+        stamp = {
+            "argv": args.argv,
+            "modules": build_cache.optional_modules(),
+            "content_dir": str(CONTENT_DIR),
+            "changes": str(args.changes),
+            "files": {str(path): build_cache.stat_key(path) for path in inputs},
+            "outputs": [str(ROOT / rel) for rel in outputs],
+            "posts": len(posts_sorted),
+            "events_db": bool(popularity.database_url()),
+        }
+        # Sin sello si el presupuesto falla: el siguiente build vuelve a comprobarlo.
+        cache.save(sources, stats, None if violations else stamp)
+
+    print("OK")
+    print(f"- Posts generados: {rendered} (sin cambios: {len(posts_sorted) - rendered})")
+    print(f"- Listados actualizados: {listings_updated} de {len(listing_pages)} ({BLOG_INDEX_PATH}, páginas y tags)")
+    print(f"- Más leídos: {views_summary}")
+    print(f"- Índice de búsqueda: {len(search_paths)} ficheros en {SEARCH_DIR}")
+    if args.fingerprint:
+        print(f"- Assets con hash: {len(fingerprints)} ({ASSET_MANIFEST_PATH})")
+    print(
+        f"- Salidas: {len(changes['added'])} nuevas, {len(changes['changed'])} modificadas, "
+        f"{len(changes['deleted'])} eliminadas ({args.changes})"
+    )
+    for line in output_stats.summary():
+        print(line)
+    if args.update_budget:
+        print(f"- Presupuesto: línea base regenerada con {len(budget_pages)} páginas ({budget.BASELINE_PATH})")
+    elif budget_skipped:
+        print(
+            f"- Presupuesto: sin comprobar, {budget.BASELINE_PATH} se midió con otras opciones "
+            f"({', '.join(budget_skipped)}); regenéralo con estas si son las de referencia"
+        )
+    elif budget_gate and not violations:
+        print(f"- Presupuesto: {len(budget_pages)} páginas dentro de {budget.BASELINE_PATH}")
+    if args.check_links:
+        print(f"- Enlaces: {links_summary}")
+    errors: List[str] = []
+    if broken:
+        errors.append("Enlaces rotos en las páginas generadas:\n" + "\n".join(link_check.report_lines(broken)))
+    if violations:
+        errors.append(
+            f"Presupuesto superado ({budget.BASELINE_PATH}):\n"
+            + "\n".join(budget.report_lines(violations))
+            + "\nSi el aumento es intencionado, regenera la línea base: python3 blog/build.py --update-budget"
+        )
+    if errors:
+        raise SystemExit("\n".join(errors))
+
+
+def run_profiled(args: argparse.Namespace) -> None:
+    profile = BuildProfile()
+    profiler = cProfile.Profile()
+    with profile.stage("total"):
+        profiler.enable()
+        try:
+            run_build(args, profile)
+        finally:
+            profiler.disable()
+
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(str(PROFILE_DIR / "build.pstats"))
+    (PROFILE_DIR / "build-profile.json").write_text(
+        json.dumps(profile.to_json(), ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    print("")
+    print(profile.summary())
+    print("")
+    print(f"- Perfil: {PROFILE_DIR / 'build-profile.json'}")
+    print(f"- cProfile: {PROFILE_DIR / 'build.pstats'} (python3 -m pstats)")
+
+
+class BuildGraph:
+    """Estado en memoria para --watch.
+
+    Parte del manifiesto y la caché que deja run_build() y guarda, por fuente, su firma de
+    stat, su tarjeta, sus términos de búsqueda y sus lecturas relacionadas. En cada ciclo
+    solo se vuelve a leer lo que cambió y solo se reescriben el artículo afectado, los que
+    cambian de lecturas relacionadas y los listados cuyas tarjetas cambian.
+    """
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        manifest = load_manifest()
+        self.generator = str(manifest.get("generator", ""))
+        self.shell_hash = str(manifest.get("shell", ""))
+        self.options = str(manifest.get("options", ""))
+        self.shell = ShellOptions.from_args(args)
+        self.shell_assets = [rel_path for rel_path, _ in page_shell("", self.shell).assets]
+        self.fingerprints: Dict[str, str] = dict(manifest.get("fingerprints", {}))  # type: ignore[arg-type]
+        self.cache = build_cache.PostCache(self.generator)
+        self.sources: Dict[str, Dict[str, object]] = dict(self.cache.sources)
+        self.related = RelatedIndex(**self.cache.corpus)  # type: ignore[arg-type]
+        for name, entry in self.sources.items():
+            if not entry.get("draft"):
+                self.related.keep(name, entry)
+        self.index_key = str(manifest.get("index", ""))
+        self.search_files: List[str] = list(manifest.get("search_files", []))  # type: ignore[arg-type]
+        self.registry = post_registry.PostRegistry.load()
+        self.stats = {path.name: self.stat_key(path) for path in CONTENT_DIR.glob("*.md")}
+        self.shell_stat = self.template_stats()
+        self.image_stats = {image: self.stat_key(ROOT / image) for image in self.images()}
+        self.listing_signatures = {page.rel_path: self.signature(page) for page in self.listing_pages(self.posts())}
+        self.tags = {p.tag for p in self.posts()}
+        self.post_latency_ms = 0.0
+        # Fuentes cuyo último render falló: su registro en caché es el anterior.
+        self.failed: Set[str] = set()
+
+    stat_key = staticmethod(build_cache.stat_key)
+
+    def template_stats(self) -> Tuple[object, ...]:
+        return self.stat_key(INDEX_PATH), self.stat_key(POST_TEMPLATE_PATH)
+
+    def posts(self) -> List[Card]:
+        posts = [card_from_meta(e["post"]) for e in self.sources.values() if not e.get("draft")]  # type: ignore[arg-type]
+        return sorted(posts, key=lambda p: (p.date_iso, p.slug), reverse=True)
+
+    def images(self) -> List[str]:
+        images = {image for e in self.sources.values() if not e.get("draft") for image in entry_images(e)}
+        return sorted(image for image in images if image_digest(image))
+
+    def listing_pages(self, posts_sorted: List[Card]) -> List[ListingPage]:
+        views, _ = popularity.load_views({p.slug for p in posts_sorted})
+        popular = popular_posts(posts_sorted, views)
+        self.popular_key = cards_key(list(popular))
+        return plan_listing_pages(posts_sorted, self.args.page_size, popular)
+
+    @staticmethod
+    def signature(page: ListingPage) -> Tuple[object, ...]:
+        cards = (tuple(tuple(card_fields(p)) for p in posts) for posts in (page.posts, page.popular))
+        return (page.number, page.total, *cards)
+
+    def write_fingerprinted(self, page_html: str) -> List[str]:
+        """Escribe las copias con hash nuevas que referencia una página y actualiza el manifiesto de assets."""
+        if not self.args.fingerprint:
+            return []
+        new = {o: f for o, f in page_fingerprints(page_html).items() if self.fingerprints.get(o) != f}
+        if not new:
+            return []
+        for original, fingerprinted in new.items():
+            if not (ROOT / fingerprinted).exists():
+                write_atomic(ROOT / fingerprinted, (ROOT / original).read_bytes())
+        self.fingerprints.update(new)
+        text = json.dumps(self.fingerprints, ensure_ascii=False, indent=2, sort_keys=True) + "\n"
+        write_output(ASSET_MANIFEST_PATH, text, self.args)
+        return sorted(new.values())
+
+    def poll(self) -> Tuple[List[str], bool, List[str]]:
+        """Devuelve (fuentes .md cambiadas o borradas, cambió index.html o post.html, imágenes cambiadas)."""
+        current = {path.name: self.stat_key(path) for path in CONTENT_DIR.glob("*.md")}
+        changed = sorted(name for name in current.keys() | self.stats.keys() if current.get(name) != self.stats.get(name))
+        self.stats = current
+        shell_stat = self.template_stats()
+        shell_changed = shell_stat != self.shell_stat
+        self.shell_stat = shell_stat
+        images: List[str] = []
+        for image, key in list(self.image_stats.items()):
+            new_key = self.stat_key(ROOT / image)
+            if new_key != key:
+                self.image_stats[image] = new_key
+                images.append(image)
+        return changed, shell_changed, images
+
+    def update(self) -> List[str]:
+        start = time.perf_counter()
+        changed, shell_changed, images = self.poll()
+        if not changed and not shell_changed and not images:
+            return []
+
+        written: List[str] = []
+        if shell_changed:
+            page_shell.cache_clear()
+            post_template.cache_clear()
+            shell_hash = templates_hash()
+            if shell_hash == self.shell_hash:
+                shell_changed = False
+            self.shell_hash = shell_hash
+        if shell_changed:
+            assets = page_shell("", self.shell).assets
+            for rel_path, text in assets:
+                if write_output(ROOT / rel_path, text, self.args):
+                    written.append(rel_path)
+            for rel_path in set(self.shell_assets) - {rel_path for rel_path, _ in assets}:
+                if remove_output(ROOT / rel_path):
+                    written.append(rel_path)
+            self.shell_assets = [rel_path for rel_path, _ in assets]
+        if images:
+            image_digest.cache_clear()
+            asset_fingerprint.cache_clear()
+            responsive_image.cache_clear()
+
+        # Artículos a re-renderizar: los .md modificados, los que usan una imagen
+        # modificada y, si cambió la plantilla base, todos.
+        dirty = set(changed)
+        changed_images = set(images)
+        for name, entry in self.sources.items():
+            if entry.get("draft"):
+                continue
+            if shell_changed or not changed_images.isdisjoint(entry_images(entry)):
+                dirty.add(name)
+
+        # Primera pasada: tarjeta, términos y frecuencias de cada fuente afectada.
+        analyzed: Dict[str, Dict[str, int]] = {}
+        removed: Set[str] = set()
+        old_slugs: Set[str] = set()
+        for name in sorted(dirty):
+            md_path = CONTENT_DIR / name
+            old = self.sources.pop(name, None)
+            old_live = old is not None and not old.get("draft")
+            if not md_path.exists():
+                if old_live:
+                    self.related.count(old["search"], -1)  # type: ignore[index,arg-type]
+                    removed.add(name)
+                    old_slugs.add(old["post"]["slug"])  # type: ignore[index]
+                continue
+            try:
+                result = analyze_source(md_path)
+            except (OSError, ValueError) as e:
+                print(f"  ! {e}")
+                if old:
+                    self.sources[name] = old
+                self.failed.add(name)
+                continue
+            self.failed.discard(name)
+            if result is not None and any(
+                other != name and not e.get("draft") and e["post"]["slug"] == result[0].slug  # type: ignore[index]
+                for other, e in self.sources.items()
+            ):
+                print(f"  ! {md_path}: slug duplicado '{result[0].slug}' (ya lo usa otro artículo)")
+                if old:
+                    self.sources[name] = old
+                self.failed.add(name)
+                continue
+            digest = content_hash(md_path.read_bytes())
+            if old_live:
+                self.related.count(old["search"], -1)  # type: ignore[index,arg-type]
+                old_slugs.add(old["post"]["slug"])  # type: ignore[index]
+            if result is None:
+                self.sources[name] = {"hash": digest, "draft": True}
+                if old_live:
+                    removed.add(name)
+                continue
+            card, terms, counts, images = result
+            self.sources[name] = source_entry(digest, card, terms, images)
+            self.related.count(terms, 1)
+            analyzed[name] = counts
+            for image in (card.image, *images):
+                self.image_stats.setdefault(image, self.stat_key(ROOT / image))
+
+        # Lecturas relacionadas de los afectados y render de los que cambian de página.
+        for name, counts in analyzed.items():
+            self.related.vectors[name] = self.related.vectorize(counts)
+        requeried = self.related.update(set(analyzed), removed, full=False)
+        cards = {name: card_from_meta(e["post"]) for name, e in self.sources.items() if not e.get("draft")}  # type: ignore[arg-type]
+        for name in sorted(analyzed.keys() | requeried):
+            related = tuple(cards[other] for other in self.related.related.get(name, []))
+            key = related_key(related)
+            entry = self.sources[name]
+            if name in analyzed or entry.get("related_key") != key:
+                try:
+                    rendered = render_source(CONTENT_DIR / name, related, shell=self.shell)
+                except (OSError, ValueError) as e:
+                    print(f"  ! {e}")
+                    continue
+                if rendered is not None:
+                    card, out_html = rendered
+                    rel_path = rel_output(POSTS_OUT_DIR / f"{card.slug}.html")
+                    written += self.write_fingerprinted(out_html)
+                    if write_output(ROOT / rel_path, out_html, self.args):
+                        written.append(rel_path)
+            self.sources[name] = {
+                **entry,
+                "vector": self.related.vectors[name],
+                "related": self.related.related.get(name, []),
+                "related_key": key,
+            }
+
+        live_slugs = {card.slug for card in cards.values()}
+        for old_slug in sorted(old_slugs - live_slugs):
+            stale = POSTS_OUT_DIR / f"{old_slug}.html"
+            if remove_output(stale):
+                written.append(rel_output(stale))
+
+        self.post_latency_ms = (time.perf_counter() - start) * 1000
+
+        # Solo los listados cuya lista de tarjetas cambió (todos si cambia la lista de tags).
+        posts_sorted = self.posts()
+        pages = self.listing_pages(posts_sorted)
+        tags = sorted({p.tag for p in posts_sorted})
+        signatures = {page.rel_path: self.signature(page) for page in pages}
+        tags_changed = set(tags) != self.tags
+        self.tags = set(tags)
+        for page in pages:
+            if shell_changed or tags_changed or self.listing_signatures.get(page.rel_path) != signatures[page.rel_path]:
+                out_path = ROOT / page.rel_path
+                out_path.parent.mkdir(parents=True, exist_ok=True)
+                page_html = render_listing_page(page, tags, self.shell)
+                written += self.write_fingerprinted(page_html)
+                if write_output(out_path, page_html, self.args):
+                    written.append(page.rel_path)
+        for rel_path in self.listing_signatures.keys() - signatures.keys():
+            if remove_output(ROOT / rel_path):
+                written.append(rel_path)
+        self.listing_signatures = signatures
+
+        terms_by_slug = {
+            e["post"]["slug"]: e["search"] for e in self.sources.values() if not e.get("draft")  # type: ignore[index]
+        }
+        # Los artículos nuevos reciben aquí su id de búsqueda; el registro se guarda para que el
+        # siguiente build les dé el mismo.
+        for name, e in self.sources.items():
+            slug = None if e.get("draft") else e["post"]["slug"]  # type: ignore[index]
+            if slug is not None and self.registry.posts.get(slug) != name:
+                self.registry.register(slug, name, self.registry.docs.get(slug))
+        search_files = build_search_index(posts_sorted, terms_by_slug, search_doc_ids(self.registry, posts_sorted))
+        self.registry.save()
+        for rel_path, text in search_files.items():
+            out_path = ROOT / rel_path
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            if write_output(out_path, text, self.args):
+                written.append(rel_path)
+        for rel_path in set(self.search_files) - search_files.keys():
+            remove_output(ROOT / rel_path)
+        self.search_files = sorted(search_files)
+
+        # Se mantiene el manifiesto al día para que el siguiente build normal siga siendo incremental.
+        self.index_key = f"{self.args.page_size}:{cards_key(posts_sorted)}"
+        save_manifest(
+            {
+                "version": MANIFEST_VERSION,
+                "generator": self.generator,
+                "shell": self.shell_hash,
+                "options": self.options,
+                "fingerprints": self.fingerprints,
+                "index": self.index_key,
+                "popular": self.popular_key,
+                "outputs": sorted(
+                    {rel_output(POSTS_OUT_DIR / f"{p.slug}.html") for p in posts_sorted}
+                    | set(signatures)
+                    | set(self.search_files)
+                    | set(self.shell_assets)
+                    | set(self.fingerprints.values())
+                    | ({rel_output(ASSET_MANIFEST_PATH)} if self.args.fingerprint else set())
+                ),
+                "search_files": self.search_files,
+            }
+        )
+        self.cache.corpus = self.related.corpus
+        # Sin sello: el siguiente build normal comprueba el árbol completo una vez. Las fuentes
+        # que fallaron se guardan sin firma de stat para que ese build las vuelva a leer.
+        self.cache.save(self.sources, {name: key for name, key in self.stats.items() if key and name not in self.failed})
+        return written
+
+
+def run_watch(args: argparse.Namespace) -> None:
+    # Un ciclo debe tardar milisegundos y brotli a calidad 11 cuesta cientos por página: mientras
+    # se vigila no se precomprime. Las salidas que cambian pierden sus .gz/.br (nunca se sirve uno
+    # viejo) y el siguiente build con --precompress, al ver otras opciones, los regenera todos.
+    if args.precompress:
+        print("--watch no precomprime: los .gz/.br se regeneran en el siguiente build con --precompress.")
+    args.precompress = False
+    run_build(args)
+    graph = BuildGraph(args)
+    print(f"Vigilando {CONTENT_DIR}, {INDEX_PATH.name}, {POST_TEMPLATE_PATH.name} e imágenes (Ctrl+C para salir)…")
+    try:
+        while True:
+            time.sleep(args.interval)
+            start = time.perf_counter()
+            written = graph.update()
+            if written:
+                elapsed = (time.perf_counter() - start) * 1000
+                print(
+                    f"[{time.strftime('%H:%M:%S')}] {len(written)} salidas en {elapsed:.1f} ms "
+                    f"(artículos listos en {graph.post_latency_ms:.1f} ms)"
+                )
+                search_prefix = SEARCH_DIR.relative_to(ROOT).as_posix() + "/"
+                for rel_path in written:
+                    if not rel_path.startswith(search_prefix):
+                        print(f"  - {rel_path}")
+                search_count = sum(rel_path.startswith(search_prefix) for rel_path in written)
+                if search_count:
+                    print(f"  - {search_count} ficheros del índice de búsqueda")
+    except KeyboardInterrupt:
+        print("")
+
+
+class PreviewSite:
+    """Páginas del blog renderizadas en memoria para build.py serve.
+
+    Los artículos y los listados se renderizan al pedirlos, con read_post, render_post_content
+    y build_page, y se guardan en una LRU de PREVIEW_CACHE_PAGES páginas. Cada página guarda la
+    firma de stat de lo que usó (su .md, las plantillas, las imágenes y los .md de sus lecturas
+    relacionadas): si ninguna cambia, se sirve tal cual. Las tarjetas y las lecturas
+    relacionadas de las fuentes sin cambios salen de la caché del último build. No se escribe
+    nada: el resto del sitio (CSS, imágenes, índice de búsqueda) se sirve del disco.
+    """
+
+    def __init__(self, drafts: bool = False, page_size: int = DEFAULT_PAGE_SIZE, cache_pages: int = PREVIEW_CACHE_PAGES) -> None:
+        self.drafts = drafts
+        self.page_size = page_size
+        self.cache_pages = cache_pages
+        self.cache = build_cache.PostCache(generator_version())
+        self.related = RelatedIndex(**self.cache.corpus)  # type: ignore[arg-type]
+        for name, entry in self.cache.sources.items():
+            if "vector" in entry:
+                self.related.keep(name, entry)
+        self.related.build_postings()
+        self.routes = {route: target for route, target in read_server_routes(SERVER_PATH).items() if target}
+        self.stats: Dict[str, Tuple[int, int]] = {}
+        self.cards: Dict[str, Card] = {}
+        self.by_slug: Dict[str, str] = {}
+        self.listings: Dict[str, ListingPage] = {}
+        self.generation = 0
+        self.scanned = -math.inf
+        self.template_key = self.template_stats()
+        self.image_stats: Dict[str, Tuple[int, int] | None] = {}
+        # rel_path → (generación de los listados o None, ((ruta, firma de stat), ...), bytes)
+        self.pages: OrderedDict[str, Tuple[int | None, Tuple[Tuple[Path, object], ...], bytes]] = OrderedDict()
+        self.refresh(force=True)
+
+    stat_key = staticmethod(build_cache.stat_key)
+
+    def template_stats(self) -> Tuple[object, ...]:
+        return self.stat_key(INDEX_PATH), self.stat_key(POST_TEMPLATE_PATH)
+
+    def refresh(self, force: bool = False) -> None:
+        """Vuelve a leer las fuentes añadidas, modificadas o borradas (como mucho cada PREVIEW_SCAN_INTERVAL s)."""
+        now = time.monotonic()
+        if not force and now - self.scanned < PREVIEW_SCAN_INTERVAL:
+            return
+        self.scanned = now
+        stats: Dict[str, Tuple[int, int]] = {}
+        with os.scandir(CONTENT_DIR) as entries:
+            for entry in entries:
+                if entry.name.endswith(".md"):
+                    st = entry.stat()
+                    stats[entry.name] = (st.st_mtime_ns, st.st_size)
+        if stats == self.stats:
+            return
+        for name in self.stats.keys() - stats.keys():
+            self.cards.pop(name, None)
+        for name, stat in stats.items():
+            if self.stats.get(name) == stat:
+                continue
+            self.cards.pop(name, None)
+            entry = self.cache.sources.get(name)
+            if entry is not None and self.cache.stats.get(name) == stat and (not self.drafts or "post" in entry):
+                if "post" in entry:
+                    self.cards[name] = card_from_meta(entry["post"])
+                continue
+            try:
+                post = load_post(CONTENT_DIR / name, drafts=self.drafts)
+            except (OSError, ValueError) as e:
+                print(f"  ! {e}")
+                continue
+            if post is not None:
+                self.cards[name] = Card.from_post(post)
+        self.stats = stats
+        self.by_slug = {card.slug: name for name, card in sorted(self.cards.items())}
+        posts_sorted = sorted(self.cards.values(), key=lambda p: (p.date_iso, p.slug), reverse=True)
+        self.listings = {page.rel_path: page for page in plan_listing_pages(posts_sorted, self.page_size)}
+        self.generation += 1
+
+    def sync_caches(self) -> None:
+        """Vacía las cachés de plantillas e imágenes del generador si cambió alguna desde el último render."""
+        template_key = self.template_stats()
+        if template_key != self.template_key:
+            self.template_key = template_key
+            page_shell.cache_clear()
+            post_template.cache_clear()
+        images = {image: self.stat_key(ROOT / image) for image in self.image_stats}
+        if images != self.image_stats:
+            self.image_stats = images
+            image_digest.cache_clear()
+            asset_fingerprint.cache_clear()
+            responsive_image.cache_clear()
+
+    def related_for(self, name: str, post: Post) -> Tuple[Card, ...]:
+        """Lecturas relacionadas: las del último build si la fuente no ha cambiado; si no, con el corpus de entonces."""
+        entry = self.cache.sources.get(name)
+        if entry is not None and "related" in entry and self.cache.stats.get(name) == self.stats.get(name):
+            names = list(entry["related"])
+        else:
+            _, counts = search_terms(post)
+            # Un borrador o un artículo nuevo no suma en la frecuencia documental del último build.
+            counted = entry is not None and "search" in entry
+            self.related.vectors[name] = self.related.vectorize(counts, counted)
+            names = self.related.nearest(name, RELATED_RECHECK)
+        return tuple(self.cards[other] for other in names if other in self.cards and other != name)[:RELATED_COUNT]
+
+    def deps(self, paths: Sequence[Path]) -> Tuple[Tuple[Path, object], ...]:
+        return tuple((path, self.stat_key(path)) for path in (INDEX_PATH, POST_TEMPLATE_PATH, *paths))
+
+    def render(self, rel_path: str) -> Tuple[int | None, Tuple[Tuple[Path, object], ...], str] | None:
+        self.refresh(force=True)
+        self.sync_caches()
+        listing = self.listings.get(rel_path)
+        if listing is not None:
+            tags = sorted({p.tag for p in self.cards.values()})
+            for card in listing.posts:
+                self.image_stats.setdefault(card.image, self.stat_key(ROOT / card.image))
+            images = [ROOT / card.image for card in listing.posts]
+            return self.generation, self.deps(images), render_listing_page(listing, tags)
+        slug = rel_path[len("blog/posts/") : -len(".html")] if rel_path.startswith("blog/posts/") else ""
+        name = self.by_slug.get(slug)
+        if name is None or not rel_path.endswith(".html"):
+            return None
+        md_path = CONTENT_DIR / name
+        post = load_post(md_path, drafts=self.drafts)
+        if post is None:
+            return None
+        related = self.related_for(name, post)
+        images = [post.image, *body_images(post.body_md)]
+        for image in images:
+            self.image_stats.setdefault(image, self.stat_key(ROOT / image))
+        content_html = render_post_content(post, asset_prefix="../../", related=related)
+        page_html = build_page(content_html, path_prefix="../../", head_html=post_hints(post, related, "../../"))
+        paths = [md_path, *(ROOT / image for image in images), *(CONTENT_DIR / self.by_slug[card.slug] for card in related)]
+        return None, self.deps(paths), page_html
+
+    def page(self, rel_path: str) -> Tuple[bytes | None, bool]:
+        """HTML de un artículo o un listado y si salió de la caché; (None, False) si la ruta no es del blog."""
+        if not rel_path.startswith("blog/posts/"):
+            self.refresh()
+        cached = self.pages.get(rel_path)
+        if cached is not None:
+            generation, deps, body = cached
+            if (generation is None or generation == self.generation) and all(
+                self.stat_key(path) == key for path, key in deps
+            ):
+                self.pages.move_to_end(rel_path)
+                return body, True
+            del self.pages[rel_path]
+        rendered = self.render(rel_path)
+        if rendered is None:
+            return None, False
+        generation, deps, page_html = rendered
+        body = page_html.encode("utf-8")
+        self.pages[rel_path] = (generation, deps, body)
+        while len(self.pages) > self.cache_pages:
+            self.pages.popitem(last=False)
+        return body, False
+
+    def respond(self, method: str, target: str) -> Tuple[int, str, bytes, str]:
+        """(estado, Content-Type, cuerpo, Server-Timing) de una petición."""
+        start = time.perf_counter()
+        if method == "POST":
+            # El script de visitas de los artículos: la vista previa no cuenta visitas.
+            return 204, "text/plain", b"", ""
+        if method not in ("GET", "HEAD"):
+            return 405, "text/plain; charset=utf-8", b"Method Not Allowed\n", ""
+        rel_path = link_check.resolve(target, "")
+        if rel_path is None or any(part.startswith(".") or part in link_check.SKIP_DIRS for part in rel_path.split("/")):
+            return 404, "text/plain; charset=utf-8", b"Not Found\n", ""
+        rel_path = self.routes.get(rel_path.rstrip("/"), rel_path)
+        try:
+            body, hit = self.page(rel_path)
+        except (OSError, ValueError) as e:
+            print(f"  ! {e}")
+            error = f"<!doctype html><meta charset=\"utf-8\"><pre>{html.escape(str(e))}</pre>\n"
+            return 500, "text/html; charset=utf-8", error.encode("utf-8"), ""
+        if body is not None:
+            elapsed = (time.perf_counter() - start) * 1000
+            return 200, "text/html; charset=utf-8", body, f"{'cache' if hit else 'render'};dur={elapsed:.3f}"
+        path = ROOT / rel_path
+        try:
+            data = path.read_bytes()
+        except OSError:  # También los directorios: express.static no los lista.
+            return 404, "text/plain; charset=utf-8", b"Not Found\n", ""
+        content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type in ("application/javascript", "application/json"):
+            content_type += "; charset=utf-8"
+        return 200, content_type, data, ""
+
+
+HTTP_REASONS = {200: "OK", 204: "No Content", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+async def serve_connection(site: PreviewSite, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Una conexión HTTP/1.1 con keep-alive: GET/HEAD (y el POST de las visitas, que se descarta)."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            headers: Dict[str, str] = {}
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            parts = request_line.decode("latin-1").split()
+            if len(parts) != 3:
+                status, content_type, body, timing = 400, "text/plain; charset=utf-8", b"Bad Request\n", ""
+                method, keep_alive = "GET", False
+            else:
+                method, target, version = parts
+                length = int(headers.get("content-length", "0") or 0)
+                if length:
+                    await reader.readexactly(length)
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                status, content_type, body, timing = site.respond(method, target)
+            head = [
+                f"HTTP/1.1 {status} {HTTP_REASONS[status]}",
+                f"Content-Type: {content_type}",
+                f"Content-Length: {len(body)}",
+                "Cache-Control: no-cache",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}",
+            ]
+            if timing:
+                head.append(f"Server-Timing: {timing}")
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + (b"" if method == "HEAD" else body))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_forever(site: PreviewSite, host: str, port: int) -> None:
+    server = await asyncio.start_server(functools.partial(serve_connection, site), host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def run_serve(args: argparse.Namespace) -> None:
+    global ENCODE_DERIVATIVES
+    if not CONTENT_DIR.exists():
+        raise SystemExit(f"No existe {CONTENT_DIR}")
+    ENCODE_DERIVATIVES = False
+    site = PreviewSite(drafts=args.drafts, page_size=args.page_size, cache_pages=args.cache_pages)
+    drafts = " (con borradores)" if args.drafts else ""
+    print(f"Vista previa{drafts} en http://{args.host}:{args.port}/blog (Ctrl+C para salir)…")
+    try:
+        asyncio.run(serve_forever(site, args.host, args.port))
+    except KeyboardInterrupt:
+        print("")
+
+
+def serve_main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="build.py serve",
+        description="Vista previa local del blog: renderiza artículos y listados en memoria desde los .md, sin escribir nada.",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="dirección en la que escuchar (por defecto 127.0.0.1)")
+    parser.add_argument(
+        "--port", type=int, default=PREVIEW_PORT, help=f"puerto en el que escuchar (por defecto {PREVIEW_PORT})"
+    )
+    parser.add_argument(
+        "--drafts",
+        action="store_true",
+        help="incluye los borradores (draft: true) en los listados y en /blog/posts/<slug>.html",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=DEFAULT_PAGE_SIZE,
+        metavar="N",
+        help=f"artículos por página en blog.html y en los listados por tag (por defecto {DEFAULT_PAGE_SIZE})",
+    )
+    parser.add_argument(
+        "--cache-pages",
+        type=int,
+        default=PREVIEW_CACHE_PAGES,
+        metavar="N",
+        help=f"páginas renderizadas que se guardan en memoria (por defecto {PREVIEW_CACHE_PAGES})",
+    )
+    args = parser.parse_args(argv)
+    if args.page_size < 1:
+        parser.error("--page-size debe ser >= 1")
+    if args.cache_pages < 1:
+        parser.error("--cache-pages debe ser >= 1")
+    run_serve(args)
+
+
+def main(argv: List[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["serve"]:
+        serve_main(argv[1:])
+        return
+    parser = argparse.ArgumentParser(
+        description="Genera los artículos del blog y actualiza blog.html. Con 'serve', vista previa local en memoria."
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="regenera todos los artículos ignorando el manifiesto de build",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=os.cpu_count() or 1,
+        metavar="N",
+        help="procesos para renderizar artículos (por defecto, número de CPUs)",
+    )
+    parser.add_argument(
+        "--changes",
+        type=Path,
+        default=CHANGES_PATH,
+        metavar="PATH",
+        help="JSON con las salidas añadidas, modificadas y eliminadas (por defecto, blog/.build-changes.json)",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=DEFAULT_PAGE_SIZE,
+        metavar="N",
+        help=f"artículos por página en blog.html y en los listados por tag (por defecto {DEFAULT_PAGE_SIZE})",
+    )
+    parser.add_argument(
+        "--minify",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="minifica el HTML generado respetando <pre>, scripts y JSON-LD (por defecto, sí)",
+    )
+    parser.add_argument(
+        "--precompress",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="escribe .gz (y .br si está instalado brotli) junto a cada HTML/JSON generado; para el build de "
+        "despliegue (por defecto, no)",
+    )
+    parser.add_argument(
+        "--shell-assets",
+        choices=SHELL_ASSET_MODES,
+        default="inline",
+        help="inline: copia el <style>/<script> de index.html en cada página; external: los saca a css/ y js/ "
+        "con hash en el nombre; critical: como external, dejando inline solo el CSS del principio de la página",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="copia los assets locales (CSS, JS, imágenes, favicons) con hash en el nombre, reescribe las URLs "
+        "de las páginas y guarda blog/asset-manifest.json",
+    )
+    parser.add_argument(
+        "--budget",
+        action="store_true",
+        help="tras el build, compara el peso de cada página y el tiempo por etapa con blog/budget.json y falla si "
+        "algo lo supera",
+    )
+    parser.add_argument(
+        "--update-budget",
+        action="store_true",
+        help="regenera blog/budget.json (peso de cada página y tiempo por etapa) con las medidas de este build; "
+        "implica --force",
+    )
+    parser.add_argument(
+        "--check-links",
+        action="store_true",
+        help="tras el build, comprueba que cada enlace y asset local de las páginas generadas existe (ficheros "
+        "del sitio o rutas de server.js); falla con la lista de los rotos",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="tras el build, vigila las fuentes y regenera solo lo afectado por cada cambio",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.25,
+        metavar="SEG",
+        help="intervalo de sondeo de --watch en segundos (por defecto 0.25)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="mide tiempos y bytes por etapa y por artículo (renderiza en serie) y guarda blog/.build-profile/",
+    )
+    args = parser.parse_args(argv)
+    # Argumentos tal cual, para el sello de la caché (la comprobación rápida no usa argparse).
+    args.argv = list(argv)
+    if args.jobs < 1:
+        parser.error("--jobs debe ser >= 1")
+    if args.page_size < 1:
+        parser.error("--page-size debe ser >= 1")
+    if args.update_budget:
+        # Los tiempos de la línea base son los de un build completo.
+        args.force = True
+
+    if args.profile:
+        # cProfile y los tiempos por artículo solo ven el proceso principal.
+        args.jobs = 1
+        run_profiled(args)
+    elif args.watch:
+        run_watch(args)
+    else:
+        run_build(args)
@@ -0,0 +1,113 @@
+"""Enlaces y assets rotos en las páginas generadas por blog/build.py (--check-links).
+
+Antes de mirar ningún enlace se construye una sola vez un índice en memoria: todos los
+ficheros que sirve express.static (el árbol del repositorio, sin ficheros ocultos ni
+node_modules) y las rutas GET literales de server.js (/diagnostico, /blog…). Las páginas se
+leen y se analizan en paralelo; cada URL local se resuelve como lo haría el navegador desde
+la página que la contiene y se busca en el índice, sin un stat por enlace.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+from urllib.parse import unquote
+import functools
+import html
+import os
+import posixpath
+import re
+
+from build_util import read_server_routes
+from build_util import report_lines as truncated_report
+
+
+ROOT = Path(__file__).resolve().parent.parent
+SERVER_PATH = ROOT / "server.js"
+# Directorios que no se indexan (los ficheros ocultos tampoco: express.static los ignora).
+SKIP_DIRS = frozenset({"node_modules"})
+
+# Primero las etiquetas y luego sus atributos: mucho más rápido que buscar atributos en todo el HTML.
+TAG_RE = re.compile(r"<[a-zA-Z][^>]*=[^>]*>")
+URL_ATTR_RE = re.compile(
+    r"""\s(href|src|srcset|imagesrcset|poster)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.I
+)
+CSS_URL_RE = re.compile(r"""url\(\s*["']?([^"')]+)""")
+# Con esquema (https:, mailto:, data:…) o sin él pero con dominio (//cdn…): no se comprueban.
+EXTERNAL_RE = re.compile(r"^(?:[a-z][a-z0-9+.-]*:|//)", re.I)
+
+
+class SiteIndex:
+    """Rutas relativas a la raíz (sin / inicial) que el servidor responde: ficheros y rutas de server.js."""
+
+    def __init__(self, files: Set[str], routes: Set[str]) -> None:
+        self.files = files
+        self.routes = routes
+
+    @classmethod
+    def scan(cls, root: Path = ROOT, server_path: Path = SERVER_PATH) -> SiteIndex:
+        files: Set[str] = set()
+        stack = [("", str(root))]
+        while stack:
+            prefix, directory = stack.pop()
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            stack.append((f"{prefix}{entry.name}/", entry.path))
+                    else:
+                        files.add(prefix + entry.name)
+        return cls(files, set(read_server_routes(server_path)))
+
+    def __contains__(self, key: str) -> bool:
+        # Express no distingue /blog de /blog/ en las rutas; express.static no sirve directorios.
+        return key in self.files or key.rstrip("/") in self.routes
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def resolve(url: str, page_dir: str) -> str | None:
+    """Ruta (relativa a la raíz) a la que apunta url desde una página en page_dir; None si no es local.
+
+    Los segmentos vacíos se conservan, como en el navegador: ../..//logo.png desde
+    blog/posts/ es //logo.png, que no es el logo de la raíz.
+    """
+    url = html.unescape(url.strip()).split("#", 1)[0].split("?", 1)[0]
+    if not url or EXTERNAL_RE.match(url):
+        return None
+    path = url if url.startswith("/") else f"/{page_dir}/{url}" if page_dir else f"/{url}"
+    segments: List[str] = []
+    for segment in unquote(path).split("/")[1:]:
+        if segment == "..":
+            if segments:
+                segments.pop()
+        elif segment != ".":
+            segments.append(segment)
+    return "/".join(segments)
+
+
+def page_refs(root: Path, rel_path: str) -> List[Tuple[str, str]]:
+    """(ruta resuelta, URL tal cual) de cada referencia local distinta de una página HTML o una hoja CSS."""
+    text = (root / rel_path).read_text(encoding="utf-8", errors="replace")
+    page_dir = posixpath.dirname(rel_path)
+    if rel_path.endswith(".css"):
+        urls = CSS_URL_RE.findall(text)
+    else:
+        urls = []
+        for tag in TAG_RE.findall(text):
+            for name, double, single, bare in URL_ATTR_RE.findall(tag):
+                value = double or single or bare
+                if name.lower().endswith("srcset"):
+                    urls.extend(candidate.split()[0] for candidate in value.split(",") if candidate.strip())
+                else:
+                    urls.append(value)
+    refs: Dict[str, str] = {}
+    for url in urls:
+        key = resolve(url, page_dir)
+        if key is not None and url not in refs:
+            refs[url] = key
+    return [(key, url) for url, key in refs.items()]
+
+
+def report_lines(broken: Dict[str, List[str]]) -> List[str]:
+    return truncated_report([f"  {rel_path}: {url}" for rel_path in sorted(broken) for url in broken[rel_path]])
@@ -7,6 +7,8 @@ import re
 import sys
 import unicodedata
 
+from post_registry import PostRegistry
+
 
 ROOT = Path(__file__).resolve().parent.parent
 CONTENT_DIR = ROOT / "blog" / "content" / "posts"
@@ -55,15 +57,14 @@ def main() -> None:
     image = sys.argv[2].strip() if len(sys.argv) >= 3 else "portada_facebook.png"
 
     CONTENT_DIR.mkdir(parents=True, exist_ok=True)
-    slug = slugify(title)
-
-    existing = sorted(CONTENT_DIR.glob(f"*{slug}.md"))
-    prefix = f"{len(list(CONTENT_DIR.glob('*.md'))) + 1:02d}"
-    filename = f"{prefix}-{slug}.md"
-    if existing:
-        filename = f"{prefix}-{slug}-v2.md"
+    # Prefijo y slug salen del registro (el mismo que mantiene build.py), sin recorrer el directorio.
+    registry = PostRegistry.load(content_dir=CONTENT_DIR)
+    _, slug = registry.allocate(slugify(title))
+    filename = f"{slug}.md"
 
     path = CONTENT_DIR / filename
+    if path.exists():
+        raise SystemExit(f"Ya existe {path}: ejecuta python3 blog/build.py para actualizar el registro.")
     today = date.today().isoformat()
 
     path.write_text(
@@ -102,9 +103,10 @@ def main() -> None:
         ),
         encoding="utf-8",
     )
+    registry.register(slug, filename)
+    registry.save()
 
     ensure_google_tag(ROOT / "index.html")
-    ensure_google_tag(ROOT / "blog" / "templates" / "post.html")
 
     print("OK")
     print(f"- Creado: {path}")
@@ -0,0 +1,216 @@
+"""Visitas por artículo para el bloque “Más leídos” de blog.html.
+
+Cada artículo envía al cargarse el evento blog_post_viewed (payload {"slug": ...}) a
+/api/events, y server.js lo añade a data/events.json o, con DATABASE_URL, a la tabla events.
+El log solo crece, así que build.py no lo vuelve a leer entero: guarda en
+blog/.build-popularity.json hasta dónde lo consumió y las visitas agregadas por día, y en cada
+build solo lee los eventos nuevos. Cuentan los últimos WINDOW_DAYS días.
+
+En el fichero, el punto de control es un byte. En la tabla no puede ser el id: los ids se
+reparten al insertar, no al confirmar, así que una fila con id menor puede hacerse visible
+después de leer otra con id mayor. Se usa el instante ts: lo anterior a ahora − SETTLE_INTERVAL
+se da por asentado y se agrega en la consulta; lo posterior se relee en cada build y se
+descuentan por id las filas ya sumadas.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Set, Tuple
+import codecs
+import hashlib
+import json
+import os
+
+from build_util import write_atomic
+
+try:
+    import psycopg
+except ImportError:  # psycopg es opcional: sin él, las visitas se leen de data/events.json.
+    psycopg = None
+
+
+ROOT = Path(__file__).resolve().parent.parent
+EVENTS_PATH = ROOT / "data" / "events.json"
+STATE_PATH = Path(__file__).resolve().parent / ".build-popularity.json"
+STATE_VERSION = 2
+VIEW_EVENT = "blog_post_viewed"
+WINDOW_DAYS = 90
+READ_CHUNK = 1 << 16
+# Bytes anteriores al punto de control que deben seguir iguales para continuar desde él.
+TAIL_BYTES = 256
+
+# Margen para que se confirmen las inserciones en curso (server.js inserta cada evento por separado).
+SETTLE_INTERVAL = "10 minutes"
+
+CUTOFF_SQL = "SELECT greatest(now() - %s::interval, %s::timestamptz)"
+SETTLED_SQL = """
+SELECT to_char(ts AT TIME ZONE 'UTC', 'YYYY-MM-DD'), payload->'payload'->>'slug', count(*)
+FROM events
+WHERE name = %s AND ts >= %s::timestamptz AND ts < %s::timestamptz AND id <> ALL(%s::bigint[])
+GROUP BY 1, 2
+"""
+RECENT_SQL = """
+SELECT id, to_char(ts AT TIME ZONE 'UTC', 'YYYY-MM-DD'), payload->'payload'->>'slug'
+FROM events
+WHERE name = %s AND ts >= %s::timestamptz
+"""
+
+
+def read_array(f: BinaryIO, state: Dict[str, int]) -> Iterator[object]:
+    """Elementos de un array JSON a partir del byte state["offset"], sin cargar el fichero entero.
+
+    Al terminar, state["offset"] apunta justo detrás del último elemento completo: el siguiente
+    elemento que añada server.js empieza con una coma a partir de ahí.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    f.seek(state["offset"])
+    buf = ""
+    while True:
+        chunk = f.read(READ_CHUNK)
+        buf += utf8.decode(chunk, final=not chunk)
+        pos = end = 0
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,[":
+                pos += 1
+            if pos >= len(buf) or buf[pos] == "]":
+                break
+            try:
+                item, pos = decoder.raw_decode(buf, pos)
+            except ValueError:
+                break  # Elemento incompleto: falta leer más.
+            end = pos
+            yield item
+        state["offset"] += len(buf[:end].encode("utf-8"))
+        buf = buf[end:]
+        if not chunk:
+            return
+
+
+class Popularity:
+    """Visitas por slug y día, con el punto hasta el que se ha consumido el log."""
+
+    def __init__(self, source: str, path: Path = STATE_PATH) -> None:
+        self.source = source
+        self.path = path
+        self.offset = 0
+        self.tail = ""
+        self.settled = "-infinity"
+        self.recent: List[int] = []
+        self.days: Dict[str, Dict[str, int]] = {}
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = None
+        if isinstance(data, dict) and data.get("version") == STATE_VERSION and data.get("source") == source:
+            self.offset = int(data["offset"])
+            self.tail = str(data["tail"])
+            self.settled = str(data["settled"])
+            self.recent = [int(i) for i in data["recent"]]
+            self.days = data["days"]
+
+    def add(self, day: str, slug: str, count: int = 1) -> None:
+        bucket = self.days.setdefault(day, {})
+        bucket[slug] = bucket.get(slug, 0) + count
+
+    def consume_file(self, events_path: Path, known: Set[str], since: str) -> int:
+        """Suma las visitas añadidas al log desde el último build. Devuelve cuántas eran nuevas."""
+        try:
+            f = open(events_path, "rb")
+        except OSError:
+            return 0
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            if self.offset and (size < self.offset or self.tail_digest(f, self.offset) != self.tail):
+                # El log ya no empieza igual (rotado o editado a mano): se vuelve a leer entero.
+                self.offset, self.days = 0, {}
+            state = {"offset": self.offset}
+            new = 0
+            for event in read_array(f, state):
+                if not isinstance(event, dict) or event.get("event_name") != VIEW_EVENT:
+                    continue
+                payload = event.get("payload")
+                slug = payload.get("slug") if isinstance(payload, dict) else None
+                day = str(event.get("timestamp", ""))[:10]
+                if slug in known and day >= since:
+                    self.add(day, slug)
+                    new += 1
+            self.offset = state["offset"]
+            self.tail = self.tail_digest(f, self.offset)
+        return new
+
+    def consume_postgres(self, url: str, known: Set[str], since: str) -> int:
+        """Igual que consume_file, pero con la tabla events.
+
+        Agrega en la consulta las filas de self.settled a ahora − SETTLE_INTERVAL que no estén en
+        self.recent, y lee una a una las posteriores, sumando solo las que no estaban en self.recent.
+        Las tres consultas van en la misma transacción, así que now() es el mismo en todas.
+        """
+        counted = set(self.recent)
+        rows = []
+        with psycopg.connect(url) as conn:
+            (cutoff,) = conn.execute(CUTOFF_SQL, (SETTLE_INTERVAL, self.settled)).fetchone()
+            cutoff = cutoff.isoformat()
+            rows += conn.execute(SETTLED_SQL, (VIEW_EVENT, self.settled, cutoff, self.recent)).fetchall()
+            recent = conn.execute(RECENT_SQL, (VIEW_EVENT, cutoff)).fetchall()
+        rows += [(day, slug, 1) for event_id, day, slug in recent if int(event_id) not in counted]
+        new = 0
+        for day, slug, count in rows:
+            if slug in known and day >= since:
+                self.add(day, slug, int(count))
+                new += int(count)
+        self.settled = cutoff
+        self.recent = sorted(int(event_id) for event_id, _, _ in recent)
+        return new
+
+    @staticmethod
+    def tail_digest(f: BinaryIO, offset: int) -> str:
+        f.seek(max(0, offset - TAIL_BYTES))
+        return hashlib.sha256(f.read(offset - max(0, offset - TAIL_BYTES))).hexdigest()[:16]
+
+    def views(self, since: str) -> Dict[str, int]:
+        """Visitas por slug desde since (YYYY-MM-DD); los días anteriores se descartan."""
+        self.days = {day: bucket for day, bucket in self.days.items() if day >= since}
+        totals: Dict[str, int] = {}
+        for bucket in self.days.values():
+            for slug, count in bucket.items():
+                totals[slug] = totals.get(slug, 0) + count
+        return totals
+
+    def save(self) -> None:
+        data = {
+            "version": STATE_VERSION,
+            "source": self.source,
+            "offset": self.offset,
+            "tail": self.tail,
+            "settled": self.settled,
+            "recent": self.recent,
+            "days": self.days,
+        }
+        write_atomic(self.path, (json.dumps(data, ensure_ascii=False, sort_keys=True) + "\n").encode("utf-8"))
+
+
+def database_url() -> str:
+    """DATABASE_URL si las visitas están en Postgres y psycopg está instalado (si no, cadena vacía)."""
+    return os.environ.get("DATABASE_URL", "") if psycopg is not None else ""
+
+
+def load_views(known: Set[str], events_path: Path = EVENTS_PATH, today: date | None = None) -> Tuple[Dict[str, int], str]:
+    """Visitas de los últimos WINDOW_DAYS días por slug (solo de known) y una línea para el resumen del build."""
+    since = ((today or date.today()) - timedelta(days=WINDOW_DAYS - 1)).isoformat()
+    url = database_url()
+    popularity = Popularity("postgres" if url else str(events_path))
+    if url:
+        try:
+            new = popularity.consume_postgres(url, known, since)
+        except psycopg.Error as e:
+            views = popularity.views(since)
+            return views, f"sin acceso a Postgres ({e.__class__.__name__}); se usan las visitas ya agregadas"
+        origin = "tabla events"
+    else:
+        new = popularity.consume_file(events_path, known, since)
+        origin = str(events_path)
+    views = popularity.views(since)
+    popularity.save()
+    return views, f"{sum(views.values())} visitas en {WINDOW_DAYS} días ({new} nuevas, {origin})"
@@ -0,0 +1,150 @@
+"""Registro de artículos del blog compartido por new_post.py y build.py.
+
+blog/content/registry.json asocia cada slug publicado con su fuente .md y su prefijo
+numérico, y guarda el siguiente prefijo libre. new_post.py asigna prefijo y slug con
+búsquedas en diccionarios, sin recorrer blog/content/posts/, y build.py lo usa para
+fallar en cuanto aparece un slug o un prefijo duplicado o una salida huérfana.
+
+También guarda el id de cada artículo en el índice de búsqueda (blog/search/): se asigna
+una vez, por orden de alta, y no se reutiliza, así que publicar un artículo solo cambia
+los ficheros del índice que contienen sus términos.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+import json
+import os
+import re
+
+from build_util import write_atomic
+
+
+REGISTRY_PATH = Path(__file__).resolve().parent / "content" / "registry.json"
+REGISTRY_VERSION = 1
+PREFIX_RE = re.compile(r"^(\d+)-")
+
+
+def source_prefix(source: str) -> int | None:
+    """Prefijo numérico del nombre de la fuente (06-titulo.md → 6), si lo tiene."""
+    match = PREFIX_RE.match(source)
+    return int(match.group(1)) if match else None
+
+
+class PostRegistry:
+    """slug → (fuente .md, prefijo, id de búsqueda), con índices inversos por fuente y por prefijo."""
+
+    def __init__(
+        self,
+        posts: Dict[str, str] | None = None,
+        next_prefix: int = 1,
+        path: Path = REGISTRY_PATH,
+        docs: Dict[str, int] | None = None,
+        next_doc: int = 0,
+    ) -> None:
+        self.path = path
+        self.next_prefix = next_prefix
+        self.next_doc = next_doc
+        self.posts: Dict[str, str] = {}
+        self.by_source: Dict[str, str] = {}
+        self.by_prefix: Dict[int, str] = {}
+        self.docs: Dict[str, int] = {}
+        for slug, source in (posts or {}).items():
+            self.register(slug, source, (docs or {}).get(slug))
+
+    @classmethod
+    def load(cls, path: Path = REGISTRY_PATH, content_dir: Path | None = None) -> PostRegistry:
+        """Lee el registro. Si no existe y se indica content_dir, lo deduce una vez de los nombres de fichero."""
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = None
+        if isinstance(data, dict) and data.get("version") == REGISTRY_VERSION:
+            entries = data.get("posts", {})
+            posts = {slug: entry["source"] for slug, entry in entries.items()}
+            docs = {slug: int(entry["doc"]) for slug, entry in entries.items() if entry.get("doc") is not None}
+            return cls(posts, int(data.get("next_prefix", 1)), path, docs, int(data.get("next_doc", 0)))
+        registry = cls(path=path)
+        if content_dir is not None and content_dir.exists():
+            with os.scandir(content_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".md"):
+                        registry.register(entry.name[:-3], entry.name)
+        return registry
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def register(self, slug: str, source: str, doc: int | None = None) -> None:
+        self.release(self.by_source.get(source, ""))
+        self.release(slug)
+        self.posts[slug] = source
+        self.by_source[source] = slug
+        if doc is not None:
+            self.docs[slug] = doc
+            self.next_doc = max(self.next_doc, doc + 1)
+        prefix = source_prefix(source)
+        if prefix is not None:
+            self.by_prefix[prefix] = source
+            self.next_prefix = max(self.next_prefix, prefix + 1)
+
+    def release(self, slug: str) -> None:
+        source = self.posts.pop(slug, None)
+        if source is None:
+            return
+        self.by_source.pop(source, None)
+        self.docs.pop(slug, None)
+        prefix = source_prefix(source)
+        if prefix is not None and self.by_prefix.get(prefix) == source:
+            del self.by_prefix[prefix]
+
+    def allocate(self, title_slug: str) -> Tuple[int, str]:
+        """Siguiente prefijo libre y slug único para un artículo nuevo (06 → 07-titulo, 07-titulo-2…)."""
+        prefix = self.next_prefix
+        while prefix in self.by_prefix:
+            prefix += 1
+        slug = f"{prefix:02d}-{title_slug}"
+        n = 2
+        while slug in self.posts:
+            slug = f"{prefix:02d}-{title_slug}-{n}"
+            n += 1
+        return prefix, slug
+
+    def doc_id(self, slug: str) -> int:
+        """Id de búsqueda de un slug registrado; si aún no tiene, el siguiente (los ids no se reutilizan)."""
+        doc = self.docs.get(slug)
+        if doc is None:
+            doc = self.docs[slug] = self.next_doc
+            self.next_doc += 1
+        return doc
+
+    def to_json(self) -> str:
+        posts: Dict[str, Dict[str, object]] = {}
+        for slug, source in sorted(self.posts.items()):
+            posts[slug] = {"prefix": source_prefix(source), "source": source}
+            if slug in self.docs:
+                posts[slug]["doc"] = self.docs[slug]
+        data = {"version": REGISTRY_VERSION, "next_prefix": self.next_prefix, "next_doc": self.next_doc, "posts": posts}
+        return json.dumps(data, ensure_ascii=False, indent=2) + "\n"
+
+    def save(self) -> bool:
+        """Escribe el registro solo si cambia. Devuelve True si lo ha escrito."""
+        text = self.to_json()
+        try:
+            if self.path.read_text(encoding="utf-8") == text:
+                return False
+        except OSError:
+            pass
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.path, text.encode("utf-8"))
+        return True
+
+
+def duplicate_prefixes(sources: Iterable[str]) -> Dict[int, Tuple[str, ...]]:
+    """Prefijos numéricos usados por más de una fuente."""
+    seen: Dict[int, Tuple[str, ...]] = {}
+    for source in sources:
+        prefix = source_prefix(source)
+        if prefix is not None:
+            seen[prefix] = seen.get(prefix, ()) + (source,)
+    return {prefix: names for prefix, names in seen.items() if len(names) > 1}
@@ -0,0 +1,110 @@
+"""Análisis del cuerpo de un artículo (analyze_post / PostAnalysis) y lo que read_post deriva de él."""
+from __future__ import annotations
+
+from pathlib import Path
+from unittest import mock
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import generator  # noqa: E402
+
+BODY = """# Persianas que nadie revisa
+
+Una persiana **bajada** no es una barrera.
+Es una [rutina](/rutinas) que se ve desde la calle.
+
+![Persiana de un bajo](./img/persiana.png)
+
+## Qué mirar
+
+- Cierre
+- Guías
+![Otra](img/otra.png)
+
+👉 No es una conclusión: no empieza la línea.
+👉 Revisar el _riesgo real_ antes de comprar.
+"""
+
+
+class AnalyzePostTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.analysis = generator.analyze_body(BODY)
+
+    def test_title_is_removed_once(self) -> None:
+        self.assertEqual(self.analysis.title, "Persianas que nadie revisa")
+        self.assertTrue(self.analysis.without_title(BODY).startswith("Una persiana"))
+        self.assertEqual(generator.analyze_body("Sin título.").without_title("Sin título."), "Sin título.")
+
+    def test_word_count(self) -> None:
+        body = self.analysis.without_title(BODY)
+        self.assertEqual(self.analysis.words, len(generator.strip_md(body).split()))
+        # Las imágenes cuentan por su alt y los enlaces por su texto, no por la URL.
+        self.assertEqual(generator.analyze_body("Ver [la guía](/guia-de-cierres) y ![dos palabras](x.png)").words, 6)
+        self.assertEqual(generator.analyze_body("").words, 0)
+
+    def test_first_image(self) -> None:
+        self.assertEqual(self.analysis.image, ("img/persiana.png", "Persiana de un bajo"))
+        self.assertIsNone(generator.analyze_body("# Solo texto\n\nNada más.").image)
+
+    def test_paragraph_and_conclusion(self) -> None:
+        self.assertTrue(self.analysis.has_paragraph)
+        self.assertEqual(
+            self.analysis.paragraph, "Una persiana bajada no es una barrera. Es una rutina que se ve desde la calle."
+        )
+        self.assertEqual(self.analysis.conclusion, "Revisar el riesgo real antes de comprar.")
+
+    def test_keywords_and_cta(self) -> None:
+        self.assertTrue(self.analysis.has_keyword)
+        self.assertFalse(self.analysis.has_cta)
+        self.assertTrue(generator.analyze_body("Ir a [/diagnostico](/diagnostico)").has_cta)
+
+    def test_memoized_by_key(self) -> None:
+        with mock.patch.object(generator, "ANALYSIS_CACHE", generator.OrderedDict()), mock.patch.object(
+            generator, "ANALYSIS_CACHE_SIZE", 2
+        ):
+            first = generator.analyze_post(BODY, "a")
+            self.assertIs(generator.analyze_post("otro cuerpo", "a"), first)
+            generator.analyze_post("b", "b")
+            generator.analyze_post("c", "c")
+            self.assertNotIn("a", generator.ANALYSIS_CACHE)
+            self.assertEqual(generator.analyze_post(BODY), first)
+
+
+class ReadPostTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+
+    def read(self, text: str) -> generator.Post:
+        md_path = self.dir / "01-prueba.md"
+        md_path.write_text(text, encoding="utf-8")
+        return generator.read_post(md_path)
+
+    def test_read_time(self) -> None:
+        # Con keyword y CTA no se añaden bloques: solo cuentan las palabras del cuerpo.
+        words = "palabra " * 1096
+        post = self.read(f"---\ntitle: Largo\n---\nriesgo real {words}\n\n[/diagnostico](/diagnostico)\n")
+        self.assertEqual(post.read_time, 5)  # 1099 palabras / 220 → 4.99…
+        self.assertEqual(self.read("---\ntitle: Corto\n---\nriesgo real en /diagnostico\n").read_time, 3)
+        self.assertEqual(self.read("---\ntitle: Fijo\nread_time: 12\n---\nriesgo real /diagnostico\n").read_time, 12)
+
+    def test_added_blocks_count_words(self) -> None:
+        words = "palabra " * 660
+        post = self.read(f"---\ntitle: Sin keyword\n---\n{words}\n")
+        added = generator.analyze_post(generator.SEO_BLOCK).words + generator.analyze_post(generator.CTA_BLOCK).words
+        self.assertEqual(post.read_time, -(-(660 + added) // 220))
+
+    def test_first_image_is_hero(self) -> None:
+        post = self.read(BODY)
+        self.assertEqual(post.title, "Persianas que nadie revisa")
+        self.assertEqual((post.image, post.image_alt), ("img/persiana.png", "Persiana de un bajo"))
+        post = self.read("---\ntitle: Con portada\nimage: img/portada.png\n---\n![Cuerpo](img/cuerpo.png)\n")
+        self.assertEqual((post.image, post.image_alt), ("img/portada.png", "Con portada"))
+
+
+if __name__ == "__main__":
+    unittest.main()
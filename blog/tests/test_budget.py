@@ -0,0 +1,124 @@
+"""Umbrales, límites y holgura por tarjeta de budget.check."""
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import unittest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import budget  # noqa: E402
+
+
+def page(**metrics: int) -> dict:
+    values = dict.fromkeys(budget.PAGE_METRICS, 0)
+    values.update(metrics)
+    return values
+
+
+def baseline(pages: dict, **extra: object) -> dict:
+    return {"version": budget.BUDGET_VERSION, "pages": pages, "stages": {}, **extra}
+
+
+class AllowedTest(unittest.TestCase):
+    def test_ratio_slack_and_cards(self) -> None:
+        threshold = {"ratio": 1.1, "slack": 100, "per_card": 50}
+        self.assertAlmostEqual(budget.allowed(1000, threshold), 1200)
+        self.assertAlmostEqual(budget.allowed(1000, threshold, extra_cards=2), 1300)
+        self.assertEqual(budget.allowed(7, {}), 7)
+
+
+class CheckPagesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.base = baseline({"blog.html": page(html_bytes=10000, images=3, cards=5)})
+
+    def test_within_budget(self) -> None:
+        # 10000 × 1.10 + 2048
+        self.assertEqual(budget.check(self.base, {"blog.html": page(html_bytes=13048, images=3, cards=5)}, None), [])
+
+    def test_over_ratio_and_slack(self) -> None:
+        out = budget.check(self.base, {"blog.html": page(html_bytes=13049, images=3, cards=5)}, None)
+        self.assertEqual(len(out), 1)
+        self.assertIn("blog.html", out[0])
+        self.assertIn("máx. 12.7 KB", out[0])
+
+    def test_count_metric_has_no_slack(self) -> None:
+        out = budget.check(self.base, {"blog.html": page(html_bytes=10000, images=4, cards=5)}, None)
+        self.assertEqual(len(out), 1)
+        self.assertIn(budget.METRIC_LABELS["images"], out[0])
+
+    def test_new_card_adds_slack(self) -> None:
+        pages = {"blog.html": page(html_bytes=13048 + 1024, images=4, cards=6)}
+        self.assertEqual(budget.check(self.base, pages, None), [])
+        pages = {"blog.html": page(html_bytes=13048 + 1025, images=4, cards=6)}
+        self.assertEqual(len(budget.check(self.base, pages, None)), 1)
+
+    def test_fewer_cards_do_not_tighten(self) -> None:
+        self.assertEqual(budget.check(self.base, {"blog.html": page(html_bytes=13048, images=3, cards=2)}, None), [])
+
+    def test_custom_threshold_merges_with_defaults(self) -> None:
+        base = dict(self.base, thresholds={"html_bytes": {"slack": 0}})
+        self.assertEqual(len(budget.check(base, {"blog.html": page(html_bytes=11001, images=3, cards=5)}, None)), 1)
+        # per_card sigue viniendo de DEFAULT_THRESHOLDS.
+        self.assertEqual(budget.check(base, {"blog.html": page(html_bytes=12024, images=4, cards=6)}, None), [])
+
+    def test_absolute_limit_applies_to_new_pages(self) -> None:
+        limit = budget.DEFAULT_LIMITS["max_image_bytes"]
+        pages = {"blog/posts/07-nuevo.html": page(max_image_bytes=limit + 1), "blog/posts/08-otro.html": page(max_image_bytes=limit)}
+        out = budget.check(self.base, pages, None)
+        self.assertEqual(len(out), 1)
+        self.assertIn("07-nuevo.html", out[0])
+        self.assertIn("límite", out[0])
+
+    def test_custom_limits_replace_defaults(self) -> None:
+        base = dict(self.base, limits={"html_bytes": 5000})
+        out = budget.check(base, {"nueva.html": page(html_bytes=5001, max_image_bytes=10**9)}, None)
+        self.assertEqual(len(out), 1)
+        self.assertIn("límite 4.9 KB", out[0])
+
+    def test_pages_without_baseline_only_use_limits(self) -> None:
+        self.assertEqual(budget.check(self.base, {"nueva.html": page(html_bytes=50000, images=40, cards=30)}, None), [])
+
+
+class CheckStagesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.base = baseline({}, stages={"render": 1000.0})
+
+    def test_stage_threshold(self) -> None:
+        # 1000 × 1.5 + 500
+        self.assertEqual(budget.check(self.base, {}, {"render": 2000.0}), [])
+        out = budget.check(self.base, {}, {"render": 2000.1})
+        self.assertEqual(len(out), 1)
+        self.assertIn("etapa render", out[0])
+
+    def test_stages_skipped_when_none_or_unknown(self) -> None:
+        self.assertEqual(budget.check(self.base, {}, None), [])
+        self.assertEqual(budget.check(self.base, {}, {"nueva": 10**6}), [])
+
+
+class MismatchTest(unittest.TestCase):
+    def test_same_options(self) -> None:
+        build = {"minify": True, "shell_assets": "inline", "fingerprint": False, "pillow": True}
+        self.assertEqual(budget.mismatch({"build": dict(build)}, build), [])
+
+    def test_reports_each_difference(self) -> None:
+        measured = {"minify": True, "shell_assets": "inline", "fingerprint": False, "pillow": True}
+        build = dict(measured, shell_assets="critical", pillow=False)
+        self.assertEqual(budget.mismatch({"build": measured}, build), ["pillow: True → False", "shell_assets: inline → critical"])
+
+    def test_baseline_without_options(self) -> None:
+        self.assertEqual(budget.mismatch({}, {"pillow": True}), ["pillow: None → True"])
+
+
+class NewBaselineTest(unittest.TestCase):
+    def test_keeps_hand_edited_thresholds(self) -> None:
+        previous = baseline({}, thresholds={"images": {"ratio": 2.0}}, limits={"html_bytes": 1})
+        new = budget.new_baseline(previous, {"a.html": page()}, {"render": 1.0}, {"pillow": True})
+        self.assertEqual(new["thresholds"], {"images": {"ratio": 2.0}})
+        self.assertEqual(new["limits"], {"html_bytes": 1})
+        self.assertEqual(new["build"], {"pillow": True})
+        self.assertEqual(budget.new_baseline({}, {}, {}, {})["thresholds"], budget.DEFAULT_THRESHOLDS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Nombres con hash de los assets (asset_fingerprint, fingerprint_url, page_fingerprints)."""
+from __future__ import annotations
+
+from pathlib import Path
+from unittest import mock
+import hashlib
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import generator  # noqa: E402
+
+CSS = b"body { color: #123 }\n"
+
+
+def digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+class FingerprintTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        for name, value in (("ROOT", self.root), ("RESPONSIVE_DIR", self.root / "blog" / "img" / "responsive")):
+            patcher = mock.patch.object(generator, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(generator.asset_fingerprint.cache_clear)
+        generator.asset_fingerprint.cache_clear()
+        files = {
+            "css/site.css": CSS,
+            "js/app.js": b"console.log(1);\n",
+            "blog/img/responsive/foto-0123456789abcdef-480.webp": b"webp",
+            "css/site.0123456789abcdef.css": CSS,
+            "blog/posts/a.html": b"<p></p>",
+        }
+        for rel_path, data in files.items():
+            (self.root / rel_path).parent.mkdir(parents=True, exist_ok=True)
+            (self.root / rel_path).write_bytes(data)
+        self.css = f"css/site.{digest(CSS)}.css"
+
+    def rewrite(self, rel_path: str, data: bytes) -> None:
+        path = self.root / rel_path
+        path.write_bytes(data)
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        generator.asset_fingerprint.cache_clear()
+
+    def test_hash_is_stable_while_content_is_unchanged(self) -> None:
+        first = generator.fingerprint_url("../../css/site.css", "../../")
+        self.assertEqual(first, f"../../{self.css}")
+        # Otro build (caché vacía) y el fichero reescrito con el mismo contenido y otro mtime.
+        self.rewrite("css/site.css", CSS)
+        self.assertEqual(generator.fingerprint_url("../../css/site.css", "../../"), first)
+        self.assertEqual(generator.fingerprint_url("css/site.css", ""), self.css)
+
+    def test_hash_changes_with_content(self) -> None:
+        before = generator.asset_fingerprint("css/site.css")
+        changed = CSS + b"p { margin: 0 }\n"
+        self.rewrite("css/site.css", changed)
+        after = generator.asset_fingerprint("css/site.css")
+        self.assertNotEqual(after, before)
+        self.assertEqual(after, f"css/site.{digest(changed)}.css")
+
+    def test_query_fragment_and_absolute_urls(self) -> None:
+        self.assertEqual(generator.fingerprint_url("../../css/site.css?v=3#x", "../../"), f"../../{self.css}#x")
+        self.assertEqual(generator.fingerprint_url("/css/site.css", "../../"), f"/{self.css}")
+        self.assertEqual(generator.fingerprint_url("../../blog/../css/site.css", "../../"), f"../../{self.css}")
+
+    def test_urls_left_alone(self) -> None:
+        for url in (
+            "https://example.com/css/site.css",
+            "#arriba",
+            "data:image/png;base64,AAAA",
+            "../../blog/posts/a.html",  # no es un asset con hash
+            "../../css/falta.css",  # no existe
+            "../../css/site.0123456789abcdef.css",  # ya lleva hash
+            "../../blog/img/responsive/foto-0123456789abcdef-480.webp",  # derivado: hash de la imagen
+            "../../../fuera.css",  # fuera de la raíz
+            "css/site.css",  # sin el prefijo de la página
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(generator.fingerprint_url(url, "../../"), url)
+
+    def test_page_fingerprints_only_current_copies(self) -> None:
+        page = f'<link href="../../{self.css}"><script src="/js/app.{"0" * 16}.js"></script><a href="../../css/site.css">'
+        self.assertEqual(generator.page_fingerprints(page), {"css/site.css": self.css})
+
+
+if __name__ == "__main__":
+    unittest.main()
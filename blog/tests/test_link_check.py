@@ -0,0 +1,108 @@
+"""Comprobación de enlaces de --check-links (link_check y generator.check_links)."""
+from __future__ import annotations
+
+from pathlib import Path
+from unittest import mock
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import generator  # noqa: E402
+import link_check  # noqa: E402
+from build_util import server_routes  # noqa: E402
+
+SERVER_JS = """
+function routeToFile(routePath, filePath) {
+  app.get(routePath, (_req, res) => res.sendFile(filePath));
+}
+routeToFile("/", "index.html");
+routeToFile("/diagnostico", "evaluador.html");
+app.get("/admin/", requireAdminPage, (_req, res) => {});
+app.get("/api/leads/:id", requireAdminApi, (_req, res) => {});
+"""
+
+PAGE = """<!doctype html>
+<a href="../../index.html">inicio</a>
+<a href="/diagnostico">diagnóstico</a>
+<a href="../../admin">admin</a>
+<a href="https://example.com/x.png">fuera</a>
+<a href="#arriba">ancla</a>
+<img src="../img/portada.png" srcset="../img/portada-480.webp 480w, ../img/falta-960.webp 960w" alt="">
+<a href="../../falta.html?x=1">roto</a>
+<link rel="stylesheet" href="../../css/site.css">
+"""
+
+
+class ServerRoutesTest(unittest.TestCase):
+    def test_fixed_routes_only(self) -> None:
+        self.assertEqual(
+            server_routes(SERVER_JS), {"": "index.html", "diagnostico": "evaluador.html", "admin": None}
+        )
+
+
+class CheckLinksTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        files = {
+            "server.js": SERVER_JS,
+            "index.html": "",
+            "css/site.css": "body { background: url(../img/fondo.png) } h1 { background: url('../img/falta.svg') }",
+            "img/fondo.png": "",
+            "blog/img/portada.png": "",
+            "blog/img/portada-480.webp": "",
+            "blog/posts/a.html": PAGE,
+            "blog/posts/b.html": '<a href="a.html">a</a>',
+            "node_modules/x/index.html": "",
+        }
+        for rel_path, text in files.items():
+            (root / rel_path).parent.mkdir(parents=True, exist_ok=True)
+            (root / rel_path).write_text(text, encoding="utf-8")
+        self.root = root
+        for name, value in (("ROOT", root), ("SERVER_PATH", root / "server.js")):
+            patcher = mock.patch.object(generator, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_reports_broken_links(self) -> None:
+        pages = ["blog/posts/a.html", "blog/posts/b.html", "css/site.css"]
+        broken, summary = generator.check_links(pages, jobs=1)
+        self.assertEqual(
+            broken,
+            {
+                "blog/posts/a.html": ["../img/falta-960.webp", "../../falta.html?x=1"],
+                "css/site.css": ["../img/falta.svg"],
+            },
+        )
+        self.assertIn("3 rutas de server.js", summary)
+        self.assertEqual(
+            link_check.report_lines(broken),
+            [
+                "  blog/posts/a.html: ../img/falta-960.webp",
+                "  blog/posts/a.html: ../../falta.html?x=1",
+                "  css/site.css: ../img/falta.svg",
+            ],
+        )
+
+    def test_index_skips_hidden_and_node_modules(self) -> None:
+        (self.root / ".oculto.html").write_text("", encoding="utf-8")
+        index = link_check.SiteIndex.scan(self.root, self.root / "server.js")
+        self.assertIn("blog/posts/a.html", index)
+        self.assertIn("diagnostico/", index)
+        self.assertNotIn(".oculto.html", index)
+        self.assertNotIn("node_modules/x/index.html", index)
+        self.assertNotIn("blog/posts/", index)
+
+    def test_long_report_is_truncated(self) -> None:
+        broken = {"a.html": [f"falta-{n}.png" for n in range(45)]}
+        lines = link_check.report_lines(broken)
+        self.assertEqual(len(lines), 41)
+        self.assertEqual(lines[0], "  a.html: falta-0.png")
+        self.assertEqual(lines[-1], "  … y 5 más")
+
+
+if __name__ == "__main__":
+    unittest.main()
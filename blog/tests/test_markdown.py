@@ -0,0 +1,112 @@
+"""md_to_html: los artículos y casos límite frente al HTML del renderizador anterior (línea a línea)."""
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import unittest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import generator  # noqa: E402
+
+# Copias de blog/content/posts/*.md con el HTML que generaba el md_to_html anterior para su cuerpo
+# (el que queda tras read_post: sin el título y con los bloques SEO/CTA añadidos).
+GOLDEN_DIR = Path(__file__).resolve().parent / "golden"
+SEP = "\n        "
+
+# (Markdown, HTML esperado). Los que el renderizador anterior ya entendía dan su mismo HTML.
+SAME_AS_BEFORE = [
+    (
+        "Texto **negrita con _cursiva_ dentro** y _cursiva con **negrita**_.",
+        "<p>Texto <b>negrita con <i>cursiva</i> dentro</b> y <i>cursiva con <b>negrita</b></i>.</p>",
+    ),
+    (
+        "## Qué revisar\n- Puertas\n- Ventanas\n### Después\n- Rutinas\n\nTexto.",
+        SEP.join(
+            [
+                "<h3>Qué revisar</h3>",
+                '<ul class="checklist">',
+                '<li><span class="check">✓</span><span>Puertas</span></li>',
+                '<li><span class="check">✓</span><span>Ventanas</span></li>',
+                "</ul>",
+                "<h4>Después</h4>",
+                '<ul class="checklist">',
+                '<li><span class="check">✓</span><span>Rutinas</span></li>',
+                "</ul>",
+                "<p>Texto.</p>",
+            ]
+        ),
+    ),
+    (
+        "### Sub\n- a\n\n- b",
+        SEP.join(
+            [
+                "<h4>Sub</h4>",
+                '<ul class="checklist">',
+                '<li><span class="check">✓</span><span>a</span></li>',
+                "</ul>",
+                '<ul class="checklist">',
+                '<li><span class="check">✓</span><span>b</span></li>',
+                "</ul>",
+            ]
+        ),
+    ),
+    ("> cita **fuerte** & <b>", '<div class="quote">cita <b>fuerte</b> &amp; &lt;b&gt;</div>'),
+    ("2 * 3 * 4", "<p>2 * 3 * 4</p>"),
+]
+
+# Construcciones nuevas, o que antes salían mal (p. ej. ***x*** daba <b>*x</b>*).
+NEW_CONSTRUCTS = [
+    ("***ambas*** y **una *cursiva* dentro**", "<p><b><i>ambas</i></b> y <b>una <i>cursiva</i> dentro</b></p>"),
+    (
+        "Ver [cerraduras](https://es.wikipedia.org/wiki/Cerradura_(mecanismo)) y (nota [aquí](https://e.com/a)).",
+        '<p>Ver <a href="https://es.wikipedia.org/wiki/Cerradura_(mecanismo)">cerraduras</a>'
+        ' y (nota <a href="https://e.com/a">aquí</a>).</p>',
+    ),
+    ("[ver \\[1\\]](https://e.com/x)", '<p><a href="https://e.com/x">ver [1]</a></p>'),
+    ("Precio \\*sin IVA\\* y 2 \\* 3, \\_no\\_ y \\\\ barra.", "<p>Precio *sin IVA* y 2 * 3, _no_ y \\ barra.</p>"),
+    ("*a \\* b* y `c\\*d`", "<p><i>a * b</i> y <code>c\\*d</code></p>"),
+    ("variable_con_guiones y _cursiva_", "<p>variable_con_guiones y <i>cursiva</i></p>"),
+    ("Una línea\nque sigue.\n\nOtra.", "<p>Una línea\nque sigue.</p>" + SEP + "<p>Otra.</p>"),
+    (
+        "1. uno\n2. dos\n## Tras la lista\nTexto.",
+        SEP.join(
+            [
+                '<ol class="checklist">',
+                '<li><span class="check">1</span><span>uno</span></li>',
+                '<li><span class="check">2</span><span>dos</span></li>',
+                "</ol>",
+                "<h3>Tras la lista</h3>",
+                "<p>Texto.</p>",
+            ]
+        ),
+    ),
+]
+
+
+class GoldenPostsTest(unittest.TestCase):
+    def test_posts_match_previous_renderer(self) -> None:
+        sources = sorted(GOLDEN_DIR.glob("*.md"))
+        self.assertTrue(sources)
+        for md_path in sources:
+            with self.subTest(post=md_path.name):
+                body = generator.read_post(md_path).body_md
+                expected = md_path.with_suffix(".html").read_text(encoding="utf-8")
+                self.assertEqual(generator.md_to_html(body) + "\n", expected)
+
+
+class EdgeCasesTest(unittest.TestCase):
+    def check(self, cases: list) -> None:
+        for md, expected in cases:
+            with self.subTest(md=md):
+                self.assertEqual(generator.md_to_html(md), expected)
+
+    def test_same_as_before(self) -> None:
+        self.check(SAME_AS_BEFORE)
+
+    def test_new_constructs(self) -> None:
+        self.check(NEW_CONSTRUCTS)
+
+
+if __name__ == "__main__":
+    unittest.main()
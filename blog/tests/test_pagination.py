@@ -0,0 +1,87 @@
+"""Paginación de blog.html y de los listados por tag (paginate, plan_listing_pages, render_pagination)."""
+from __future__ import annotations
+
+from pathlib import Path
+import re
+import sys
+import unittest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import generator  # noqa: E402
+
+
+def card(n: int, tag: str = "Hogar") -> generator.Card:
+    return generator.Card(
+        slug=f"{n:02d}-post",
+        title=f"Post {n}",
+        excerpt="",
+        tag=tag,
+        date_iso=f"2026-01-{n:02d}",
+        read_time=3,
+        image="",
+        image_alt="",
+        popular_rank=None,
+    )
+
+
+class PaginateTest(unittest.TestCase):
+    def test_page_boundaries(self) -> None:
+        posts = [card(n) for n in range(1, 8)]
+        for count, sizes in ((0, [0]), (1, [1]), (3, [3]), (4, [3, 1]), (6, [3, 3]), (7, [3, 3, 1])):
+            with self.subTest(count=count):
+                pages = generator.paginate(posts[:count], 3)
+                self.assertEqual([len(page.posts) for page in pages], sizes)
+                self.assertEqual([page.number for page in pages], list(range(1, len(sizes) + 1)))
+                self.assertTrue(all(page.total == len(sizes) for page in pages))
+                self.assertEqual([p for page in pages for p in page.posts], posts[:count])
+
+    def test_paths_and_prefixes(self) -> None:
+        pages = generator.paginate([card(n) for n in range(1, 5)], 2)
+        self.assertEqual([(page.rel_path, page.prefix) for page in pages], [("blog.html", ""), ("blog/page/2.html", "../../")])
+        pages = generator.paginate([card(n) for n in range(1, 5)], 2, tag="Local comercial")
+        self.assertEqual(
+            [(page.rel_path, page.prefix) for page in pages],
+            [("blog/tag/local-comercial.html", "../../"), ("blog/tag/local-comercial/page/2.html", "../../../../")],
+        )
+
+    def test_plan_splits_tags_and_keeps_popular_on_first_page(self) -> None:
+        posts = [card(n, "Hogar" if n % 2 else "Negocio") for n in range(5, 0, -1)]
+        popular = (posts[-1],)
+        pages = generator.plan_listing_pages(posts, 2, popular)
+        self.assertEqual(
+            [(page.rel_path, [p.slug for p in page.posts]) for page in pages],
+            [
+                ("blog.html", ["05-post", "04-post"]),
+                ("blog/page/2.html", ["03-post", "02-post"]),
+                ("blog/page/3.html", ["01-post"]),
+                ("blog/tag/hogar.html", ["05-post", "03-post"]),
+                ("blog/tag/hogar/page/2.html", ["01-post"]),
+                ("blog/tag/negocio.html", ["04-post", "02-post"]),
+            ],
+        )
+        self.assertEqual([page.popular for page in pages], [popular] + [()] * 5)
+
+
+class RenderPaginationTest(unittest.TestCase):
+    def links(self, page: generator.ListingPage) -> list:
+        html = generator.render_pagination(page)
+        return [(rel, href) for href, rel in re.findall(r'href="([^"]+)" rel="(\w+)"', html)]
+
+    def test_prev_and_next(self) -> None:
+        first, middle, last = generator.paginate([card(n) for n in range(1, 6)], 2, tag="Hogar")
+        self.assertEqual(self.links(first), [("next", "../../blog/tag/hogar/page/2.html")])
+        self.assertEqual(
+            self.links(middle),
+            [("prev", "../../../../blog/tag/hogar.html"), ("next", "../../../../blog/tag/hogar/page/3.html")],
+        )
+        self.assertEqual(self.links(last), [("prev", "../../../../blog/tag/hogar/page/2.html")])
+        self.assertIn("Página 3 de 3", generator.render_pagination(last))
+
+    def test_single_page_has_no_navigation(self) -> None:
+        (page,) = generator.paginate([card(1)], 12)
+        self.assertEqual(generator.render_pagination(page), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+"""Lectura incremental del log de visitas (popularity.read_array y Popularity.consume_*)."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+import io
+import json
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import popularity  # noqa: E402
+
+
+def view(slug: str, day: str = "2026-10-01") -> dict:
+    return {"event_name": popularity.VIEW_EVENT, "timestamp": f"{day}T10:00:00.000Z", "payload": {"slug": slug}}
+
+
+def log_bytes(events: list, indent: int | None = 2) -> bytes:
+    # Como lo escribe server.js (JSON.stringify(events, null, 2)).
+    return json.dumps(events, ensure_ascii=False, indent=indent).encode("utf-8")
+
+
+class ReadArrayTest(unittest.TestCase):
+    def read(self, data: bytes, offset: int = 0) -> tuple[list, int]:
+        state = {"offset": offset}
+        return list(popularity.read_array(io.BytesIO(data), state)), state["offset"]
+
+    def test_reads_whole_array(self) -> None:
+        events = [view("a"), view("b"), {"event_name": "otro"}]
+        for indent in (None, 2):
+            items, _ = self.read(log_bytes(events, indent))
+            self.assertEqual(items, events)
+
+    def test_resumes_from_checkpoint(self) -> None:
+        first = log_bytes([view("a"), view("b")])
+        _, offset = self.read(first)
+        # server.js reescribe el fichero con un elemento más: lo anterior no cambia.
+        grown = log_bytes([view("a"), view("b"), view("c")])
+        self.assertEqual(grown[:offset], first[:offset])
+        items, end = self.read(grown, offset)
+        self.assertEqual(items, [view("c")])
+        self.assertEqual(self.read(grown, end), ([], end))
+
+    def test_truncated_tail_stops_before_partial_item(self) -> None:
+        full = log_bytes([view("a"), view("b"), view("c")])
+        cut = full.index(b'"c"') + 2
+        items, offset = self.read(full[:cut])
+        self.assertEqual(items, [view("a"), view("b")])
+        # El elemento a medio escribir se lee entero en el siguiente build.
+        self.assertEqual(self.read(full, offset)[0], [view("c")])
+
+    def test_chunk_boundaries(self) -> None:
+        events = [view("año"), view("cerradura-ñ"), view("b")]
+        data = log_bytes(events)
+        for chunk in (1, 2, 3, 7):
+            with self.subTest(chunk=chunk), mock.patch.object(popularity, "READ_CHUNK", chunk):
+                items, offset = self.read(data)
+                self.assertEqual(items, events)
+                self.assertEqual(data[offset:].strip(), b"]")
+
+
+class ConsumeFileTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.events = self.dir / "events.json"
+        self.state = self.dir / "state.json"
+
+    def consume(self, known: set = frozenset({"a", "b", "c"}), since: str = "2026-01-01") -> tuple[int, dict]:
+        p = popularity.Popularity(str(self.events), self.state)
+        new = p.consume_file(self.events, set(known), since)
+        views = p.views(since)
+        p.save()
+        return new, views
+
+    def test_counts_only_new_events(self) -> None:
+        self.events.write_bytes(log_bytes([view("a"), view("b")]))
+        self.assertEqual(self.consume(), (2, {"a": 1, "b": 1}))
+        self.events.write_bytes(log_bytes([view("a"), view("b"), view("a")]))
+        self.assertEqual(self.consume(), (1, {"a": 2, "b": 1}))
+        self.assertEqual(self.consume(), (0, {"a": 2, "b": 1}))
+
+    def test_filters_unknown_slugs_and_old_days(self) -> None:
+        self.events.write_bytes(log_bytes([view("a"), view("zzz"), view("b", "2025-12-31"), {"event_name": "otro"}]))
+        self.assertEqual(self.consume(), (1, {"a": 1}))
+
+    def test_rewritten_log_is_recounted(self) -> None:
+        self.events.write_bytes(log_bytes([view("a"), view("b"), view("a")]))
+        self.consume()
+        # Rotado o editado a mano: lo ya leído no coincide con el punto de control.
+        self.events.write_bytes(log_bytes([view("c"), view("c"), view("b")]))
+        self.assertEqual(self.consume(), (3, {"b": 1, "c": 2}))
+
+    def test_shorter_log_is_recounted(self) -> None:
+        self.events.write_bytes(log_bytes([view("a"), view("b")]))
+        self.consume()
+        self.events.write_bytes(log_bytes([view("c")]))
+        self.assertEqual(self.consume(), (1, {"c": 1}))
+
+    def test_truncated_tail_is_read_once_complete(self) -> None:
+        full = log_bytes([view("a"), view("b"), view("c")])
+        self.events.write_bytes(full[: full.index(b'"c"') + 2])
+        self.assertEqual(self.consume(), (2, {"a": 1, "b": 1}))
+        self.events.write_bytes(full)
+        self.assertEqual(self.consume(), (1, {"a": 1, "b": 1, "c": 1}))
+
+    def test_other_source_starts_over(self) -> None:
+        self.events.write_bytes(log_bytes([view("a")]))
+        self.consume()
+        self.assertEqual(popularity.Popularity("postgres", self.state).days, {})
+
+
+class FakeEvents:
+    """Tabla events en memoria con la interfaz mínima de psycopg que usa consume_postgres."""
+
+    def __init__(self) -> None:
+        self.rows: list = []  # (id, ts, slug)
+        self.now = datetime(2026, 10, 1, 12, tzinfo=timezone.utc)
+
+    def connect(self, url: str) -> FakeEvents:
+        return self
+
+    def __enter__(self) -> FakeEvents:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        pass
+
+    def execute(self, sql: str, params: tuple) -> FakeEvents:
+        self.sql, self.params = sql, params
+        return self
+
+    @staticmethod
+    def parse(value: str) -> datetime:
+        if value == "-infinity":
+            return datetime.min.replace(tzinfo=timezone.utc)
+        return datetime.fromisoformat(value)
+
+    def fetchone(self) -> tuple:
+        interval, settled = self.params
+        minutes = int(interval.split()[0])
+        return (max(self.now - timedelta(minutes=minutes), self.parse(settled)),)
+
+    def fetchall(self) -> list:
+        if self.sql == popularity.SETTLED_SQL:
+            _, low, high, seen = self.params
+            days: dict = {}
+            for event_id, ts, slug in self.rows:
+                if self.parse(low) <= ts < self.parse(high) and event_id not in seen:
+                    key = (ts.date().isoformat(), slug)
+                    days[key] = days.get(key, 0) + 1
+            return [(day, slug, count) for (day, slug), count in days.items()]
+        _, low = self.params
+        return [(event_id, ts.date().isoformat(), slug) for event_id, ts, slug in self.rows if ts >= self.parse(low)]
+
+
+class ConsumePostgresTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.state = Path(tmp.name) / "state.json"
+        self.db = FakeEvents()
+        patcher = mock.patch.object(popularity, "psycopg", self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def consume(self) -> tuple[int, dict]:
+        p = popularity.Popularity("postgres", self.state)
+        new = p.consume_postgres("postgres://", {"a", "b"}, "2026-01-01")
+        views = p.views("2026-01-01")
+        p.save()
+        return new, views
+
+    def at(self, minutes: int) -> datetime:
+        return datetime(2026, 10, 1, 12, tzinfo=timezone.utc) + timedelta(minutes=minutes)
+
+    def test_late_commit_with_smaller_id_is_counted(self) -> None:
+        self.db.rows += [(1, self.at(0), "a"), (3, self.at(1), "a")]
+        self.db.now = self.at(2)
+        self.assertEqual(self.consume(), (2, {"a": 2}))
+        # La fila 2 se insertó antes que la 3 pero se confirma después de leer la 3.
+        self.db.rows.append((2, self.at(0), "b"))
+        self.db.now = self.at(5)
+        self.assertEqual(self.consume(), (1, {"a": 2, "b": 1}))
+
+    def test_overlap_is_not_counted_twice(self) -> None:
+        self.db.rows += [(1, self.at(0), "a"), (2, self.at(4), "b")]
+        self.db.now = self.at(5)
+        self.assertEqual(self.consume(), (2, {"a": 1, "b": 1}))
+        for minutes in (8, 30, 90):
+            self.db.now = self.at(minutes)
+            self.assertEqual(self.consume(), (0, {"a": 1, "b": 1}))
+        self.db.rows.append((3, self.at(85), "a"))
+        self.assertEqual(self.consume(), (1, {"a": 2, "b": 1}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""Prefijos, slugs e ids de búsqueda de blog/content/registry.json (post_registry)."""
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from post_registry import PostRegistry, duplicate_prefixes, source_prefix  # noqa: E402
+
+
+class AllocateTest(unittest.TestCase):
+    def test_next_prefix_after_highest(self) -> None:
+        registry = PostRegistry({"01-a": "01-a.md", "06-b": "06-b.md"})
+        self.assertEqual(registry.allocate("titulo"), (7, "07-titulo"))
+
+    def test_empty_registry(self) -> None:
+        self.assertEqual(PostRegistry().allocate("titulo"), (1, "01-titulo"))
+
+    def test_skips_taken_prefixes(self) -> None:
+        registry = PostRegistry({"01-a": "01-a.md"}, next_prefix=1)
+        registry.by_prefix[2] = "02-manual.md"
+        self.assertEqual(registry.allocate("titulo")[0], 3)
+
+    def test_unique_slug(self) -> None:
+        registry = PostRegistry({"07-titulo": "titulo.md", "07-titulo-2": "otro.md"})
+        self.assertEqual(registry.allocate("titulo"), (1, "01-titulo"))
+        registry.next_prefix = 7
+        self.assertEqual(registry.allocate("titulo"), (7, "07-titulo-3"))
+
+    def test_release_frees_prefix_but_not_next(self) -> None:
+        registry = PostRegistry({"01-a": "01-a.md", "02-b": "02-b.md"})
+        registry.release("02-b")
+        self.assertNotIn("02-b", registry.posts)
+        self.assertNotIn(2, registry.by_prefix)
+        self.assertEqual(registry.allocate("c"), (3, "03-c"))
+        registry.release("no-existe")
+
+
+class RegisterTest(unittest.TestCase):
+    def test_rename_source_replaces_slug(self) -> None:
+        registry = PostRegistry({"01-a": "01-a.md"})
+        registry.register("01-nuevo", "01-a.md")
+        self.assertEqual(registry.posts, {"01-nuevo": "01-a.md"})
+        self.assertEqual(registry.by_source, {"01-a.md": "01-nuevo"})
+        self.assertEqual(registry.by_prefix, {1: "01-a.md"})
+
+    def test_move_slug_to_other_source(self) -> None:
+        registry = PostRegistry({"01-a": "01-a.md"})
+        registry.register("01-a", "02-a.md")
+        self.assertEqual(registry.by_source, {"02-a.md": "01-a"})
+        self.assertEqual(registry.by_prefix, {2: "02-a.md"})
+
+    def test_release_keeps_prefix_of_other_source(self) -> None:
+        registry = PostRegistry({"03-a": "03-a.md"})
+        registry.by_prefix[3] = "03-b.md"
+        registry.release("03-a")
+        self.assertEqual(registry.by_prefix, {3: "03-b.md"})
+
+    def test_source_without_prefix(self) -> None:
+        registry = PostRegistry({"sin-prefijo": "sin-prefijo.md"})
+        self.assertEqual(registry.by_prefix, {})
+        self.assertEqual(registry.next_prefix, 1)
+        self.assertIsNone(source_prefix("sin-prefijo.md"))
+        self.assertEqual(source_prefix("012-x.md"), 12)
+
+
+class DocIdTest(unittest.TestCase):
+    def test_ids_are_stable_and_not_reused(self) -> None:
+        registry = PostRegistry({"01-a": "01-a.md", "02-b": "02-b.md"})
+        self.assertEqual([registry.doc_id("01-a"), registry.doc_id("02-b"), registry.doc_id("01-a")], [0, 1, 0])
+        registry.release("02-b")
+        registry.register("03-c", "03-c.md")
+        self.assertEqual(registry.doc_id("03-c"), 2)
+        self.assertNotIn("02-b", registry.docs)
+
+    def test_register_with_doc_advances_next(self) -> None:
+        registry = PostRegistry()
+        registry.register("01-a", "01-a.md", 5)
+        self.assertEqual(registry.doc_id("01-a"), 5)
+        registry.register("02-b", "02-b.md")
+        self.assertEqual(registry.doc_id("02-b"), 6)
+
+    def test_save_and_load_round_trip(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "content" / "registry.json"
+            registry = PostRegistry({"01-a": "01-a.md", "02-b": "02-b.md"}, path=path)
+            registry.doc_id("02-b")
+            registry.doc_id("01-a")
+            registry.release("02-b")
+            self.assertTrue(registry.save())
+            self.assertFalse(registry.save())
+            loaded = PostRegistry.load(path)
+            self.assertEqual(loaded.posts, {"01-a": "01-a.md"})
+            self.assertEqual(loaded.docs, {"01-a": 1})
+            self.assertEqual((loaded.next_prefix, loaded.next_doc), (3, 2))
+            self.assertEqual(loaded.to_json(), registry.to_json())
+
+    def test_load_without_registry_scans_content(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            content = Path(tmp) / "posts"
+            content.mkdir()
+            for name in ("01-a.md", "04-b.md", "notas.txt"):
+                (content / name).write_text("", encoding="utf-8")
+            registry = PostRegistry.load(Path(tmp) / "registry.json", content)
+            self.assertFalse(registry.exists())
+            self.assertEqual(registry.posts, {"01-a": "01-a.md", "04-b": "04-b.md"})
+            self.assertEqual(registry.next_prefix, 5)
+
+
+class DuplicatePrefixesTest(unittest.TestCase):
+    def test_reports_each_shared_prefix(self) -> None:
+        sources = ["01-a.md", "02-b.md", "2-c.md", "03-d.md", "sin-prefijo.md", "otro.md", "01-e.md"]
+        self.assertEqual(duplicate_prefixes(sources), {1: ("01-a.md", "01-e.md"), 2: ("02-b.md", "2-c.md")})
+
+    def test_no_duplicates(self) -> None:
+        self.assertEqual(duplicate_prefixes(["01-a.md", "02-b.md", "x.md"]), {})
+        self.assertEqual(duplicate_prefixes([]), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""Vista previa de build.py serve (PreviewSite): LRU de páginas en memoria y respuestas 404."""
+from __future__ import annotations
+
+from pathlib import Path
+from unittest import mock
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import build_cache  # noqa: E402
+import generator  # noqa: E402
+
+SERVER_JS = """
+routeToFile("/", "index.html");
+routeToFile("/blog", "blog.html");
+routeToFile("/diagnostico", "evaluador.html");
+"""
+
+
+def post_md(title: str, day: int, draft: bool = False) -> str:
+    front = f"title: {title}\ndate: 2026-01-{day:02d}\ndraft: {'true' if draft else 'false'}"
+    return f"---\n{front}\n---\nTexto sobre el riesgo real en /diagnostico.\n"
+
+
+class PreviewSiteTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        content = root / "blog" / "content" / "posts"
+        content.mkdir(parents=True)
+        for n, slug in enumerate(("uno", "dos", "tres"), 1):
+            (content / f"{slug}.md").write_text(post_md(slug.capitalize(), n), encoding="utf-8")
+        (content / "borrador.md").write_text(post_md("Borrador", 9, draft=True), encoding="utf-8")
+        shutil.copy(generator.INDEX_PATH, root / "index.html")
+        (root / "evaluador.html").write_text("<p>evaluador</p>", encoding="utf-8")
+        (root / "server.js").write_text(SERVER_JS, encoding="utf-8")
+        (root / ".env").write_text("SECRET=1", encoding="utf-8")
+        self.root, self.content = root, content
+
+        patches = {
+            "ROOT": root,
+            "CONTENT_DIR": content,
+            "INDEX_PATH": root / "index.html",
+            "SERVER_PATH": root / "server.js",
+            # Como run_serve: la vista previa no escribe derivados de imágenes.
+            "ENCODE_DERIVATIVES": False,
+        }
+        for name, value in patches.items():
+            patcher = mock.patch.object(generator, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # La caché del último build es la de la raíz temporal (vacía), no la del repositorio.
+        cache_path = str(root / "blog" / ".build-cache.bin")
+        post_cache = build_cache.PostCache
+        patcher = mock.patch.object(build_cache, "PostCache", lambda version: post_cache(version, cache_path))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for cached in (
+            generator.page_shell,
+            generator.post_template,
+            generator.image_digest,
+            generator.responsive_image,
+            generator.asset_fingerprint,
+        ):
+            cached.cache_clear()
+            self.addCleanup(cached.cache_clear)
+        self.site = generator.PreviewSite(cache_pages=2)
+
+    def get(self, target: str) -> tuple:
+        status, content_type, body, timing = self.site.respond("GET", target)
+        return status, timing.split(";")[0]
+
+    def test_lru_keeps_most_recent_pages(self) -> None:
+        self.assertEqual(self.get("/blog/posts/uno.html"), (200, "render"))
+        self.assertEqual(self.get("/blog/posts/dos.html"), (200, "render"))
+        self.assertEqual(self.get("/blog/posts/uno.html"), (200, "cache"))
+        # dos es ahora la menos usada: la tercera página la expulsa.
+        self.assertEqual(self.get("/blog/posts/tres.html"), (200, "render"))
+        self.assertEqual(list(self.site.pages), ["blog/posts/uno.html", "blog/posts/tres.html"])
+        self.assertEqual(self.get("/blog/posts/dos.html"), (200, "render"))
+        self.assertEqual(list(self.site.pages), ["blog/posts/tres.html", "blog/posts/dos.html"])
+
+    def test_edited_source_is_rendered_again(self) -> None:
+        self.get("/blog/posts/uno.html")
+        md_path = self.content / "uno.md"
+        md_path.write_text(post_md("Uno editado", 1), encoding="utf-8")
+        stat = md_path.stat()
+        os.utime(md_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        status, _, body, timing = self.site.respond("GET", "/blog/posts/uno.html")
+        self.assertEqual((status, timing.split(";")[0]), (200, "render"))
+        self.assertIn("Uno editado".encode("utf-8"), body)
+
+    def test_routes_listings_and_static_files(self) -> None:
+        self.assertEqual(self.get("/blog"), (200, "render"))
+        self.assertEqual(self.get("/blog.html"), (200, "cache"))
+        self.assertEqual(self.site.respond("GET", "/diagnostico")[2], b"<p>evaluador</p>")
+
+    def test_not_found(self) -> None:
+        for target in (
+            "/blog/posts/no-existe.html",
+            "/blog/posts/borrador.html",  # borrador: solo con --drafts
+            "/blog/posts/uno",
+            "/.env",
+            "/blog/content/posts/",  # directorio
+            "/../fuera.html",
+        ):
+            with self.subTest(target=target):
+                self.assertEqual(self.site.respond("GET", target)[0], 404)
+        self.assertEqual(list(self.site.pages), [])
+        self.assertEqual(self.site.respond("PUT", "/blog")[0], 405)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""Lecturas relacionadas: términos del cuerpo (search_terms) y ranking TF-IDF de RelatedIndex."""
+from __future__ import annotations
+
+from pathlib import Path
+import dataclasses
+import sys
+import unittest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import generator  # noqa: E402
+
+BASE = generator.Post(
+    title="",
+    slug="",
+    date_iso="2026-01-01",
+    tag="Hogar",
+    read_time=3,
+    popular_rank=None,
+    image="",
+    image_alt="",
+    excerpt="",
+    quick_title="",
+    quick_summary="",
+    conclusion="",
+    body_md="",
+)
+BODIES = {
+    "puerta.md": "La cerradura de la puerta blindada y el bombín: cerradura, bombín y escudo.",
+    "bombin.md": "Cambiar el bombín de la cerradura. Un bombín antibumping protege la cerradura.",
+    "escudo.md": "El escudo protege el bombín. Ventanas, persianas y rejas en pisos bajos.",
+    # Solo comparte palabras vacías con los demás (de, la, el, y, un…).
+    "vacias.md": "De la que para con el y un por los sus. Jardín, piscina y terraza.",
+    "jardin.md": "Jardín con piscina: la terraza y el jardín sin iluminación.",
+}
+
+
+def build(bodies: dict) -> generator.RelatedIndex:
+    index = generator.RelatedIndex()
+    counts = {}
+    for name, body in bodies.items():
+        terms, counts[name] = generator.search_terms(dataclasses.replace(BASE, slug=name[:-3], body_md=body))
+        index.count(terms, 1)
+    for name, body_counts in counts.items():
+        index.vectors[name] = index.vectorize(body_counts)
+    index.update(set(), set(), full=True)
+    return index
+
+
+class SearchTermsTest(unittest.TestCase):
+    def test_stopwords_are_not_counted(self) -> None:
+        terms, counts = generator.search_terms(dataclasses.replace(BASE, title="El bombín", body_md=BODIES["vacias.md"]))
+        self.assertEqual(counts, {"jardin": 1, "piscina": 1, "terraza": 1})
+        self.assertEqual(terms["bombin"], generator.SEARCH_FIELD_BITS["title"])
+        self.assertFalse(generator.SEARCH_STOPWORDS & terms.keys())
+
+
+class RelatedIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = build(BODIES)
+
+    def test_ranks_by_shared_terms(self) -> None:
+        # bombin.md comparte cerradura y bombín (repetidos); escudo.md, bombín y escudo.
+        self.assertEqual(self.index.related["puerta.md"], ["bombin.md", "escudo.md"])
+        self.assertEqual(self.index.related["jardin.md"], ["vacias.md"])
+
+    def test_stopwords_do_not_relate(self) -> None:
+        self.assertNotIn("puerta.md", self.index.related["vacias.md"])
+        self.assertNotIn("vacias.md", self.index.related["puerta.md"])
+        self.assertFalse(any(generator.SEARCH_STOPWORDS & vector.keys() for vector in self.index.vectors.values()))
+
+    def test_terms_no_other_post_has_are_pruned(self) -> None:
+        self.assertNotIn("blindada", self.index.vectors["puerta.md"])
+        self.assertNotIn("iluminacion", self.index.vectors["jardin.md"])
+        for vector in self.index.vectors.values():
+            self.assertAlmostEqual(sum(w * w for w in vector.values()), 1.0, places=4)
+
+    def test_update_requeries_affected_posts(self) -> None:
+        bodies = dict(BODIES, **{"vacias.md": "Cerradura y bombín de la puerta: cerradura con bombín."})
+        rebuilt = build(bodies)
+        self.assertIn("vacias.md", rebuilt.related["puerta.md"])
+        self.assertIn("puerta.md", rebuilt.related["vacias.md"])
+        # Retirar un artículo lo quita de las listas que lo tenían.
+        requery = self.index.update(set(), {"bombin.md"}, full=False)
+        self.assertIn("puerta.md", requery)
+        self.assertNotIn("bombin.md", self.index.related)
+        self.assertEqual(self.index.related["puerta.md"], ["escudo.md"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""Índice de búsqueda por shards (search_shard_key, build_search_index), leído como lo lee js/blog-search.js."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from pathlib import Path
+from unittest import mock
+import json
+import sys
+import unittest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import generator  # noqa: E402
+
+BITS = generator.SEARCH_FIELD_BITS
+BASE = generator.SEARCH_DIR.relative_to(generator.ROOT).as_posix()
+
+
+def card(slug: str, title: str) -> generator.Card:
+    return generator.Card(
+        slug=slug, title=title, excerpt="", tag="Hogar", date_iso="2026-01-01", read_time=3, image="", image_alt="", popular_rank=None
+    )
+
+
+POSTS = [card("puertas", "Puertas"), card("persianas", "Persianas"), card("alarmas", "Alarmas"), card("puntos", "Puntos ciegos")]
+TERMS = {
+    "puertas": {"puertas": BITS["title"], "puerta": BITS["body"], "bombin": BITS["body"]},
+    "persianas": {"persianas": BITS["title"], "puerta": BITS["body"]},
+    "alarmas": {"alarmas": BITS["title"], "nino": BITS["body"]},
+    "puntos": {"puntos": BITS["title"], "ciegos": BITS["title"], "puerta": BITS["excerpt"] | BITS["body"]},
+}
+# El artículo con id 2 se retiró: su hueco queda a null.
+DOC_IDS = {"puertas": 0, "persianas": 1, "alarmas": 3, "puntos": 4}
+
+
+class Reader:
+    """Búsqueda sobre los ficheros generados, con los pasos de matchToken() y la lectura de docs del JS."""
+
+    def __init__(self, files: dict) -> None:
+        self.files = files
+        self.meta = self.load("index.json")
+
+    def load(self, name: str) -> object:
+        return json.loads(self.files[f"{BASE}/{name}"])
+
+    def match(self, token: str, prefix: bool = False) -> dict:
+        key = generator.search_shard_key(token)
+        if key not in self.meta["shards"]:
+            return {}
+        shard = self.load(f"t-{key}.json")
+        scores: dict = {}
+        for i in range(bisect_left(shard["terms"], token), len(shard["terms"])):
+            term = shard["terms"][i]
+            if not (term.startswith(token) if prefix else term == token):
+                break
+            doc = 0
+            postings = shard["postings"][i]
+            for j in range(0, len(postings), 2):
+                doc += postings[j]
+                scores[doc] = scores.get(doc, 0) | postings[j + 1]
+        return scores
+
+    def doc(self, doc_id: int) -> list:
+        per = self.meta["docs_per_shard"]
+        return self.load(f"d-{doc_id // per}.json")[doc_id % per]
+
+
+class ShardKeyTest(unittest.TestCase):
+    def test_two_letter_prefix(self) -> None:
+        self.assertEqual(generator.search_shard_key("puerta"), "pu")
+        self.assertEqual(generator.search_shard_key("24h"), "24")
+        # Lo que no es ASCII alfanumérico va en hexadecimal (nombres de fichero seguros).
+        self.assertEqual(generator.search_shard_key("ßx"), "x" + "ßx".encode("utf-8").hex())
+
+
+class BuildSearchIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(generator, "SEARCH_DOCS_PER_SHARD", 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.files = generator.build_search_index(POSTS, TERMS, DOC_IDS)
+        self.reader = Reader(self.files)
+
+    def test_terms_go_to_their_prefix_shard(self) -> None:
+        self.assertEqual(self.reader.meta["shards"], ["al", "bo", "ci", "ni", "pe", "pu"])
+        for key in self.reader.meta["shards"]:
+            terms = self.reader.load(f"t-{key}.json")["terms"]
+            self.assertEqual(terms, sorted(terms))
+            self.assertTrue(all(generator.search_shard_key(term) == key for term in terms))
+        self.assertEqual(self.reader.load("t-pu.json")["terms"], ["puerta", "puertas", "puntos"])
+
+    def test_exact_and_prefix_lookup(self) -> None:
+        body, excerpt, title = BITS["body"], BITS["excerpt"], BITS["title"]
+        self.assertEqual(self.reader.match("puerta"), {0: body, 1: body, 4: excerpt | body})
+        # Prefijo: se combinan los bits de puerta y puertas.
+        self.assertEqual(self.reader.match("puert", prefix=True), {0: title | body, 1: body, 4: excerpt | body})
+        self.assertEqual(self.reader.match("pun", prefix=True), {4: title})
+        self.assertEqual(self.reader.match("ventana"), {})
+
+    def test_doc_shards(self) -> None:
+        self.assertEqual(self.reader.meta["docs"], 5)
+        shards = [f"t-{key}.json" for key in self.reader.meta["shards"]]
+        names = ["d-0.json", "d-1.json", "d-2.json", "index.json", *shards]
+        self.assertEqual(sorted(self.files), sorted(f"{BASE}/{name}" for name in names))
+        self.assertEqual(self.reader.doc(1)[:2], ["blog/posts/persianas.html", "Persianas"])
+        self.assertIsNone(self.reader.doc(2))
+        self.assertEqual(self.reader.doc(3)[0], "blog/posts/alarmas.html")
+        self.assertEqual(self.reader.doc(4)[0], "blog/posts/puntos.html")
+
+    def test_new_post_only_touches_its_shards(self) -> None:
+        posts = POSTS + [card("ventanas", "Ventanas")]
+        terms = dict(TERMS, ventanas={"ventanas": BITS["title"], "bombin": BITS["body"]})
+        files = generator.build_search_index(posts, terms, dict(DOC_IDS, ventanas=5))
+        changed = sorted(name for name in files if files[name] != self.files.get(name))
+        self.assertEqual(changed, [f"{BASE}/{name}" for name in ("d-2.json", "index.json", "t-bo.json", "t-ve.json")])
+        self.assertEqual(Reader(files).match("bombin"), {0: BITS["body"], 5: BITS["body"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+"""Plantillas compiladas (generator.Template) y la plantilla del artículo, blog/templates/post.html."""
+from __future__ import annotations
+
+from pathlib import Path
+from unittest import mock
+import dataclasses
+import html
+import re
+import sys
+import unittest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import generator  # noqa: E402
+from generator import Template  # noqa: E402
+
+POST = generator.Post(
+    title="Puertas & <ventanas>",
+    slug="puertas",
+    date_iso="2026-03-14",
+    tag="Hogar",
+    read_time=4,
+    popular_rank=None,
+    image="https://example.com/portada.png",
+    image_alt='Una "puerta"',
+    excerpt="Qué mirar <antes> de cambiarla.",
+    quick_title="",
+    quick_summary="",
+    conclusion="Revisa el bombín & la bisagra.",
+    body_md="# Puertas\n\nPárrafo con **negrita** y [enlace](https://example.com).\n\n- uno\n- dos\n",
+)
+RELATED = generator.Card.from_post(dataclasses.replace(POST, slug="bombin", title="Bombines"))
+
+# El evento de visita (bloque “Más leídos”) solo existe en post.html; no estaba en el render con f-strings.
+VIEW_SCRIPT_RE = re.compile(r"\s*<script>\s*// Visita para el bloque.*?</script>", re.S)
+
+
+def legacy_post_content(post: generator.Post, asset_prefix: str, related: tuple) -> str:
+    """render_post_content() antes de post.html: el mismo contenido montado con una f-string."""
+    hero_image = (
+        f"<div class=\"hero-claim\">\n"
+        f"  {generator.render_image(post.image, post.image_alt, asset_prefix, sizes=generator.HERO_IMAGE_SIZES, lazy=False)}\n"
+        f"</div>"
+    )
+    content_html = generator.md_to_html(post.body_md, asset_prefix, hero_image=post.image)
+    return f"""
+    <section class="hero">
+      <div class="container hero-grid">
+        <div>
+          <h1>{html.escape(post.title)}</h1>
+          <p class="hero-subtitle">{html.escape(post.excerpt)}</p>
+          <p class="fineprint">{html.escape(generator.LEGAL_PRE_ENCUADRE)}</p>
+          <p class="fineprint">{html.escape(post.tag)} · {html.escape(post.date_human)} · {post.read_time} min</p>
+        </div>
+      </div>
+    </section>
+
+    <section>
+      <div class="container">
+        <div class="hero-panel">
+          {hero_image}
+          {content_html}
+          <div class="quote">{html.escape(post.conclusion)}</div>
+        </div>
+      </div>
+    </section>
+
+    {generator.related_block(related, asset_prefix)}
+
+    {generator.how_it_works_block()}
+
+    {generator.expert_invite_block(asset_prefix)}
+    """.strip()
+
+
+class CompileTest(unittest.TestCase):
+    def test_escapes_unless_safe(self) -> None:
+        template = Template.compile("<p>{{ text }}</p><div>{{text|safe}}</div><i>{{ text | safe }}</i>")
+        value = '<b title="x">A & B</b>'
+        self.assertEqual(
+            template.render({"text": value}),
+            f'<p>&lt;b title=&quot;x&quot;&gt;A &amp; B&lt;/b&gt;</p><div>{value}</div><i>{value}</i>',
+        )
+
+    def test_values_are_converted_to_text(self) -> None:
+        self.assertEqual(Template.compile("{{ n }} min").render({"n": 4}), "4 min")
+
+    def test_constants_are_folded_into_literals(self) -> None:
+        template = Template.compile("{{ legal }}|{{ block|safe }}|{{ title }}", {"legal": "a < b", "block": "<hr>"})
+        self.assertEqual(template.parts, ("a &lt; b|<hr>|", "", ""))
+        self.assertEqual(template.slots, ((1, "title", True),))
+        self.assertEqual(template.render({"title": "T"}), "a &lt; b|<hr>|T")
+
+    def test_comments_and_outer_whitespace_are_dropped(self) -> None:
+        template = Template.compile("{# nota\n  de diseño #}\n  <p>{{ x }}</p>\n\n")
+        self.assertEqual(template.render({"x": "y"}), "<p>y</p>")
+
+    def test_same_slot_can_repeat(self) -> None:
+        self.assertEqual(Template.compile("{{ a }}-{{ a }}").render({"a": "&"}), "&amp;-&amp;")
+
+    def test_invalid_tag_reports_line(self) -> None:
+        # No hay bucles ni condicionales: cualquier otra cosa entre {{ }} es un error al compilar.
+        for tag in ("{{ post.title }}", "{{ title|upper }}", "{{ for p in posts }}", "{{ }}"):
+            with self.subTest(tag=tag), self.assertRaisesRegex(ValueError, r"^post\.html:3: etiqueta de plantilla no válida"):
+                Template.compile(f"{{# comentario\nde dos líneas #}}\n{tag}", name="post.html")
+
+    def test_missing_value(self) -> None:
+        template = Template.compile("{{ title }} {{ excerpt }}", name="post.html")
+        with self.assertRaisesRegex(ValueError, r"^post\.html: falta el valor de \{\{ excerpt \}\}$"):
+            template.render({"title": "T"})
+
+
+class PostTemplateTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # Sin Pillow (y con una portada remota) render_image() no depende de blog/img/responsive/.
+        patcher = mock.patch.object(generator, "Image", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_documented_slots(self) -> None:
+        slots = {key for _, key, _ in generator.post_template("../../").slots}
+        self.assertEqual(
+            slots,
+            {"title", "slug", "excerpt", "tag", "date_human", "read_time", "hero_image", "content", "conclusion", "related"},
+        )
+
+    def test_matches_string_built_content(self) -> None:
+        for related in ((), (RELATED,)):
+            with self.subTest(related=len(related)):
+                rendered = generator.render_post_content(POST, asset_prefix="../../", related=related)
+                self.assertEqual(
+                    VIEW_SCRIPT_RE.sub("", generator.minify_html(rendered)),
+                    generator.minify_html(legacy_post_content(POST, "../../", related)),
+                )
+                self.assertIn('trackEvent("blog_post_viewed", { slug: "puertas" })', rendered)
+
+    def test_blocks_shared_with_blog_html(self) -> None:
+        # blog.html sigue montándose con render_blog_content(); reutiliza los mismos bloques fijos.
+        post_html = generator.render_post_content(POST, asset_prefix="")
+        blog_html = generator.render_blog_content([RELATED])
+        for block in (generator.how_it_works_block(), generator.expert_invite_block("")):
+            self.assertIn(block, post_html)
+            self.assertIn(block, blog_html)
+        generator.how_it_works_block.cache_clear()
+        generator.expert_invite_block.cache_clear()
+        generator.post_template.cache_clear()
+        self.assertEqual(generator.render_post_content(POST, asset_prefix=""), post_html)
+        self.assertEqual(generator.render_blog_content([RELATED]), blog_html)
+
+
+if __name__ == "__main__":
+    unittest.main()
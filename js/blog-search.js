@@ -0,0 +1,144 @@
+(function psBlogSearch() {
+  const input = document.querySelector("input[data-blog-search]");
+  const results = document.querySelector("[data-blog-search-results]");
+  if (!input || !results) return;
+
+  const indexBase = input.dataset.blogSearch;
+  const linkPrefix = input.dataset.blogPrefix || "";
+  const listing = document.querySelectorAll("[data-blog-listing]");
+  const MAX_RESULTS = 24;
+  const FIELD_WEIGHTS = { title: 4, tag: 3, excerpt: 2, body: 1 };
+  const cache = new Map();
+  let meta = null;
+  let pending = 0;
+
+  function fetchJson(name) {
+    if (!cache.has(name)) {
+      cache.set(
+        name,
+        fetch(indexBase + name).then((res) => (res.ok ? res.json() : null)).catch(() => null)
+      );
+    }
+    return cache.get(name);
+  }
+
+  // Misma normalización que slugify() en blog/generator.py.
+  function tokens(query) {
+    const folded = query
+      .normalize("NFKD")
+      .replace(/[\u0300-\u036f]/g, "")
+      .toLowerCase()
+      .replace(/[^\p{L}\p{N}\s_-]/gu, "");
+    const stop = new Set(meta.stopwords);
+    return folded.split(/[\s_-]+/).filter((t) => t.length > 1 && !stop.has(t));
+  }
+
+  function shardKey(term) {
+    const key = term.slice(0, 2);
+    if (/^[a-z0-9]{2}$/.test(key)) return key;
+    return "x" + Array.from(new TextEncoder().encode(key), (b) => b.toString(16).padStart(2, "0")).join("");
+  }
+
+  function lowerBound(terms, term) {
+    let lo = 0;
+    let hi = terms.length;
+    while (lo < hi) {
+      const mid = (lo + hi) >> 1;
+      if (terms[mid] < term) lo = mid + 1;
+      else hi = mid;
+    }
+    return lo;
+  }
+
+  function fieldScore(bits) {
+    let score = 0;
+    for (const [field, bit] of Object.entries(meta.fields)) {
+      if (bits & bit) score += FIELD_WEIGHTS[field] || 1;
+    }
+    return score;
+  }
+
+  // Puntuación por documento de un token; el último token se busca como prefijo.
+  async function matchToken(token, isPrefix) {
+    const shard = meta.shards.includes(shardKey(token)) ? await fetchJson(`t-${shardKey(token)}.json`) : null;
+    const scores = new Map();
+    if (!shard) return scores;
+    for (let i = lowerBound(shard.terms, token); i < shard.terms.length; i += 1) {
+      const term = shard.terms[i];
+      if (isPrefix ? !term.startsWith(token) : term !== token) break;
+      const postings = shard.postings[i];
+      let doc = 0;
+      for (let j = 0; j < postings.length; j += 2) {
+        doc += postings[j];
+        scores.set(doc, Math.max(scores.get(doc) || 0, fieldScore(postings[j + 1])));
+      }
+    }
+    return scores;
+  }
+
+  function escapeHtml(text) {
+    return String(text).replace(/[&<>"']/g, (ch) => `&#${ch.charCodeAt(0)};`);
+  }
+
+  function renderCard(doc) {
+    const [href, title, excerpt, tag, date, readTime, image, imageAlt] = doc;
+    const img = image
+      ? `<img src="${escapeHtml(/^https?:/.test(image) ? image : linkPrefix + image)}" alt="${escapeHtml(imageAlt)}" loading="lazy">`
+      : "";
+    return (
+      `<a class="card" href="${escapeHtml(linkPrefix + href)}">${img}` +
+      `<h3>${escapeHtml(title)}</h3><p>${escapeHtml(excerpt)}</p>` +
+      `<p class="fineprint">${escapeHtml(tag)} · ${escapeHtml(date)} · ${readTime} min</p></a>`
+    );
+  }
+
+  function showListing(visible) {
+    listing.forEach((el) => {
+      el.hidden = !visible;
+    });
+    results.hidden = visible;
+  }
+
+  async function run(query) {
+    const ticket = ++pending;
+    if (!meta) meta = await fetchJson("index.json");
+    if (!meta) return;
+    const terms = tokens(query);
+    if (!terms.length) {
+      showListing(true);
+      return;
+    }
+
+    const perToken = await Promise.all(terms.map((t, i) => matchToken(t, i === terms.length - 1)));
+    if (ticket !== pending) return;
+
+    let ranked = Array.from(perToken[0].entries());
+    for (const scores of perToken.slice(1)) {
+      ranked = ranked.filter(([doc]) => scores.has(doc)).map(([doc, s]) => [doc, s + scores.get(doc)]);
+    }
+    // Empate: los ids se asignan por orden de alta, así que el más alto es el artículo más reciente.
+    ranked.sort((a, b) => b[1] - a[1] || b[0] - a[0]);
+    const top = ranked.slice(0, MAX_RESULTS).map(([doc]) => doc);
+
+    const chunks = await Promise.all(
+      Array.from(new Set(top.map((doc) => Math.floor(doc / meta.docs_per_shard))), (n) =>
+        fetchJson(`d-${n}.json`).then((docs) => [n, docs || []])
+      )
+    );
+    if (ticket !== pending) return;
+    const byChunk = new Map(chunks);
+    const cards = top
+      .map((doc) => (byChunk.get(Math.floor(doc / meta.docs_per_shard)) || [])[doc % meta.docs_per_shard])
+      .filter(Boolean)
+      .map(renderCard);
+
+    results.innerHTML = cards.length ? cards.join("") : '<p class="fineprint">Sin resultados.</p>';
+    showListing(false);
+  }
+
+  let timer = 0;
+  input.addEventListener("input", () => {
+    clearTimeout(timer);
+    timer = setTimeout(() => run(input.value), 120);
+  });
+})();
@@ -112,7 +112,50 @@ app.use((req, res, next) => {
   return next();
 });
 
-app.use(express.static(ROOT_DIR, { index: false, dotfiles: "ignore" }));
+// Salidas del blog precomprimidas por blog/build.py (.br/.gz junto a cada .html/.json):
+// se sirven tal cual en vez de comprimir en cada petición.
+const PRECOMPRESSED_TYPES = {
+  ".html": "text/html; charset=utf-8",
+  ".json": "application/json; charset=utf-8",
+};
+const PRECOMPRESSED_ENCODINGS = [
+  ["br", ".br"],
+  ["gzip", ".gz"],
+];
+
+app.use((req, res, next) => {
+  if (req.method !== "GET" && req.method !== "HEAD") return next();
+  const pathName = req.path === "/blog" ? "/blog.html" : req.path || "";
+  const contentType = PRECOMPRESSED_TYPES[path.extname(pathName)];
+  if (!contentType || !(pathName === "/blog.html" || pathName.startsWith("/blog/"))) return next();
+
+  const source = path.resolve(ROOT_DIR, `.${pathName}`);
+  if (source !== file("blog.html") && !source.startsWith(file("blog") + path.sep)) return next();
+
+  const accepted = String(req.headers["accept-encoding"] || "");
+  for (const [encoding, ext] of PRECOMPRESSED_ENCODINGS) {
+    if (!accepted.includes(encoding) || !fs.existsSync(source + ext)) continue;
+    res.set({ "Content-Type": contentType, "Content-Encoding": encoding, Vary: "Accept-Encoding" });
+    return res.sendFile(source + ext);
+  }
+  res.vary("Accept-Encoding");
+  return next();
+});
+
+// Copias con hash en el nombre (blog/build.py --fingerprint, css/js ps-shell.<hash>): su contenido no cambia nunca.
+const FINGERPRINTED_FILE = /\.[0-9a-f]{16}\.[A-Za-z0-9]+$/;
+
+app.use(
+  express.static(ROOT_DIR, {
+    index: false,
+    dotfiles: "ignore",
+    setHeaders(res, filePath) {
+      if (FINGERPRINTED_FILE.test(filePath)) {
+        res.set("Cache-Control", "public, max-age=31536000, immutable");
+      }
+    },
+  })
+);
 
 function file(filePath) {
   return path.join(ROOT_DIR, filePath);